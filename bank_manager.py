@@ -1,14 +1,32 @@
 # bank_manager.py
 import os
 import json
-import uuid
 import hashlib
+import bisect
+import struct
+import itertools
 import tkinter as tk
+from contextlib import contextmanager
 from datetime import date, datetime, timedelta
-from core import APP_DATA_DIR, atomic_write, SECRET_SALT, log_event
+from core import APP_DATA_DIR, atomic_write, SECRET_SALT, log_event, get_file_stat, FileLock, paths
 
 # Caminho do Ledger
 BANK_FILE = os.path.join(APP_DATA_DIR, "bank.json")
+# Saldo materializado (totais + agenda de desbloqueio), amarrado ao hash da ponta da corrente
+BANK_STATE_FILE = os.path.join(APP_DATA_DIR, "bank_state.json")
+BANK_STATE_VERSION = 3 # Snapshots de outra versão são recalculados do zero
+# Anos encerrados saem do bank.json e viram segmentos selados (só leitura)
+SEGMENTS_DIR = os.path.join(APP_DATA_DIR, "bank_segments")
+
+# Caminhos do perfil ativo (as constantes acima são as do perfil do processo)
+def bank_file(): return os.path.join(paths().app_data_dir, "bank.json")
+def bank_state_file(): return os.path.join(paths().app_data_dir, "bank_state.json")
+def segments_dir(): return os.path.join(paths().app_data_dir, "bank_segments")
+# Índices dos blocos DEPOSIT em ordem (paginação do extrato), fora do snapshot assinado:
+# 8 bytes por depósito, só cresce; o snapshot guarda só a contagem
+def deposit_index_file(): return os.path.join(paths().app_data_dir, "bank_deposits.idx")
+DEPOSIT_ENTRY = struct.Struct("<Q")
+LOT_PREFIX = "lote:"   # task_source dos blocos ALLOCATE: "lote:<índice do depósito>"
 
 # --- SISTEMA DE ALERTA VISUAL E LOG ---
 def alert_security_breach(error_msg):
@@ -88,11 +106,11 @@ def init_genesis_block():
 
 def load_ledger():
     """Carrega a blockchain."""
-    if not os.path.exists(BANK_FILE):
+    if not os.path.exists(bank_file()):
         return init_genesis_block()
     
     try:
-        with open(BANK_FILE, 'r', encoding='utf-8') as f:
+        with open(bank_file(), 'r', encoding='utf-8') as f:
             data = json.load(f)
         
         if "transactions" in data and "chain" not in data:
@@ -102,6 +120,22 @@ def load_ledger():
     except:
         return init_genesis_block()
 
+_ledger_cache = {} # caminho -> (stat, dados): leitura do extrato, trocado de uma vez só
+
+def load_ledger_cached():
+    """
+    Ledger só para leitura (páginas do extrato): o bank.json só é relido e
+    reparseado se o stat mudou. Quem for alterar os dados usa load_ledger().
+    """
+    path = bank_file()
+    stat = get_file_stat(path) # Antes da leitura: gravação no meio invalida na próxima chamada
+    cached = _ledger_cache.get(path)
+    if stat is not None and cached and cached[0] == stat:
+        return cached[1]
+    data = load_ledger()
+    _ledger_cache[path] = (stat, data)
+    return data
+
 def migrate_old_format(old_data):
     """Converte formato inseguro para Blockchain."""
     new_data = init_genesis_block()
@@ -148,10 +182,11 @@ def verify_integrity(chain):
             
     return True
 
-def add_block_to_chain(chain, type_, task, amount, unlock_date):
+def add_block_to_chain(chain, type_, task, amount, unlock_date, timestamp=None):
+    """'timestamp' permite reproduzir blocos históricos (importação em lote)."""
     last_block = chain[-1]
     new_index = last_block['index'] + 1
-    now_iso = datetime.now().isoformat()
+    now_iso = timestamp or datetime.now().isoformat()
     
     new_block = {
         "index": new_index,
@@ -169,20 +204,509 @@ def add_block_to_chain(chain, type_, task, amount, unlock_date):
     )
     
     chain.append(new_block)
+    return new_block
 
 def save_ledger(data):
-    if verify_integrity(data['chain']):
-        atomic_write(BANK_FILE, data)
+    if verify_ledger(data):
+        write_ledger(data)
+        update_bank_state(data)
     else:
         print("ABORTANDO SALVAMENTO: Blockchain corrompida.")
 
+def write_ledger(data):
+    """Sela os anos encerrados (se houver) e grava o segmento aberto."""
+    seal_closed_years(data)
+    atomic_write(bank_file(), data)
+
+# --- SEGMENTOS SELADOS (um por ano encerrado) ---
+#
+# bank.json guarda só o segmento aberto: chain[0] é a âncora (cópia do último bloco
+# selado, ou o GENESIS) e "segments" é o manifesto dos segmentos selados, em ordem.
+# Cada segmento tem hash final, totais e um selo assinado; só é lido/auditado quando
+# algo precisa de blocos antigos (recompute do saldo, páginas antigas do extrato).
+
+def sign_segment(meta):
+    payload = (f"{meta['year']}{meta['first_index']}{meta['last_index']}{meta['first_prev_hash']}"
+               f"{meta['final_hash']}{json.dumps(meta['totals'], sort_keys=True)}{SECRET_SALT}")
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def segment_totals(blocks):
+    totals = {"blocks": len(blocks), "deposited": 0, "spent": 0}
+    for block in blocks:
+        if block['type'] == 'DEPOSIT': totals['deposited'] += block['amount']
+        elif block['type'] == 'SPEND': totals['spent'] += abs(block['amount'])
+    return totals
+
+def seal_closed_years(data, today=None):
+    """
+    Move para segmentos selados os blocos do início do segmento aberto cujo ano já
+    terminou (um segmento por ano). Retorna quantos segmentos foram criados.
+    """
+    year = (today or date.today()).year
+    chain = data['chain']
+    start = 0 if chain[0]['type'] == 'GENESIS' and not data.get('segments') else 1
+    years = [int(block['timestamp'][:4]) for block in chain]
+    if start == 0 and len(chain) > 1:
+        years[0] = min(years[0], years[1]) # GENESIS acompanha o primeiro bloco (importações antigas)
+    sealed = 0
+
+    while start < len(chain) and years[start] < year:
+        seg_year = years[start]
+        end = start
+        # Blocos fora de ordem (importados com data antiga) entram no segmento corrente
+        while end < len(chain) and years[end] <= seg_year:
+            end += 1
+        blocks = chain[start:end]
+        meta = {
+            "year": seg_year,
+            "file": f"bank_{blocks[0]['index']:08d}_{seg_year}.json",
+            "first_index": blocks[0]['index'],
+            "last_index": blocks[-1]['index'],
+            "first_prev_hash": blocks[0]['previous_hash'],
+            "final_hash": blocks[-1]['hash'],
+            "totals": segment_totals(blocks)
+        }
+        meta['seal'] = sign_segment(meta)
+        os.makedirs(segments_dir(), exist_ok=True)
+        atomic_write(os.path.join(segments_dir(), meta['file']), dict(meta, blocks=blocks))
+
+        data.setdefault('segments', []).append(meta)
+        start = end
+        sealed += 1
+
+    if sealed:
+        # A âncora é o último bloco selado: mantém chain[-1] e o elo previous_hash
+        data['chain'] = [chain[start-1]] + chain[start:]
+        log_event("bank_segment_sealed", f"{sealed} segmento(s) selado(s) no Banco de Horas.", category="system")
+    return sealed
+
+_segment_cache = {}
+
+def load_segment(meta):
+    """Blocos de um segmento selado, auditado na primeira leitura. None se adulterado."""
+    path = os.path.join(segments_dir(), meta['file'])
+    stat = get_file_stat(path)
+    cached = _segment_cache.get(path)
+    if cached and cached[0] == stat and cached[1] == meta['seal']:
+        return cached[2]
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            segment = json.load(f)
+        blocks = segment['blocks']
+    except:
+        alert_security_breach(f"Segmento {meta['file']} ausente ou ilegível.")
+        return None
+
+    if (meta.get('seal') != sign_segment(meta) or segment.get('seal') != meta['seal']
+            or not blocks or blocks[0]['previous_hash'] != meta['first_prev_hash']
+            or blocks[-1]['hash'] != meta['final_hash'] or segment_totals(blocks) != meta['totals']):
+        alert_security_breach(f"Segmento {meta['file']} não confere com o selo.")
+        return None
+    if not verify_integrity(blocks): return None
+
+    _segment_cache[path] = (stat, meta['seal'], blocks)
+    return blocks
+
+def verify_ledger(data):
+    """
+    Auditoria do caminho quente: segmento aberto + elo com o último selo.
+    Os segmentos selados ficam para load_segment / verify_full_ledger.
+    """
+    chain = data['chain']
+    segments = data.get('segments') or []
+    if segments:
+        last = segments[-1]
+        if last.get('seal') != sign_segment(last) or chain[0]['hash'] != last['final_hash']:
+            alert_security_breach("Âncora do segmento aberto não confere com o último selo.")
+            return False
+    return verify_integrity(chain)
+
+def verify_full_ledger(data=None):
+    """Auditoria sob demanda: todos os segmentos selados, os elos entre eles e o aberto."""
+    data = data or load_ledger()
+    prev_hash = "0" * 64
+    for meta in data.get('segments') or []:
+        if meta['first_prev_hash'] != prev_hash:
+            alert_security_breach(f"Quebra de corrente antes do segmento {meta['file']}.")
+            return False
+        if load_segment(meta) is None: return False
+        prev_hash = meta['final_hash']
+    return verify_ledger(data)
+
+def iter_full_chain(data):
+    """Todos os blocos, do GENESIS à ponta (lê os segmentos selados)."""
+    segments = data.get('segments') or []
+    for meta in segments:
+        blocks = load_segment(meta)
+        if blocks is None: raise LedgerIntegrityError(f"Segmento {meta['file']} violado.")
+        yield from blocks
+    yield from (data['chain'][1:] if segments else data['chain'])
+
+def get_block(data, index):
+    """Bloco pelo índice global: segmento aberto direto, selados sob demanda."""
+    chain = data['chain']
+    base = chain[0]['index']
+    segments = data.get('segments') or []
+    if index > base or (index == base and not segments):
+        return chain[index - base] if index - base < len(chain) else None
+    pos = bisect.bisect_right([m['first_index'] for m in segments], index) - 1
+    if pos < 0: return None
+    blocks = load_segment(segments[pos])
+    if blocks is None: return None
+    return blocks[index - segments[pos]['first_index']]
+
+# --- SALDO MATERIALIZADO (bank_state.json) ---
+
+def sign_bank_state(state):
+    payload = json.dumps({k: v for k, v in state.items() if k not in ("signature", "_WARNING")},
+                         sort_keys=True) + SECRET_SALT
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def new_bank_state():
+    return {
+        "version": BANK_STATE_VERSION,
+        "tip_index": -1,
+        "tip_hash": None,
+        "as_of": "0000-01-01",  # Data até a qual a agenda já foi liberada
+        "released": 0,          # Depósitos já desbloqueados (até as_of)
+        "spent": 0,             # Total gasto
+        "unlock_schedule": [],  # [[unlock_date, minutos], ...] ainda bloqueados, ordenado
+        "lots_locked": [],      # [[unlock_date, índice, minutos], ...] depósitos bloqueados, ordenado
+        "lots_open": [],        # [[índice, restante], ...] depósitos liberados com saldo, ordenado (FIFO)
+        "unallocated": 0,       # Gastos ainda sem blocos ALLOCATE (ledgers antigos)
+        "deposit_count": 0,     # Depósitos na corrente (os índices ficam em bank_deposits.idx)
+        "ledger_stat": None
+    }
+
+def _open_lot(state, index, amount):
+    bisect.insort(state['lots_open'], [index, amount])
+
+def apply_block_to_state(state, block):
+    """Incremental: soma UM bloco aos totais."""
+    if block['type'] == 'DEPOSIT':
+        state['deposit_count'] += 1
+        state.setdefault('_new_deposits', []).append(block['index']) # Vão para o índice no save
+        if block['unlock_date'] <= state['as_of']:
+            state['released'] += block['amount']
+            _open_lot(state, block['index'], block['amount'])
+        else:
+            schedule = state['unlock_schedule']
+            # Depósitos novos quase sempre têm o maior unlock_date: append no fim
+            i = len(schedule)
+            while i > 0 and schedule[i-1][0] > block['unlock_date']: i -= 1
+            if i > 0 and schedule[i-1][0] == block['unlock_date']:
+                schedule[i-1][1] += block['amount']
+            else:
+                schedule.insert(i, [block['unlock_date'], block['amount']])
+            bisect.insort(state['lots_locked'], [block['unlock_date'], block['index'], block['amount']])
+    elif block['type'] == 'SPEND':
+        state['spent'] += abs(block['amount'])
+        state['unallocated'] += abs(block['amount'])
+    elif block['type'] == 'ALLOCATE':
+        # Gravado por outro processo depois de um desbloqueio que este snapshot (as_of
+        # antigo) ainda não viu: libera até a data do bloco antes de procurar o lote
+        if block.get('unlock_date') and block['unlock_date'] > state['as_of']:
+            release_unlocked(state, block['unlock_date'])
+        taken = abs(block['amount'])
+        state['unallocated'] -= taken
+        try: lot_index = int(block['task_source'][len(LOT_PREFIX):])
+        except: lot_index = -1
+        lots = state['lots_open']
+        i = bisect.bisect_left(lots, [lot_index])
+        if i < len(lots) and lots[i][0] == lot_index:
+            lots[i][1] -= taken
+            if lots[i][1] <= 0: del lots[i]
+    state['tip_index'] = block['index']
+    state['tip_hash'] = block['hash']
+
+def release_unlocked(state, today_str):
+    """Move para 'released' o que desbloqueou desde as_of (amortizado O(1))."""
+    schedule = state['unlock_schedule']
+    released = 0
+    while released < len(schedule) and schedule[released][0] <= today_str:
+        state['released'] += schedule[released][1]
+        released += 1
+    if released: del schedule[:released]
+
+    lots = state['lots_locked']
+    opened = 0
+    while opened < len(lots) and lots[opened][0] <= today_str:
+        _open_lot(state, lots[opened][1], lots[opened][2])
+        opened += 1
+    if opened: del lots[:opened]
+
+    state['as_of'] = max(state['as_of'], today_str)
+    return released > 0
+
+def rebuild_bank_state(data):
+    """Recalcula do zero (só quando a ponta não bate com o snapshot). Lê os segmentos selados."""
+    state = new_bank_state()
+    state['as_of'] = date.today().isoformat()
+    for block in iter_full_chain(data):
+        if block['type'] == 'GENESIS':
+            state['tip_index'] = block['index']; state['tip_hash'] = block['hash']
+            continue
+        apply_block_to_state(state, block)
+    return state
+
+def load_bank_state():
+    """Snapshot assinado, ou None se ausente/adulterado."""
+    try:
+        with open(bank_state_file(), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') == BANK_STATE_VERSION and state.get('signature') == sign_bank_state(state):
+            return state
+    except: pass
+    return None
+
+def save_bank_state(state, ledger_stat=None):
+    """
+    'ledger_stat': stat do bank.json de ONDE o estado saiu (tirado antes de lê-lo).
+    Sem ele, usa o stat atual: só vale para quem segura o lock do ledger (transaction).
+    Os depósitos aplicados desde o load vão para bank_deposits.idx antes do snapshot.
+    """
+    new_deposits = state.pop('_new_deposits', [])
+    state['ledger_stat'] = ledger_stat if ledger_stat is not None else get_file_stat(bank_file())
+    state.pop('_WARNING', None)
+    state['signature'] = sign_bank_state(state)
+    try:
+        with FileLock(bank_state_file()):
+            # Índice primeiro: o snapshot nunca conta mais depósitos do que o índice tem
+            if new_deposits:
+                write_deposit_index(state['deposit_count'] - len(new_deposits), new_deposits)
+            atomic_write(bank_state_file(), state)
+    except: pass
+
+# --- ÍNDICE DE DEPÓSITOS (bank_deposits.idx) ---
+
+def write_deposit_index(position, indices):
+    """
+    Grava 'indices' a partir da posição 'position' (o que houver depois é descartado).
+    Se o arquivo tiver menos que 'position' entradas, não grava: get_history reconstrói.
+    """
+    path = deposit_index_file()
+    try:
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size < position * DEPOSIT_ENTRY.size: return False
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+            f.seek(position * DEPOSIT_ENTRY.size)
+            f.write(b"".join(DEPOSIT_ENTRY.pack(i) for i in indices))
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+    except OSError:
+        return False
+
+def read_deposit_index(start, end):
+    """Índices dos depósitos nas posições [start, end) (leitura direta com seek)."""
+    try:
+        with open(deposit_index_file(), 'rb') as f:
+            f.seek(start * DEPOSIT_ENTRY.size)
+            raw = f.read((end - start) * DEPOSIT_ENTRY.size)
+    except OSError:
+        return []
+    raw = raw[:len(raw) - len(raw) % DEPOSIT_ENTRY.size]
+    return [i for (i,) in DEPOSIT_ENTRY.iter_unpack(raw)]
+
+def rebuild_deposit_index(data):
+    """Índice apagado ou incompleto: refeito da corrente inteira (lê os segmentos selados)."""
+    indices = [b['index'] for b in iter_full_chain(data) if b['type'] == 'DEPOSIT']
+    with FileLock(bank_state_file()):
+        try: os.remove(deposit_index_file())
+        except OSError: pass
+        write_deposit_index(0, indices)
+    log_event("bank_index_rebuild", f"Índice do extrato refeito ({len(indices)} depósitos).", category="system")
+
+def reconcile_bank_state(data):
+    """
+    Snapshot alinhado com o ledger: aplica só os blocos novos desde a ponta
+    do snapshot. Recompute completo apenas se a ponta antiga não estiver no segmento aberto.
+    """
+    chain = data['chain']
+    state = load_bank_state()
+    tip = (state['tip_index'] - chain[0]['index']) if state else -1
+    if state and 0 <= tip < len(chain) and chain[tip]['hash'] == state['tip_hash']:
+        for block in chain[tip+1:]:
+            apply_block_to_state(state, block)
+    else:
+        state = rebuild_bank_state(data)
+    return state
+
+def update_bank_state(data, ledger_stat=None):
+    """Chamado depois de gravar o ledger (ou de relê-lo, com o stat da leitura)."""
+    state = reconcile_bank_state(data)
+    save_bank_state(state, ledger_stat)
+    return state
+
+def get_bank_state():
+    """
+    Saldo sem varrer a corrente: se o bank.json não mudou desde o snapshot
+    (mesmo stat), os totais valem. Se mudou por fora, audita e reconcilia.
+    Retorna None se a corrente estiver violada.
+    """
+    state = load_bank_state()
+    ledger_stat = get_file_stat(bank_file())
+    if state is None or state.get('ledger_stat') != ledger_stat:
+        # Stat tirado ANTES da leitura: se outro processo gravar no meio, o
+        # snapshot fica marcado com o ledger antigo e a próxima leitura reconcilia
+        data = load_ledger()
+        if not verify_ledger(data): return None
+        try: state = update_bank_state(data, ledger_stat)
+        except LedgerIntegrityError: return None
+
+    if release_unlocked(state, date.today().isoformat()):
+        save_bank_state(state, state['ledger_stat'])
+    return state
+
+# --- ÍNDICE DE DESBLOQUEIO ---
+
+_unlock_index = (None, [], []) # (chave, datas, acumulado), trocado de uma vez só
+
+def get_unlock_index(state):
+    """
+    Agenda ainda bloqueada como (datas ordenadas, minutos acumulados).
+    Reconstruída só quando a ponta da corrente ou o as_of mudam.
+    """
+    global _unlock_index
+    key = (state['tip_hash'], state['as_of'], len(state['unlock_schedule']))
+    index = _unlock_index
+    if index[0] != key:
+        schedule = state['unlock_schedule']
+        index = (key, [d for d, _ in schedule], list(itertools.accumulate(a for _, a in schedule)))
+        _unlock_index = index
+    return index[1], index[2]
+
+def _to_iso(day):
+    return day.isoformat() if isinstance(day, date) else str(day)
+
+def unlocked_between(state, start, end):
+    """Minutos que desbloqueiam em (start, end]. Duas buscas binárias."""
+    dates, cumulative = get_unlock_index(state)
+    def upto(day):
+        i = bisect.bisect_right(dates, _to_iso(day))
+        return cumulative[i-1] if i else 0
+    return upto(end) - upto(start)
+
+def get_balances_as_of(day):
+    """
+    (bloqueado, disponível) na data 'day' (hoje ou no futuro), considerando o que
+    já foi gasto. Datas passadas retornam o saldo de hoje.
+    """
+    state = get_bank_state()
+    if state is None: return 0, 0
+    dates, cumulative = get_unlock_index(state)
+    total_locked = cumulative[-1] if cumulative else 0
+    newly = unlocked_between(state, state['as_of'], max(_to_iso(day), state['as_of']))
+    return total_locked - newly, max(0, state['released'] + newly - state['spent'])
+
+def release_calendar(start, end, by="day"):
+    """
+    Minutos que desbloqueiam entre start e end (inclusive), por dia ou por semana
+    (by="week", agrupado pela segunda-feira). Retorna [(data_iso, minutos), ...].
+    """
+    state = get_bank_state()
+    if state is None: return []
+    dates, _ = get_unlock_index(state)
+    lo = bisect.bisect_left(dates, _to_iso(start))
+    hi = bisect.bisect_right(dates, _to_iso(end))
+
+    calendar = []
+    for unlock_date, amount in state['unlock_schedule'][lo:hi]:
+        if by == "week":
+            d = date.fromisoformat(unlock_date)
+            unlock_date = (d - timedelta(days=d.weekday())).isoformat()
+        if calendar and calendar[-1][0] == unlock_date:
+            calendar[-1] = (unlock_date, calendar[-1][1] + amount)
+        else:
+            calendar.append((unlock_date, amount))
+    return calendar
+
+# --- TRANSAÇÕES ---
+
+class LedgerIntegrityError(Exception):
+    """A corrente não passou na auditoria ao abrir a transação."""
+
+class LedgerTransaction:
+    """
+    Uma leitura + uma auditoria na abertura, N blocos em memória, uma escrita no commit.
+    Os saldos acompanham os blocos pendentes (spend vê os depósitos da mesma transação).
+    """
+    def __init__(self, data, state):
+        self.data = data
+        self.state = state
+        self.new_blocks = []
+
+    def _append(self, type_, task, amount, unlock_date, timestamp=None):
+        block = add_block_to_chain(self.data['chain'], type_, task, amount, unlock_date, timestamp)
+        apply_block_to_state(self.state, block)
+        self.new_blocks.append(block)
+        return block
+
+    def balances(self):
+        locked = sum(amount for _, amount in self.state['unlock_schedule'])
+        return locked, max(0, self.state['released'] - self.state['spent'])
+
+    def allocate(self):
+        """
+        Consome os lotes liberados mais antigos (FIFO) para cobrir os gastos ainda
+        sem alocação, gravando um bloco ALLOCATE por lote. Inclui gastos antigos.
+        """
+        lots = self.state['lots_open']
+        while self.state['unallocated'] > 0 and lots:
+            lot_index, remaining = lots[0]
+            taken = min(remaining, self.state['unallocated'])
+            self._append("ALLOCATE", f"{LOT_PREFIX}{lot_index}", -taken, date.today().isoformat())
+
+    def deposit(self, task, amount, unlock_date, timestamp=None):
+        return self._append("DEPOSIT", task, int(amount), unlock_date, timestamp)
+
+    def spend(self, minutes, source="Standby Mode"):
+        """Retorna (sucesso, mensagem) como spend_minutes."""
+        _, available = self.balances()
+        if available < minutes:
+            return False, f"Saldo insuficiente. Tem: {available}min | Precisa: {minutes}min"
+        self._append("SPEND", source, -minutes, date.today().isoformat())
+        self.allocate()
+        return True, "Tempo resgatado."
+
+@contextmanager
+def transaction():
+    """
+    with transaction() as tx:
+        tx.deposit(...); tx.spend(...)
+    Sem exceção: grava tudo de uma vez. Com exceção: nada é gravado.
+    """
+    with FileLock(bank_file()):
+        data = load_ledger()
+        if not verify_ledger(data):
+            raise LedgerIntegrityError("Blockchain violada. Log de segurança gerado.")
+        state = reconcile_bank_state(data)
+        release_unlocked(state, date.today().isoformat())
+
+        tx = LedgerTransaction(data, state)
+        yield tx
+
+        if tx.new_blocks:
+            # Blocos novos foram encadeados por add_block_to_chain: não precisa re-auditar
+            write_ledger(data)
+        save_bank_state(state)
+
+def import_deposits(records):
+    """
+    Importação/replay em lote: [{task_source, amount, unlock_date, timestamp?}, ...].
+    Uma transação, uma escrita, qualquer quantidade de blocos. Retorna quantos entraram.
+    """
+    with transaction() as tx:
+        for rec in records:
+            if int(rec.get('amount', 0)) <= 0: continue
+            tx.deposit(rec.get('task_source', 'Importação'), rec['amount'], rec['unlock_date'], rec.get('timestamp'))
+        return len(tx.new_blocks)
+
 # --- API PÚBLICA ---
 
 def create_transaction(task_name, min_time, actual_time):
-    data = load_ledger()
-    if not verify_integrity(data['chain']):
-        return False, "ERRO CRÍTICO: Blockchain violada. Log de segurança gerado."
-
     min_time = int(min_time)
     actual_time = int(actual_time)
     excedente = actual_time - min_time
@@ -192,81 +716,83 @@ def create_transaction(task_name, min_time, actual_time):
     
     unlock_date = (date.today() + timedelta(days=180)).isoformat()
     
-    add_block_to_chain(data['chain'], "DEPOSIT", task_name, banco_earned, unlock_date)
-    save_ledger(data)
+    try:
+        with transaction() as tx:
+            tx.deposit(task_name, banco_earned, unlock_date)
+    except LedgerIntegrityError:
+        return False, "ERRO CRÍTICO: Blockchain violada. Log de segurança gerado."
     
     return True, f"+{banco_earned}m depositados (Cadeado: 6 meses)"
 
 def get_balances():
-    data = load_ledger()
-    if not verify_integrity(data['chain']): return 0, 0
-    
-    today_str = date.today().isoformat()
-    
-    total_locked = 0
-    gross_available = 0
-    total_spent = 0
+    """(bloqueado, disponível) a partir do saldo materializado: O(1) no tamanho da corrente."""
+    state = get_bank_state()
+    if state is None: return 0, 0
     
-    for block in data['chain']:
-        if block['type'] == 'GENESIS': continue
-        
-        amt = block['amount']
-        
-        if block['type'] == 'DEPOSIT':
-            if block['unlock_date'] <= today_str:
-                gross_available += amt
-            else:
-                total_locked += amt
-        elif block['type'] == 'SPEND':
-            total_spent += abs(amt)
-            
-    net_available = max(0, gross_available - total_spent)
+    _, cumulative = get_unlock_index(state)
+    total_locked = cumulative[-1] if cumulative else 0
+    net_available = max(0, state['released'] - state['spent'])
     return total_locked, net_available
 
 def spend_minutes(minutes_needed):
-    locked, available = get_balances()
-    
-    if available < minutes_needed:
-        return False, f"Saldo insuficiente. Tem: {available}min | Precisa: {minutes_needed}min"
-        
-    data = load_ledger()
-    add_block_to_chain(data['chain'], "SPEND", "Standby Mode", -minutes_needed, date.today().isoformat())
-    save_ledger(data)
-    
-    return True, "Tempo resgatado."
+    try:
+        with transaction() as tx:
+            return tx.spend(minutes_needed)
+    except LedgerIntegrityError:
+        return False, "ERRO CRÍTICO: Blockchain violada. Log de segurança gerado."
 
-def get_history():
-    data = load_ledger()
-    chain = data['chain']
-    
-    if not verify_integrity(chain): return []
+def get_history_size():
+    """Quantidade de depósitos no extrato."""
+    state = get_bank_state()
+    return state['deposit_count'] if state else 0
+
+def get_history(offset=0, limit=None):
+    """
+    Extrato paginado, mais recentes primeiro. O restante de cada depósito vem dos
+    lotes do snapshot (blocos ALLOCATE): só os depósitos da página são lidos.
+    """
+    state = get_bank_state()
+    if state is None: return []
+
+    end = state['deposit_count'] - offset
+    if end <= 0: return []
+    start = max(0, end - limit) if limit else 0
+
+    data = load_ledger_cached()
+    page = read_deposit_index(start, end)
+    if len(page) != end - start:
+        rebuild_deposit_index(data)
+        page = read_deposit_index(start, end)
+    page = page[::-1]
+    open_lots = {}
+    # Gastos antigos ainda sem ALLOCATE: abatidos em FIFO só na visualização
+    debt = state['unallocated']
+    for lot_index, remaining in state['lots_open']:
+        if debt > 0:
+            deduction = min(debt, remaining)
+            remaining -= deduction
+            debt -= deduction
+        open_lots[lot_index] = remaining
 
-    today_str = date.today().isoformat()
-    total_spent_history = sum(abs(b['amount']) for b in chain if b['type'] == 'SPEND')
-    
     view_list = []
-    deposits = [b for b in chain if b['type'] == 'DEPOSIT']
-    
-    remaining_debt = total_spent_history
-    
-    for block in deposits:
-        original_amount = block['amount']
-        current_remaining = original_amount
-        
-        if block['unlock_date'] <= today_str:
-            if remaining_debt > 0:
-                deduction = min(remaining_debt, original_amount)
-                current_remaining -= deduction
-                remaining_debt -= deduction
-        
+    for index in page:
+        block = get_block(data, index)
+        if block is None: continue
+
+        locked = block['unlock_date'] > state['as_of']
+        if locked:
+            current_remaining = block['amount']
+        else:
+            current_remaining = open_lots.get(index, 0)
+
         view_obj = {
             "origin_date": block['timestamp'][:10],
             "task_source": block['task_source'],
-            "amount_earned": original_amount,
+            "amount_earned": block['amount'],
             "amount_remaining": current_remaining,
             "unlock_date": block['unlock_date'],
-            "status": "locked" if block['unlock_date'] > today_str else "available"
+            "status": "locked" if locked else "available"
         }
         view_list.append(view_obj)
         
-    return list(reversed(view_list))
\ No newline at end of file
+    return view_list
\ No newline at end of file
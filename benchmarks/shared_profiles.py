@@ -0,0 +1,133 @@
+# benchmarks/shared_profiles.py
+"""
+Custo do Daemon compartilhado por número de perfis.
+
+    python benchmarks/shared_profiles.py [--counts 1,10,50] [--duration 20]
+
+Cada contagem roda num interpretador novo com perfis sintéticos numa pasta
+temporária (nada é gravado em config/ nem na pasta de Backups do usuário). Mede memória residente, threads, CPU
+por segundo e voltas do agendador, e compara com N Daemons separados
+(N x o processo de 1 perfil).
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError: pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def synthetic_config(i):
+    from core import get_default_config
+    cfg = get_default_config()
+    now = datetime.now()
+    for t in range(5):
+        cfg['tasks'][f"task_{t}"] = {
+            "name": f"Tarefa {t} do perfil {i}",
+            "status": "em progresso",
+            "schedule_type": "daily",
+            "min_time": 30,
+            # Uma tarefa já atrasada (alerta amarelo) e as outras espalhadas pelo dia
+            "fixed_start_time": (now - timedelta(minutes=5)).strftime("%H:%M") if t == 0
+                                else f"{(8 + t * 3) % 24:02d}:{(i * 7) % 60:02d}",
+            "completed_on": None,
+            "proof": None
+        }
+    return cfg
+
+def run_child(count, duration, serve_ipc):
+    tmp = tempfile.mkdtemp(prefix="irs_bench_")
+    # Backups (~/.local/share ou %APPDATA%) dos perfis sintéticos também ficam na pasta temporária
+    os.environ["HOME"] = os.environ["APPDATA"] = tmp
+    import core
+    core.PROFILES_DIR = tmp
+    names = [f"bench{i:03d}" for i in range(count)]
+
+    from core import use_profile, save_config_data
+    for i, name in enumerate(names):
+        with use_profile(name):
+            save_config_data(synthetic_config(i), mutation_type="bench_seed")
+
+    from profiles import SharedDaemon
+    from notifiers import RecordingNotifier
+    # Logs do próprio Daemon compartilhado também ficam na pasta temporária
+    with use_profile("bench_main"):
+        base_rss = rss_kb()
+        base_threads = threading.active_count()
+
+        t0 = time.perf_counter()
+        daemon = SharedDaemon(profiles=names, serve_ipc=serve_ipc,
+                              notifier_factory=lambda name: RecordingNotifier(max_events=100),
+                              background_delay=duration * 10)
+        started = daemon.start()
+        boot_s = time.perf_counter() - t0
+
+        cpu0 = time.process_time()
+        time.sleep(duration)
+        cpu = time.process_time() - cpu0
+
+        result = {
+            "profiles": started,
+            "boot_ms": round(boot_s * 1000, 1),
+            "rss_kb": rss_kb(),
+            "profiles_rss_kb": rss_kb() - base_rss,
+            "threads": threading.active_count(),
+            "profile_threads": threading.active_count() - base_threads,
+            "cpu_ms_per_s": round(cpu * 1000 / duration, 2),
+            "steps": daemon.scheduler.steps,
+            "events": sum(sum(m[0].notifier.counts.values()) for m in daemon.members.values()),
+        }
+        daemon.stop()
+    shutil.rmtree(tmp, ignore_errors=True)
+    print(json.dumps(result))
+
+def main():
+    counts = [1, 10, 50]
+    duration = 20
+    serve_ipc = "--no-ipc" not in sys.argv
+    args = sys.argv[1:]
+    for i, a in enumerate(args):
+        if a == "--counts": counts = [int(c) for c in args[i+1].split(",")]
+        if a == "--duration": duration = float(args[i+1])
+
+    if "--child" in args:
+        run_child(int(args[args.index("--child") + 1]), duration, serve_ipc)
+        return
+
+    print(f"Daemon compartilhado, {duration:.0f}s por rodada, IPC {'ligado' if serve_ipc else 'desligado'}\n")
+    header = f"{'perfis':>6} {'boot':>8} {'RSS':>9} {'N x 1 perfil':>13} {'razão':>6} {'threads':>8} {'CPU/s':>8} {'voltas':>7}"
+    print(header)
+    print("-" * len(header))
+    single = None
+    for count in sorted(set([1] + counts)):
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", str(count), "--duration", str(duration)]
+        if not serve_ipc: cmd.append("--no-ipc")
+        proc = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT)
+        lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            print(f"{count:>6} falhou: {(proc.stderr.strip().splitlines() or ['?'])[-1]}")
+            continue
+        r = json.loads(lines[-1])
+        if count == 1: single = r
+        separate = single["rss_kb"] * count if single else 0
+        ratio = r["rss_kb"] / separate if separate else 0
+        print(f"{r['profiles']:>6} {r['boot_ms']:>6.0f}ms {r['rss_kb']/1024:>7.1f}MB {separate/1024:>11.1f}MB "
+              f"{ratio:>6.2f} {r['threads']:>8} {r['cpu_ms_per_s']:>6.2f}ms {r['steps']:>7}")
+
+if __name__ == "__main__":
+    main()
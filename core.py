@@ -3,13 +3,13 @@ import os
 import sys
 import json
 import time
-import shutil
 import hashlib
-import random
 import platform
-import subprocess
+import threading
+from contextlib import contextmanager
 from datetime import datetime, date
-from pathlib import Path
+# shutil, random e subprocess são importados dentro das funções que usam:
+# o Watchdog e a primeira janela da GUI não pagam por eles.
 
 # --- Configurações de Ambiente ---
 IS_WINDOWS = platform.system() == "Windows"
@@ -19,51 +19,165 @@ APP_NAME = "IdentidadeRejeitada"
 APP_DIR_NAME = "IdentidadeRejeitadaApp"
 
 # --- Setup do Nircmd (Windows) ---
+# Procurado só na primeira mudança de volume (ver get_volume_control)
 VOLUME_CONTROL = None
-if IS_WINDOWS:
-    try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        nircmd_path = os.path.join(script_dir, "complemento", "nircmd.exe")
-    except NameError:
-        script_dir = os.getcwd()
-        nircmd_path = os.path.join(script_dir, "complemento", "nircmd.exe")
+_volume_control_probed = False
 
-    if os.path.exists(nircmd_path):
-         VOLUME_CONTROL = nircmd_path
+def get_volume_control():
+    """Caminho do nircmd.exe (Windows) ou None. O disco só é consultado uma vez."""
+    global VOLUME_CONTROL, _volume_control_probed
+    if not _volume_control_probed:
+        _volume_control_probed = True
+        if IS_WINDOWS:
+            nircmd_path = os.path.join(get_base_dir(), "complemento", "nircmd.exe")
+            if os.path.exists(nircmd_path):
+                VOLUME_CONTROL = nircmd_path
+    return VOLUME_CONTROL
 
 # --- Caminhos e Diretórios ---
-def get_app_data_dir():
+def get_base_dir():
     try:
-        base_dir = os.path.dirname(os.path.abspath(__file__))
+        return os.path.dirname(os.path.abspath(__file__))
     except NameError:
-        base_dir = os.getcwd()
-    app_data_path = os.path.join(base_dir, "config")
-    Path(app_data_path).mkdir(parents=True, exist_ok=True)
-    return app_data_path
+        return os.getcwd()
+
+# --- Perfis ---
+# Cada perfil tem config, logs, banco e provas próprios. O perfil "default" usa o
+# config/ de sempre; os outros ficam em config/profiles/<nome>/.
+# O perfil do processo vem de IRS_PROFILE (ou --profile); o Daemon compartilhado
+# troca de perfil por thread com use_profile().
+DEFAULT_PROFILE = "default"
+PROFILE_ENV = "IRS_PROFILE"
+PROFILES_DIR = os.path.join(get_base_dir(), "config", "profiles")
+
+def get_app_data_dir(profile=None):
+    # Só calcula o caminho. As pastas são criadas na primeira escrita (ensure_app_dirs).
+    profile = profile or os.environ.get(PROFILE_ENV) or DEFAULT_PROFILE
+    if profile == DEFAULT_PROFILE:
+        return os.path.join(get_base_dir(), "config")
+    return os.path.join(PROFILES_DIR, profile)
 
-APP_DATA_DIR = get_app_data_dir()
-CONFIG_FILE = os.path.join(APP_DATA_DIR, "config.json")
-LOG_FILE = os.path.join(APP_DATA_DIR, "logging.json")
-PROOFS_DIR = os.path.join(APP_DATA_DIR, "provas")
-Path(PROOFS_DIR).mkdir(parents=True, exist_ok=True)
+def is_valid_profile_name(name):
+    return bool(name) and name.replace("-", "").replace("_", "").isalnum() and len(name) <= 40
+
+def list_profiles():
+    """Perfis existentes ("default" sempre primeiro)."""
+    names = []
+    if os.path.isdir(PROFILES_DIR):
+        names = sorted(n for n in os.listdir(PROFILES_DIR)
+                       if is_valid_profile_name(n) and os.path.isdir(os.path.join(PROFILES_DIR, n)))
+    return [DEFAULT_PROFILE] + [n for n in names if n != DEFAULT_PROFILE]
+
+class ProfilePaths:
+    """Todos os caminhos de um perfil, calculados uma vez."""
+    __slots__ = ("name", "app_data_dir", "config_file", "log_file", "proofs_dir", "integrity_file",
+                 "config_journal_file", "log_dir", "config_journal_archive", "files_map",
+                 "security_day_index_file", "dirs_ready")
+
+    def __init__(self, name=None):
+        self.name = name or os.environ.get(PROFILE_ENV) or DEFAULT_PROFILE
+        self.app_data_dir = get_app_data_dir(self.name)
+        self.config_file = os.path.join(self.app_data_dir, "config.json")
+        self.log_file = os.path.join(self.app_data_dir, "logging.json")
+        self.proofs_dir = os.path.join(self.app_data_dir, "provas")
+        self.integrity_file = os.path.join(self.app_data_dir, 'security.chk')
+        self.config_journal_file = os.path.join(self.app_data_dir, "config_journal.jsonl")
+        self.log_dir = os.path.join(self.app_data_dir, "logs")
+        self.config_journal_archive = os.path.join(self.log_dir, "config_journal_archive.jsonl")
+        self.files_map = {
+            "security": os.path.join(self.log_dir, "security_log.json"),
+            "history": os.path.join(self.log_dir, "history_log.json"),
+            "blockchain": os.path.join(self.log_dir, "blockchain_log.json"),
+            "system": os.path.join(self.log_dir, "system_trace.json")
+        }
+        # Índice do dia do log de segurança (último horário de cada tipo de evento de HOJE)
+        self.security_day_index_file = os.path.join(self.log_dir, "security_day_index.json")
+        self.dirs_ready = False
+
+def _resolve_process_profile(argv):
+    """
+    Perfil do processo: IRS_PROFILE ou '--profile NOME' na linha de comando.
+    Fica exportado em IRS_PROFILE para os processos filhos (Daemon, Modo Estudo, GUI).
+    """
+    name = os.environ.get(PROFILE_ENV)
+    for i, a in enumerate(argv):
+        if a == "--profile" and i + 1 < len(argv): name = argv[i+1]
+        elif a.startswith("--profile="): name = a.split("=", 1)[1]
+    if not name or not is_valid_profile_name(name):
+        return DEFAULT_PROFILE
+    if name != DEFAULT_PROFILE:
+        os.environ[PROFILE_ENV] = name
+    return name
+
+_process_paths = ProfilePaths(_resolve_process_profile(sys.argv[1:]))
+_profile_local = threading.local()
+_profile_cache = {_process_paths.name: _process_paths}
+
+def get_profile_paths(name):
+    paths = _profile_cache.get(name)
+    if paths is None:
+        paths = _profile_cache.setdefault(name, ProfilePaths(name))
+    return paths
+
+def paths():
+    """Caminhos do perfil ativo nesta thread (ou do processo)."""
+    return getattr(_profile_local, "paths", None) or _process_paths
+
+def current_profile():
+    return paths().name
+
+@contextmanager
+def use_profile(name):
+    """Dentro do bloco, tudo que o core lê/grava nesta thread vai para o perfil 'name'."""
+    previous = getattr(_profile_local, "paths", None)
+    _profile_local.paths = get_profile_paths(name)
+    try:
+        yield _profile_local.paths
+    finally:
+        _profile_local.paths = previous
+
+# Caminhos do perfil do processo (módulos que rodam com um perfil só)
+APP_DATA_DIR = _process_paths.app_data_dir
+CONFIG_FILE = _process_paths.config_file
+LOG_FILE = _process_paths.log_file
+PROOFS_DIR = _process_paths.proofs_dir
 
 # --- Definição do Arquivo de Segurança ---
-INTEGRITY_FILE = os.path.join(APP_DATA_DIR, 'security.chk')
+INTEGRITY_FILE = _process_paths.integrity_file
+
+# --- Journal do Config (mutações append-only + snapshot compactado no config.json) ---
+CONFIG_JOURNAL_FILE = _process_paths.config_journal_file
 
 # Sistema de logs
-LOG_DIR = os.path.join(APP_DATA_DIR, "logs")
-Path(LOG_DIR).mkdir(parents=True, exist_ok=True)
+LOG_DIR = _process_paths.log_dir
+
+def ensure_app_dirs():
+    """Cria config/, logs/ e provas/ do perfil ativo na primeira escrita (antes era no import)."""
+    p = paths()
+    if p.dirs_ready: return
+    for d in (p.app_data_dir, p.log_dir, p.proofs_dir):
+        try: os.makedirs(d, exist_ok=True)
+        except: pass
+    p.dirs_ready = True
 
-FILES_MAP = {
-    "security": os.path.join(LOG_DIR, "security_log.json"),
-    "history": os.path.join(LOG_DIR, "history_log.json"),
-    "blockchain": os.path.join(LOG_DIR, "blockchain_log.json"),
-    "system": os.path.join(LOG_DIR, "system_trace.json")
-}
+CONFIG_JOURNAL_ARCHIVE = _process_paths.config_journal_archive
+FILES_MAP = _process_paths.files_map
 
 SECURITY_LOG_FILE = FILES_MAP["security"]
 HISTORY_LOG_FILE = FILES_MAP["history"]
 
+SECURITY_DAY_INDEX_FILE = _process_paths.security_day_index_file
+
+def create_profile(name):
+    """Cria a pasta de um perfil novo. Retorna (sucesso, mensagem)."""
+    if not is_valid_profile_name(name) or name == DEFAULT_PROFILE:
+        return False, "Nome de perfil inválido (letras, números, '-' e '_')."
+    if name in list_profiles():
+        return False, f"Perfil '{name}' já existe."
+    with use_profile(name):
+        ensure_app_dirs()
+    return True, f"Perfil '{name}' criado."
+
 # --- Função Auxiliar (NOVA) ---
 def get_file_hash(filepath):
     """Gera uma impressão digital (Hash SHA256) do arquivo."""
@@ -75,10 +189,11 @@ def get_file_hash(filepath):
 
 def update_integrity_file():
     """Atualiza o arquivo sombra com a assinatura do config atual."""
-    current_hash = get_file_hash(CONFIG_FILE)
+    current_hash = get_file_hash(paths().config_file)
     if current_hash:
+        ensure_app_dirs()
         try:
-            with open(INTEGRITY_FILE, 'w') as f:
+            with open(paths().integrity_file, 'w') as f:
                 f.write(current_hash)
         except: pass
 
@@ -92,6 +207,7 @@ class FileLock:
         self.timeout = timeout
         
     def __enter__(self):
+        ensure_app_dirs()
         start_time = time.time()
         while os.path.exists(self.lock_file):
             # Se o arquivo de lock existe e é velho (> timeout), assume que o processo morreu e remove
@@ -122,6 +238,7 @@ def atomic_write(target_file, data):
     if isinstance(data, dict):
         data["_WARNING"] = "NAO EDITE MANUALMENTE. O SISTEMA DETECTARA A ALTERACAO E ZERARA SEU STREAK."
 
+    ensure_app_dirs()
     temp_file = f"{target_file}.tmp"
     max_retries = 5
     
@@ -166,13 +283,17 @@ def run_backup_system(arquivo_alterado=None):
     Se arquivo_alterado for fornecido, faz backup APENAS dele (modo rápido).
     Se for None, faz backup de tudo e cria snapshot (modo boot).
     """
+    import shutil
+    from pathlib import Path
     try:
-        local_config_dir = get_app_data_dir()
+        local_config_dir = paths().app_data_dir
         
         if IS_WINDOWS:
             appdata_base = os.path.join(os.getenv('APPDATA'), APP_DIR_NAME, 'Backups')
         else:
             appdata_base = os.path.join(Path.home(), '.local', 'share', APP_DIR_NAME, 'Backups')
+        if paths().name != DEFAULT_PROFILE:
+            appdata_base = os.path.join(appdata_base, "profiles", paths().name)
             
         today_str = date.today().strftime('%Y-%m-%d')
         daily_backup_dir = os.path.join(appdata_base, today_str)
@@ -185,7 +306,10 @@ def run_backup_system(arquivo_alterado=None):
         if arquivo_alterado is None:
             snapshot_dir = os.path.join(daily_backup_dir, "Start_of_Day_Snapshot")
             if not os.path.exists(snapshot_dir) and os.path.exists(local_config_dir):
-                try: shutil.copytree(local_config_dir, snapshot_dir)
+                # Arquivos de runtime (socket, PID, heartbeat, locks) não são estado
+                # (os outros perfis têm o próprio snapshot)
+                runtime = shutil.ignore_patterns("*.sock", "*.lock", "*.pid", "daemon.heartbeat", "profiles")
+                try: shutil.copytree(local_config_dir, snapshot_dir, ignore=runtime)
                 except: pass
 
         # --- 2. ROTAÇÃO INTELIGENTE ---
@@ -197,17 +321,19 @@ def run_backup_system(arquivo_alterado=None):
                 files_to_rotate.append(arquivo_alterado)
         else:
             # MODO COMPLETO (Boot): Varre tudo
-            if os.path.exists(CONFIG_FILE):
-                files_to_rotate.append(CONFIG_FILE)
+            if os.path.exists(paths().config_file):
+                files_to_rotate.append(paths().config_file)
+            if os.path.exists(paths().config_journal_file):
+                files_to_rotate.append(paths().config_journal_file)
 
-            bank_path = os.path.join(APP_DATA_DIR, "bank.json")
+            bank_path = os.path.join(paths().app_data_dir, "bank.json")
             if os.path.exists(bank_path):
                 files_to_rotate.append(bank_path)
             
-            if os.path.exists(LOG_DIR):
-                for f in os.listdir(LOG_DIR):
+            if os.path.exists(paths().log_dir):
+                for f in os.listdir(paths().log_dir):
                     if f.endswith(".json"):
-                        files_to_rotate.append(os.path.join(LOG_DIR, f))
+                        files_to_rotate.append(os.path.join(paths().log_dir, f))
 
         # Executa a rotação apenas para os arquivos selecionados
         for source_path in files_to_rotate:
@@ -266,7 +392,7 @@ def log_blockchain_status(status_type, msg, target_category):
     Ex: INTEGRITY_SUCCESS, INTEGRITY_FAILURE, CHECK_SKIPPED
     """
     try:
-        fpath = FILES_MAP["blockchain"]
+        fpath = paths().files_map["blockchain"]
         entry = {
             "timestamp": datetime.now().isoformat(),
             "target_log": target_category,
@@ -300,8 +426,9 @@ def punish_tampering():
     ts_iso = now.isoformat()
     today_iso = date.today().isoformat()
 
+    ensure_app_dirs()
     for cat in ["security", "history"]:
-        target_file = FILES_MAP[cat]
+        target_file = paths().files_map[cat]
         
         genesis_block = create_blockchain_block(None, reset_type, reset_msg, ts_iso, today_iso)
         
@@ -322,7 +449,7 @@ def verify_blockchain_integrity(category, scope="quick"):
     scope="quick": Verifica os últimos 5 blocos (usado no log_event).
     Retorna True (Íntegro) ou False (Corrompido).
     """
-    target_file = FILES_MAP.get(category)
+    target_file = paths().files_map.get(category)
     if not target_file or not os.path.exists(target_file):
         return True 
         
@@ -399,7 +526,7 @@ def log_event(event_type, details, category="system"):
     Grava logs. Padrões: system, security, history.
     Se category for 'security' ou 'history', usa a função auxiliar de Blockchain.
     """
-    target_file = FILES_MAP.get(category, FILES_MAP["system"])
+    target_file = paths().files_map.get(category, paths().files_map["system"])
 
     # --- Verificação de blocos ---
     if category in ["security", "history"]:
@@ -442,9 +569,12 @@ def log_event(event_type, details, category="system"):
             # Gravação Atômica
             atomic_write(target_file, logs) 
 
+            if category == "security":
+                write_security_day_index(logs)
+
         except Exception as e:
             try:
-                error_log_path = os.path.join(LOG_DIR, "error_log_event.json")
+                error_log_path = os.path.join(paths().log_dir, "error_log_event.json")
                 with open(error_log_path, "a", encoding="utf-8") as f:
                     f.write(f"{datetime.now().isoformat()} | ERROR: {e} | TYPE: {event_type}\n")
             except: pass
@@ -455,11 +585,66 @@ def log_event(event_type, details, category="system"):
         run_backup_system(arquivo_alterado=target_file)
     except: pass
 
+def get_file_stat(path):
+    """[mtime_ns, tamanho] do arquivo, ou None se não existir."""
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return None
+
+def write_security_day_index(logs):
+    """
+    Indexa os eventos de HOJE do log de segurança (já em memória).
+    Guarda o stat do log: se o arquivo mudar por fora, o índice é refeito.
+    """
+    today_iso = date.today().isoformat()
+    last = {}
+    for entry in reversed(logs):
+        if entry.get('date') != today_iso: break # Log é cronológico
+        last.setdefault(entry.get('type'), entry.get('timestamp'))
+    index = {"date": today_iso, "log_stat": get_file_stat(paths().files_map["security"]), "last": last}
+    try: atomic_write(paths().security_day_index_file, index)
+    except: pass
+    return index
+
+def get_security_day_index():
+    """
+    {tipo: último timestamp de hoje} do log de segurança, sem parsear o log inteiro.
+    Custo normal: um stat + leitura de um JSON pequeno.
+    """
+    today_iso = date.today().isoformat()
+    log_stat = get_file_stat(paths().files_map["security"])
+    if log_stat is None: return {}
+    try:
+        with open(paths().security_day_index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('log_stat') == log_stat:
+            # Log intacto desde o índice. Se o índice é de outro dia, hoje ainda não tem eventos.
+            return index.get('last', {}) if index.get('date') == today_iso else {}
+    except: pass
+
+    # Índice ausente ou velho (log resetado, versão antiga): refaz com uma varredura
+    try:
+        with open(paths().files_map["security"], 'r', encoding='utf-8') as f:
+            logs = json.load(f)
+    except: return {}
+    return write_security_day_index(logs).get('last', {})
+
+def security_event_today(event_type):
+    """Timestamp da última ocorrência de 'event_type' hoje no log de segurança, ou None."""
+    return get_security_day_index().get(event_type)
+
 # --- Funções de Configuração ---
 # No core.py
 
-def load_config_data():
-    default_config = {
+JOURNAL_GENESIS_HASH = "0" * 64
+JOURNAL_COMPACT_EVERY = 200 # Entradas no journal antes de gerar um novo snapshot
+JOURNAL_META_KEYS = ("_WARNING", "_journal_seq", "_journal_hash", "_generation")
+_reported_journal_breaks = set()
+
+def get_default_config():
+    return {
         'rejections': [
             "Eu não quero emagrecer",
             "Eu não quero ser rico", "Eu não quero poder ajudar minha mãe",
@@ -490,24 +675,132 @@ def load_config_data():
             'last_rewarded_date': None # Memória de pagamento de Streak
         }
     }
-    
+
+def journal_entry_hash(entry):
+    ops_str = json.dumps(entry.get('ops', []), sort_keys=True, ensure_ascii=False)
+    payload = f"{entry.get('seq')}{entry.get('timestamp')}{entry.get('type')}{ops_str}{entry.get('previous_hash')}{SECRET_SALT}".encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+def apply_journal_ops(config, ops):
+    """Aplica uma lista de operações ['set', caminho, valor] / ['delete', caminho]."""
+    for op in ops:
+        kind, path = op[0], op[1]
+        target = config
+        for key in path[:-1]:
+            if not isinstance(target.get(key), dict):
+                target[key] = {}
+            target = target[key]
+        if kind == "set":
+            target[path[-1]] = op[2]
+        elif kind == "delete":
+            target.pop(path[-1], None)
+
+def diff_config(old, new, path=()):
+    """Gera as operações mínimas que transformam 'old' em 'new' (recursivo em dicts)."""
+    ops = []
+    for key, value in new.items():
+        if not path and key in JOURNAL_META_KEYS: continue
+        if key not in old:
+            ops.append(["set", list(path) + [key], value])
+        elif isinstance(value, dict) and isinstance(old[key], dict):
+            ops.extend(diff_config(old[key], value, path + (key,)))
+        elif old[key] != value:
+            ops.append(["set", list(path) + [key], value])
+    for key in old:
+        if not path and key in JOURNAL_META_KEYS: continue
+        if key not in new:
+            ops.append(["delete", list(path) + [key]])
+    return ops
+
+def read_config_journal(after_seq, after_hash):
+    """
+    Lê as mutações posteriores ao snapshot, validando a corrente de hashes.
+    Para na primeira entrada quebrada/adulterada (e avisa o auditor uma vez).
+    Retorna (entradas, posição da quebra em bytes ou None se o arquivo está íntegro).
+    """
+    entries = []
+    if not os.path.exists(paths().config_journal_file):
+        return entries, None
+    last_seq, last_hash = after_seq, after_hash
+    offset = 0
+    with open(paths().config_journal_file, 'rb') as f:
+        for raw in f:
+            start, offset = offset, offset + len(raw)
+            line = raw.strip()
+            if not line: continue
+            try: entry = json.loads(line.decode('utf-8'))
+            except: return entries, start # Linha truncada (queda no meio da escrita)
+            if entry.get('seq', 0) <= after_seq: continue
+
+            if (entry.get('seq') != last_seq + 1 or entry.get('previous_hash') != last_hash
+                    or journal_entry_hash(entry) != entry.get('hash')):
+                if entry.get('seq') not in _reported_journal_breaks:
+                    _reported_journal_breaks.add(entry.get('seq'))
+                    log_blockchain_status("INTEGRITY_FAILURE", f"Journal do config quebrado na seq {entry.get('seq')}. Mutações seguintes ignoradas.", "config")
+                return entries, start
+            entries.append(entry)
+            last_seq, last_hash = entry['seq'], entry['hash']
+    return entries, None
+
+def repair_config_journal(break_at):
+    """
+    Corta o journal na primeira entrada quebrada (chamar com o lock do journal).
+    Sem isso, toda gravação nova ficaria depois da quebra e sumiria no replay.
+    O trecho cortado vai para o log_dir (auditoria).
+    """
+    path = paths().config_journal_file
+    try:
+        with open(path, 'rb') as f:
+            f.seek(break_at)
+            torn = f.read()
+        if torn:
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            with open(os.path.join(paths().log_dir, f"config_journal_torn_{stamp}.jsonl"), 'ab') as dst:
+                dst.write(torn)
+        os.truncate(path, break_at)
+        log_event("config_journal_repair", f"Journal do config cortado no byte {break_at} ({len(torn)} bytes descartados e guardados no log).", category="security")
+        return True
+    except Exception as e:
+        log_event("system_error", f"Erro ao reparar journal do config: {e}", category="system")
+        return False
+
+def load_config_state():
+    """
+    Materializa o config: snapshot (config.json) + replay do journal.
+    Retorna (config, seq, hash, tamanho_do_tail, migrado, existe, quebra).
+    'quebra': posição (bytes) da primeira entrada inválida do journal, ou None. Não grava nada.
+    """
+    default_config = get_default_config()
     config = default_config
-    if os.path.exists(CONFIG_FILE):
+    seq, last_hash, tail_len, break_at = 0, JOURNAL_GENESIS_HASH, 0, None
+    exists = os.path.exists(paths().config_file)
+    if exists:
         try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+            with open(paths().config_file, 'r', encoding='utf-8') as f:
                 loaded = json.load(f)
-                # Merge recursivo simples
-                for k, v in default_config.items():
-                    if k not in loaded: loaded[k] = v
-                
-                # Garante que a chave economy exista e tenha todos os campos
-                if 'economy' not in loaded:
-                    loaded['economy'] = default_config['economy']
-                else:
-                    for ek, ev in default_config['economy'].items():
-                        if ek not in loaded['economy']: loaded['economy'][ek] = ev
-                        
-                config = loaded
+            seq = loaded.pop('_journal_seq', 0)
+            last_hash = loaded.pop('_journal_hash', JOURNAL_GENESIS_HASH)
+
+            # Replay das mutações feitas depois do snapshot
+            tail, break_at = read_config_journal(seq, last_hash)
+            for entry in tail:
+                apply_journal_ops(loaded, entry['ops'])
+            if tail:
+                seq, last_hash = tail[-1]['seq'], tail[-1]['hash']
+            tail_len = len(tail)
+
+            # Merge recursivo simples
+            for k, v in default_config.items():
+                if k not in loaded: loaded[k] = v
+            
+            # Garante que a chave economy exista e tenha todos os campos
+            if 'economy' not in loaded:
+                loaded['economy'] = default_config['economy']
+            else:
+                for ek, ev in default_config['economy'].items():
+                    if ek not in loaded['economy']: loaded['economy'][ek] = ev
+                    
+            config = loaded
         except: config = default_config
     
     # Migração simples de tasks antigas
@@ -517,20 +810,197 @@ def load_config_data():
             task['schedule_type'] = 'daily'; task['schedule_days'] = [0,1,2,3,4,5,6]; migrated = True
         if 'status' not in task:
             task['status'] = 'em progresso'; migrated = True
-    
-    if migrated or not os.path.exists(CONFIG_FILE):
+
+    # Geração monotônica (= seq do journal): base do controle de concorrência otimista
+    config['_generation'] = seq
+    return config, seq, last_hash, tail_len, migrated, exists, break_at
+
+def load_config_data():
+    config, _, _, _, migrated, exists, _ = load_config_state()
+    if migrated or not exists:
         save_config_data(config)
     return config
 
-def save_config_data(data):
+def write_config_snapshot(config, seq, last_hash):
+    """Grava o snapshot compactado (config.json + assinatura no security.chk)."""
+    snapshot = {k: v for k, v in config.items() if k not in JOURNAL_META_KEYS}
+    snapshot['_journal_seq'] = seq
+    snapshot['_journal_hash'] = last_hash
+    return atomic_write(paths().config_file, snapshot)
+
+def compact_config_journal(only_if_pending=False):
+    """
+    Dobra o journal no snapshot e move as entradas para o arquivo de auditoria.
+    Seguro contra queda: o snapshot guarda a seq, e entradas antigas são puladas no replay.
+    only_if_pending=True: não faz nada se o journal estiver vazio.
+    """
+    if only_if_pending and not (get_file_stat(paths().config_journal_file) or [0, 0])[1]:
+        return
+    with FileLock(paths().config_journal_file):
+        _compact_config_journal_locked()
+
+def _compact_config_journal_locked():
+    config, seq, last_hash, tail_len, _, exists, _ = load_config_state()
+    if not exists: return
+    if not write_config_snapshot(config, seq, last_hash): return
+    if os.path.exists(paths().config_journal_file):
+        import shutil
+        try:
+            with open(paths().config_journal_file, 'r', encoding='utf-8') as src, \
+                 open(paths().config_journal_archive, 'a', encoding='utf-8') as dst:
+                shutil.copyfileobj(src, dst)
+            open(paths().config_journal_file, 'w').close()
+        except Exception as e:
+            log_event("system_error", f"Erro ao arquivar journal do config: {e}", category="system")
+
+def journal_ends_with_newline():
+    try:
+        with open(paths().config_journal_file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0: return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+    except OSError:
+        return True
+
+def get_config_generation(config):
+    """Geração do config em que este dicionário foi carregado (ou salvo pela última vez)."""
+    return config.get('_generation', 0)
+
+def save_config_data(data, mutation_type="save", expected_generation=None):
+    """
+    Não reescreve mais o documento inteiro: calcula a diferença contra o estado
+    atual e anexa UMA mutação tipada (algumas centenas de bytes) no journal.
+    O journal também serve de trilha de auditoria.
+
+    Compare-and-swap: se 'expected_generation' for passado e o config já estiver
+    em outra geração (alguém gravou depois da nossa leitura), a escrita é
+    REJEITADA e retorna False. Sem ele, a escrita é incondicional (legado).
+    """
     try:
-        atomic_write(CONFIG_FILE, data)
-        run_backup_system(arquivo_alterado=CONFIG_FILE)
+        with FileLock(paths().config_journal_file):
+            current, seq, last_hash, tail_len, _, exists, break_at = load_config_state()
+            if expected_generation is not None and expected_generation != seq:
+                return False
+
+            if not exists:
+                # Primeira gravação: o próprio documento vira o snapshot inicial
+                write_config_snapshot(data, 0, JOURNAL_GENESIS_HASH)
+                data['_generation'] = 0
+                return True
+
+            ops = diff_config(current, data)
+            if not ops:
+                data['_generation'] = seq
+                return True
+
+            entry = {
+                "seq": seq + 1,
+                "timestamp": datetime.now().isoformat(),
+                "type": mutation_type,
+                "ops": ops,
+                "previous_hash": last_hash
+            }
+            entry["hash"] = journal_entry_hash(entry)
+            if break_at is not None:
+                # A entrada nova (seq + 1) tem que ficar logo depois da última válida
+                if not repair_config_journal(break_at): return False
+            line = json.dumps(entry, ensure_ascii=False) + "\n"
+            if not journal_ends_with_newline():
+                line = "\n" + line # Última linha válida sem quebra de linha: não cola a nova nela
+            with open(paths().config_journal_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            data['_generation'] = entry["seq"]
+
+            if tail_len + 1 >= JOURNAL_COMPACT_EVERY:
+                _compact_config_journal_locked()
+
+        run_backup_system(arquivo_alterado=paths().config_journal_file)
+        return True
     except Exception as e:
         log_event("system_error", f"Erro save config: {e}", category="system")
+        return False
+
+def update_config(mutator, mutation_type="save", retries=5):
+    """
+    Ler-modificar-gravar seguro: aplica 'mutator(config)' sobre o estado mais
+    recente e grava com compare-and-swap. Se outro processo gravar no meio,
+    recarrega e reaplica. Retorna o config gravado (ou None se desistiu).
+    """
+    for _ in range(retries):
+        config = load_config_data()
+        mutator(config)
+        if save_config_data(config, mutation_type, expected_generation=get_config_generation(config)):
+            return config
+        time.sleep(0.02)
+    log_event("save_conflict", f"Desistiu de gravar '{mutation_type}' após {retries} conflitos.", category="system")
+    return None
+
+def merge_and_save_config(base, data, mutation_type="save", retries=5):
+    """
+    Para quem mantém uma cópia longa em memória: 'base' é o config como foi lido
+    e 'data' é a cópia modificada. Só as mudanças campo a campo (base -> data)
+    são reaplicadas sobre o estado atual, preservando o que outros gravaram.
+    Retorna o config mesclado e gravado (ou None se desistiu).
+    """
+    changes = diff_config(base, data)
+    if not changes:
+        return data
+    # Caminho rápido: ninguém gravou desde a leitura
+    if save_config_data(data, mutation_type, expected_generation=get_config_generation(base)):
+        return data
+    return update_config(lambda config: apply_journal_ops(config, changes), mutation_type, retries)
+
+# --- Mutações Tipadas do Config ---
+# Usadas tanto pelo serviço de estado do daemon quanto pelo fallback direto em arquivo.
+
+def apply_task_completion(config, task_id, proof_type, proof):
+    """Marca a tarefa como concluída hoje (data assinada). Retorna a tarefa ou None."""
+    task = config.get('tasks', {}).get(task_id)
+    if task is None: return None
+    task['completed_on'] = sign_date(date.today().isoformat())
+    task['proof'] = proof
+    task['proof_type'] = proof_type
+    return task
+
+def apply_study_mode(config, enabled, session_type=None):
+    config['study_mode'] = bool(enabled)
+    if session_type is not None:
+        config['session_type'] = session_type
+    return config
+
+def apply_break_stats(config, focus_minutes=0, used_10=0, used_20=0):
+    """Soma deltas nas estatísticas de intervalo de hoje (reseta se mudou o dia)."""
+    today_str = date.today().isoformat()
+    stats = config.get('daily_break_stats', {})
+    if stats.get('date') != today_str:
+        stats = {'date': today_str, 'focus_minutes': 0, 'used_10': 0, 'used_20': 0}
+    stats['focus_minutes'] += focus_minutes
+    stats['used_10'] += used_10
+    stats['used_20'] += used_20
+    config['daily_break_stats'] = stats
+    return stats
+
+def get_config_version():
+    """
+    Assinatura barata do config (mtime + tamanho do snapshot e do journal).
+    Permite saber se algo mudou sem precisar ler e parsear o JSON.
+    """
+    version = []
+    for path in (paths().config_file, paths().config_journal_file):
+        try:
+            st = os.stat(path)
+            version.extend((st.st_mtime_ns, st.st_size))
+        except OSError:
+            version.extend((None, None))
+    return tuple(version)
 
-def get_tasks_for_today():
-    config = load_config_data()
+def get_tasks_for_today(config=None):
+    """Se 'config' for passado, usa ele em vez de recarregar do disco."""
+    if config is None:
+        config = load_config_data()
     routine_tasks = config.get('tasks', {})
     today_weekday = datetime.now().weekday()
     tasks_for_today = {}
@@ -544,12 +1014,96 @@ def get_tasks_for_today():
                 tasks_for_today[task_id] = task
     return tasks_for_today
 
+def parse_fixed_time(value):
+    """'HH:MM' -> (hora, minuto), ou None se vazio/inválido."""
+    try:
+        hour, minute = map(int, str(value).strip().split(':'))
+    except (ValueError, AttributeError):
+        return None
+    if 0 <= hour < 24 and 0 <= minute < 60:
+        return hour, minute
+    return None
+
+def build_deadline_index(tasks_for_today, completed_ids, today):
+    """
+    Índice de horários fixos do dia: tupla ordenada de
+    (timestamp, datetime, task_id, nome, "HH:MM"), só com tarefas ainda pendentes.
+    Montado uma vez por versão do config; 'tasks_for_today' já respeita os dias da semana.
+    """
+    index = []
+    for task_id, task in tasks_for_today.items():
+        if task_id in completed_ids: continue
+        parsed = parse_fixed_time(task.get('fixed_start_time')) if task.get('fixed_start_time') else None
+        if not parsed: continue
+        fixed_dt = datetime(today.year, today.month, today.day, parsed[0], parsed[1])
+        index.append((fixed_dt.timestamp(), fixed_dt, task_id, task.get('name', task_id), task['fixed_start_time'].strip()))
+    index.sort()
+    return tuple(index)
+
+class DayState:
+    """
+    Fotografia imutável do dia, construída UMA vez por versão do config.
+    Todas as decisões do daemon (rejeição, horário fixo, grace period) leem daqui,
+    então nenhum JSON é parseado enquanto o config.json não mudar.
+    """
+    __slots__ = ("version", "date", "study_mode", "tasks_for_today", "completed_ids",
+                 "pending_ids", "all_completed", "fixed_deadlines", "next_fixed_deadline",
+                 "next_deadline_ts", "grace_expiry_ts")
+
+    def __init__(self, config, version=None, today=None):
+        today = today or date.today()
+        today_str = today.isoformat()
+        tasks_for_today = get_tasks_for_today(config)
+
+        # Assinatura verificada uma única vez por versão do config
+        completed = {task_id for task_id, task in tasks_for_today.items()
+                     if verify_and_get_date(task.get('completed_on')) == today_str}
+        deadlines = build_deadline_index(tasks_for_today, completed, today)
+
+        grace = config.get('grace_period_control', {})
+        grace_expiry = grace.get('expiry_ts', 0) if grace.get('date') == today_str else 0
+
+        _set = object.__setattr__
+        _set(self, "version", version)
+        _set(self, "date", today_str)
+        _set(self, "study_mode", bool(config.get('study_mode', False)))
+        _set(self, "tasks_for_today", tasks_for_today)
+        _set(self, "completed_ids", frozenset(completed))
+        _set(self, "pending_ids", frozenset(set(tasks_for_today) - completed))
+        # Sem tarefas para hoje conta como "tudo feito" (não há o que cobrar)
+        _set(self, "all_completed", not tasks_for_today or not (set(tasks_for_today) - completed))
+        # Horários fixos pendentes, do mais cedo ao mais tarde (ver build_deadline_index)
+        _set(self, "fixed_deadlines", deadlines)
+        # (datetime, nome da tarefa, "HH:MM") do horário fixo pendente mais cedo
+        _set(self, "next_fixed_deadline", deadlines[0][1:2] + deadlines[0][3:] if deadlines else None)
+        _set(self, "next_deadline_ts", deadlines[0][0] if deadlines else float('inf'))
+        _set(self, "grace_expiry_ts", grace_expiry)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DayState é imutável. Construa um novo a partir do config.")
+
+    def is_current(self, version):
+        """Continua válido se o config não mudou e ainda é o mesmo dia."""
+        return self.version == version and self.date == date.today().isoformat()
+
+    def overdue_deadline(self, now_ts=None):
+        """Horário fixo mais cedo já vencido, ou None. Uma única comparação."""
+        if (now_ts or time.time()) >= self.next_deadline_ts:
+            return self.next_fixed_deadline
+        return None
+
+    def seconds_until_next_deadline(self, now_ts=None):
+        """Segundos até o próximo horário fixo pendente (inf se não houver)."""
+        return max(0.0, self.next_deadline_ts - (now_ts or time.time()))
+
 def set_system_volume(level_percent):
-    if IS_WINDOWS and VOLUME_CONTROL:
+    volume_control = get_volume_control()
+    if IS_WINDOWS and volume_control:
+        import subprocess
         try:
             volume_nircmd = int((level_percent / 100) * 65535)
-            subprocess.run([VOLUME_CONTROL, 'mutesysvolume', '0'], check=True, creationflags=subprocess.CREATE_NO_WINDOW)
-            subprocess.run([VOLUME_CONTROL, 'setsysvolume', str(volume_nircmd)], check=True, creationflags=subprocess.CREATE_NO_WINDOW)
+            subprocess.run([volume_control, 'mutesysvolume', '0'], check=True, creationflags=subprocess.CREATE_NO_WINDOW)
+            subprocess.run([volume_control, 'setsysvolume', str(volume_nircmd)], check=True, creationflags=subprocess.CREATE_NO_WINDOW)
             log_event("volume_set", f"{level_percent}%")
         except: pass
     elif not IS_WINDOWS:
@@ -593,10 +1147,12 @@ def verify_and_get_date(signed_date_str):
     else:
         return False # PEGO NO FLAGRA!
 
-def get_random_rejections(count=3):
+def get_random_rejections(count=3, config=None):
     """Retorna uma lista de 'count' rejeições únicas aleatórias."""
-    config = load_config_data()
-    rejections = config.get('rejections', [])
+    import random
+    if config is None:
+        config = load_config_data()
+    rejections = list(config.get('rejections', []))
     
     if not rejections:
         return ["Você não configurou rejeições."]
@@ -4,17 +4,39 @@ import time
 import random
 import subprocess
 import os
-import json
-import tkinter as tk
-from datetime import date, timedelta, datetime
+import copy
+# Tk só é necessário no backend de janelas (ver notifiers.py); o modo headless roda sem ele
+try:
+    import tkinter as tk
+    import tkinter.font as tkfont
+except ImportError:
+    tk = tkfont = None
+from datetime import date, timedelta
 from core import (
-    load_config_data, save_config_data, log_event, run_backup_system,
+    load_config_data, log_event, run_backup_system,
     set_system_volume, get_tasks_for_today, center_window,
     IS_WINDOWS, IS_MACOS, IS_LINUX, get_random_rejections,
-    verify_and_get_date, SECURITY_LOG_FILE, verify_blockchain_integrity
+    verify_and_get_date, SECURITY_LOG_FILE, verify_blockchain_integrity,
+    get_config_version, DayState, merge_and_save_config,
+    get_security_day_index, security_event_today, compact_config_journal, current_profile
 )
+from state_service import StateService
+from liveness import PidLock, Heartbeat, EXIT_LOCK_BUSY
+from notifiers import create_notifier
 
 LOG_FILE = SECURITY_LOG_FILE
+BOOT_BACKGROUND_DELAY = 60 # Segundos depois do boot antes das auditorias/snapshot
+BOOT_IDLE_POLL = 5
+STATE_POLL = 5 # Teto da espera do loop: pega mudanças feitas por outro processo direto no arquivo
+
+def backfill_proof_hashes():
+    # PIL/NumPy só são carregados aqui, na manutenção de fundo
+    from proof_store import backfill_dhashes
+    return backfill_dhashes()
+
+def audit_proof_archive():
+    from proof_archive import verify_archive_chain
+    return verify_archive_chain()
 
 # --- CHECKPOINT DE CONSCIÊNCIA ---
 class FocusCheckSession:
@@ -121,11 +143,10 @@ class FocusCheckSession:
 
 # --- GERENCIADOR DE ALERTA AMARELO ---
 class YellowAlertManager:
-    """Gerencia a janela amarela e o desligamento."""
+    """Janela amarela do horário fixo (o desligamento é decidido pelo Notifier)."""
     def __init__(self, root):
         self.root = root
         self.window = None
-        self.shutdown_time = None
         self.active_task_name = None
         
     def show(self, task_name, task_time):
@@ -163,22 +184,6 @@ class YellowAlertManager:
             try: self.window.destroy()
             except: pass
             self.window = None
-            self.shutdown_time = None 
-
-    def check_shutdown(self):
-        if not self.window: return 
-        
-        if self.shutdown_time is None:
-            delay = random.randint(120, 900) 
-            self.shutdown_time = time.time() + delay
-            print(f"DESLIGAMENTO AGENDADO PARA: {datetime.fromtimestamp(self.shutdown_time)}")
-            
-        if time.time() > self.shutdown_time:
-            log_event("system_shutdown", f"Usuário ignorou horário fixo da tarefa: {self.active_task_name}", category="security")
-            if IS_WINDOWS:
-                os.system("shutdown /s /t 0")
-            else:
-                os.system("shutdown -h now")
 
 # --- SESSÃO PSICOLÓGICA ---
 class PsychologicalSession:
@@ -236,46 +241,77 @@ class PsychologicalSession:
 # -------------------------------------
 
 class IdentityRejectionSystem:
-    def __init__(self, popup_callback_func, yellow_manager):
-        self.popup_callback = popup_callback_func
-        self.yellow_manager = yellow_manager 
-        self.config = load_config_data()
-        
-        # --- VERIFICAÇÃO DE SABOTAGEM ---
-        self.check_sabotage_on_startup()
-        # --------------------------------
-
-        threading.Thread(target=run_backup_system, daemon=True).start()
+    def __init__(self, notifier):
+        # Backend de interface: Tk, terminal ou memória (notifiers.py)
+        self.notifier = notifier
+        self.profile = current_profile() # Perfil dos arquivos deste sistema
+        # Serializa leituras/escritas do config entre o loop e o serviço de estado
+        self.state_lock = threading.RLock()
+        self.heartbeat = None # Definido por run_daemon_process
+        self.run_long = None # Agendador compartilhado: roda a sequência de rejeição fora da thread dele
+        self.loop_state = "boot"
+        self.boot_timings = {}
+        # Acorda o loop na hora quando o estado muda dentro do Daemon (IPC, saves)
+        self.state_changed = threading.Event()
+        # Só o config é lido aqui. O resto do boot é feito em estágios por start().
+        self.boot_stage("config", self.reload_config)
         self.tasks = self.config.get('tasks', {})
         self.running = False
         self.rejection_thread = None
         self.start_time = None 
-        self.run_new_day_check()
+        self.wake_at = None # Próxima sequência de rejeição (None = ainda não sorteada)
+
+    def boot_stage(self, name, func):
+        """Executa um estágio do boot e registra a duração (ms)."""
+        t0 = time.perf_counter()
+        try: func()
+        except Exception as e:
+            log_event("boot_stage_error", f"Estágio '{name}' falhou: {e}", category="system")
+        self.boot_timings[name] = round((time.perf_counter() - t0) * 1000, 1)
+
+    def log_boot_timings(self, phase):
+        details = ", ".join(f"{k}={v}ms" for k, v in self.boot_timings.items())
+        log_event("boot_timings", f"[{phase}] {details}", category="system")
+
+    def run_new_day_check_locked(self):
+        with self.state_lock:
+            self.run_new_day_check()
+
+    def wait_until_idle(self):
+        """Segura o trabalho de fundo enquanto uma sequência de rejeição está tocando."""
+        while self.running and self.loop_state == "rejecting":
+            time.sleep(BOOT_IDLE_POLL)
+
+    def run_background_boot_stage(self):
+        """
+        Estágio de baixa prioridade: nada aqui decide o que o usuário vê agora.
+        Roda depois de BOOT_BACKGROUND_DELAY, um passo por vez, fora das rejeições.
+        """
+        time.sleep(BOOT_BACKGROUND_DELAY)
+        self.run_background_stages()
+
+    def run_background_stages(self):
+        stages = (
+            ("backup_snapshot", run_backup_system),
+            ("audit_security", lambda: verify_blockchain_integrity("security", scope="full")),
+            ("audit_history", lambda: verify_blockchain_integrity("history", scope="full")),
+            ("config_compaction", lambda: compact_config_journal(only_if_pending=True)),
+            ("audit_proofs", audit_proof_archive),
+            ("proof_hash_backfill", backfill_proof_hashes),
+        )
+        for name, func in stages:
+            self.wait_until_idle()
+            if not self.running: return
+            self.boot_stage(name, func)
+            time.sleep(1) # Cede a vez entre os passos
+        self.log_boot_timings("background")
 
     def check_sabotage_on_startup(self):
-        """Verifica no JSON se houve DAEMON_DEAD hoje sem revisão posterior."""
+        """Verifica (pelo índice do dia) se houve DAEMON_DEAD hoje sem revisão posterior."""
         try:
-            if not os.path.exists(LOG_FILE): return
-
-            today_str = date.today().isoformat()
-            
-            with open(LOG_FILE, 'r', encoding='utf-8') as f:
-                logs = json.load(f)
-            
-            # Filtra logs de hoje
-            today_logs = [l for l in logs if l.get('date') == today_str]
-            
-            last_dead_time = None
-            last_reviewed_time = None
-            
-            for entry in today_logs:
-                etype = entry.get('type')
-                ts = entry.get('timestamp')
-                
-                if etype == "DAEMON_DEAD":
-                    last_dead_time = ts
-                elif etype == "SABOTAGE_REVIEWED":
-                    last_reviewed_time = ts
+            today_events = get_security_day_index()
+            last_dead_time = today_events.get("DAEMON_DEAD")
+            last_reviewed_time = today_events.get("SABOTAGE_REVIEWED")
             
             # Lógica: Se houve morte, e (não foi revisada OU a revisão é mais antiga que a morte)
             if last_dead_time:
@@ -286,8 +322,7 @@ class IdentityRejectionSystem:
                     needs_punishment = True
                 
                 if needs_punishment:
-                    # Usa o root do gerenciador amarelo para mostrar o popup
-                    PsychologicalSession.show_punishment(self.yellow_manager.root)
+                    self.notifier.show_punishment()
 
         except Exception as e:
             print(f"Erro ao checar sabotagem: {e}")
@@ -301,30 +336,56 @@ class IdentityRejectionSystem:
             if self.all_tasks_completed(): return
 
             # 2. Verifica se o Daemon já rodou hoje (evita popup em restart do watchdog)
-            already_started_today = False
-            if os.path.exists(SECURITY_LOG_FILE):
-                today_str = date.today().isoformat()
-                with open(SECURITY_LOG_FILE, 'r', encoding='utf-8') as f:
-                    logs = json.load(f)
-                    for entry in logs:
-                        if entry.get('date') == today_str and entry.get('type') == 'system_start':
-                            already_started_today = True
-                            break
+            already_started_today = security_event_today("system_start") is not None
             
             # Se NÃO rodou hoje ainda (started = False) -> Mostra o Popup
             if not already_started_today:
-                FocusCheckSession.show_check(self.yellow_manager.root)
+                self.notifier.show_focus_check()
                 
         except Exception as e:
             log_event("focus_popup_error", f"Erro ao mostrar popup de descanso: {e}", category="system")
 
     def reload_config(self):
-        self.config = load_config_data()
-        self.tasks = self.config.get('tasks', {})
+        with self.state_lock:
+            self.config_version = get_config_version()
+            self.config = load_config_data()
+            # Cópia do que foi lido: na hora de salvar, só as NOSSAS mudanças são mescladas
+            self.config_base = copy.deepcopy(self.config)
+            self.tasks = self.config.get('tasks', {})
+            self.day_state = DayState(self.config, self.config_version)
+            self.state_changed.set()
+
+    def reload_config_if_changed(self):
+        """Só recarrega se o config.json mudou no disco (custa apenas um stat)."""
+        if get_config_version() != self.config_version:
+            self.reload_config()
 
-    def save_config(self):
-        self.config['tasks'] = self.tasks
-        save_config_data(self.config)
+    def get_day_state(self):
+        """
+        DayState compartilhado por todas as decisões do loop.
+        Zero parse de JSON enquanto o config não mudar; só é reconstruído
+        se o arquivo mudou ou se virou o dia.
+        """
+        self.reload_config_if_changed()
+        if not self.day_state.is_current(self.config_version):
+            self.day_state = DayState(self.config, self.config_version)
+        return self.day_state
+
+    def save_config(self, mutation_type="daemon_save"):
+        with self.state_lock:
+            self.config['tasks'] = self.tasks
+            merged = merge_and_save_config(self.config_base, self.config, mutation_type=mutation_type)
+            if merged is None:
+                # Conflito persistente: descarta a cópia local e relê o disco
+                self.reload_config()
+                return
+            # O que está em memória é exatamente o que foi gravado: não precisa reler
+            self.config = merged
+            self.tasks = merged.get('tasks', {})
+            self.config_base = copy.deepcopy(merged)
+            self.config_version = get_config_version()
+            self.day_state = DayState(self.config, self.config_version)
+            self.state_changed.set()
             
     # No daemon.py (dentro da classe IdentityRejectionSystem)
 
@@ -428,49 +489,95 @@ class IdentityRejectionSystem:
         self.config['economy'] = econ
 
         # --- LIMPEZA DIÁRIA ---
-        config_changed = False
-        for task in self.tasks.values():
+        from proof_archive import archive_proof, is_proof_ref
+        for task_id, task in self.tasks.items():
             raw = task.get('completed_on')
             v_date = verify_and_get_date(raw)
             
             # Limpa se for velha (ontem ou anterior). Mantém se for HOJE.
-            if v_date == yesterday_str or (v_date != today_str and v_date is not None):
+            # Prova inline que ficou de uma limpeza anterior (arquivo falhou) entra de novo.
+            stale = v_date == yesterday_str or (v_date != today_str and v_date is not None)
+            if stale or (v_date is None and task.get('proof')):
                 task['completed_on'] = None
+                # Prova ainda no config (anterior ao arquivo de provas): arquiva antes de limpar
+                if task.get('proof') and not is_proof_ref(task['proof']):
+                    if archive_proof(task_id, task.get('name'), task.get('proof_type', 'text'), task['proof'], day=v_date or yesterday_str) is None:
+                        continue # Arquivo falhou: a prova fica no config até a próxima limpeza
                 task['proof'] = None
-                config_changed = True
         
         if self.config.get('last_completion_date') == yesterday_str:
              self.config['last_completion_date'] = None
-             config_changed = True
 
-        if config_changed:
-            self.save_config()
-        else:
-            save_config_data(self.config)
+        # Sempre regrava (também persiste a manutenção econômica e de streak)
+        self.save_config()
 
-    def speak_text(self, text, tts_speed):
+    def prepare_voice(self, tts_speed):
+        """
+        Abre o processo de voz ANTES de ter o texto (aquece o PowerShell/say).
+        O texto é entregue depois pelo stdin, escondendo o tempo de startup.
+        """
+        if not self.notifier.audio: return None # Headless: sem voz
         try:
             if IS_WINDOWS:
-                subprocess.run([
-                    'powershell', '-Command',
-                    f'Add-Type -AssemblyName System.Speech; $s=New-Object System.Speech.Synthesis.SpeechSynthesizer; $s.Rate={tts_speed}; $s.Volume=100; $s.Speak("{text}")'
-                ], check=True, creationflags=subprocess.CREATE_NO_WINDOW)
+                script = (
+                    "[Console]::InputEncoding=[System.Text.Encoding]::UTF8; "
+                    "Add-Type -AssemblyName System.Speech; $s=New-Object System.Speech.Synthesis.SpeechSynthesizer; "
+                    f"$s.Rate={tts_speed}; $s.Volume=100; $s.Speak([Console]::In.ReadToEnd())"
+                )
+                return subprocess.Popen(['powershell', '-NoProfile', '-Command', script],
+                                        stdin=subprocess.PIPE, creationflags=subprocess.CREATE_NO_WINDOW)
             elif IS_MACOS:
-                subprocess.run(['say', '-r', str(int(120+(tts_speed*15))), text], check=True)
+                return subprocess.Popen(['say', '-r', str(int(120+(tts_speed*15))), '-f', '-'],
+                                        stdin=subprocess.PIPE)
+        except: pass
+        return None
+
+    def start_voice(self, voice, text):
+        """Entrega o texto ao processo já aquecido (não bloqueia)."""
+        if not voice: return
+        try:
+            voice.stdin.write(text.encode('utf-8'))
+            voice.stdin.close()
+        except: pass
+
+    def wait_voice(self, voice):
+        """
+        Espera a fala terminar, checando cancelamento no meio dela.
+        Retorna False se a sequência foi cancelada.
+        """
+        if not voice:
+            return not self.sequence_cancelled()
+        while voice.poll() is None:
+            if self.sequence_cancelled():
+                self.discard_voice(voice)
+                return False
+            time.sleep(0.2)
+        return True
+
+    def discard_voice(self, voice):
+        if not voice: return
+        try:
+            if voice.poll() is None:
+                voice.kill()
+            voice.wait(timeout=2)
         except: pass
 
+    def speak_text(self, text, tts_speed):
+        voice = self.prepare_voice(tts_speed)
+        self.start_voice(voice, text)
+        self.wait_voice(voice)
+
+    def sequence_cancelled(self):
+        """Checagem barata: daemon parado ou Modo Estudo ligado no meio da sequência."""
+        if not self.running: return True
+        return self.get_day_state().study_mode
+
     def all_tasks_completed(self):
-        tasks_for_today = get_tasks_for_today()
-        if not tasks_for_today: return True 
-        all_routine_completed = True
-        for task in tasks_for_today.values():
-            raw_comp = task.get('completed_on')
-            valid_date = verify_and_get_date(raw_comp)
-            if valid_date != date.today().isoformat():
-                all_routine_completed = False; break
-        
-        if all_routine_completed:
-            today_str = date.today().isoformat()
+        state = self.get_day_state()
+        if not state.tasks_for_today: return True 
+        
+        if state.all_completed:
+            today_str = state.date
             if self.config.get('last_completion_date') != today_str:
                 self.config['last_completion_date'] = today_str
                 log_event("all_tasks_completed", "Todas as rotinas concluídas.", category="history")
@@ -478,57 +585,66 @@ class IdentityRejectionSystem:
             return True
         return False
 
-    def check_fixed_schedule_violations(self):
-        """Verifica se há tarefas de horário fixo atrasadas."""
-        if self.config.get('study_mode', False):
-            self.yellow_manager.root.after(0, self.yellow_manager.hide)
+    def check_fixed_schedule_violations(self, state=None):
+        """Verifica se há tarefas de horário fixo atrasadas (índice de horários do DayState)."""
+        state = state or self.get_day_state()
+        deadline = None if state.study_mode else state.overdue_deadline()
+        if deadline:
+            _, target_task_name, target_task_time = deadline
+            self.notifier.show_fixed_alert(target_task_name, target_task_time)
+            self.notifier.check_shutdown()
+        elif self.notifier.fixed_alert_visible():
+            # Só esconde se o alerta estiver aberto
+            self.notifier.hide_fixed_alert()
+
+    def next_event_delay(self, timeout, state):
+        """
+        Quanto dormir: até o que vier primeiro entre o fim do 'timeout',
+        o próximo horário fixo ou STATE_POLL.
+        """
+        until_deadline = state.seconds_until_next_deadline()
+        if until_deadline > 0: # Já vencido: o alerta é revisto a cada STATE_POLL
+            timeout = min(timeout, until_deadline)
+        return max(0.05, min(timeout, STATE_POLL))
+
+    def play_rejection_sequence(self, is_severe_mode):
+        """
+        Sequência em pipeline:
+        1. Uma única fotografia do estado decide se a sequência inteira toca.
+        2. O volume é ajustado uma vez só.
+        3. Enquanto uma frase é falada, o processo de voz da próxima já é preparado.
+        O cancelamento (Modo Estudo ligado) continua valendo no meio da sequência.
+        """
+        if not self.running or self.get_day_state().study_mode or self.all_tasks_completed():
             return
 
-        tasks_today = get_tasks_for_today()
-        now = datetime.now()
-        
-        violation_found = False
-        target_task_name = ""
-        target_task_time = ""
+        rejections = get_random_rejections(3, config=self.config)
+        tts_speed = self.config.get('tts_speed', 3)
+        if self.notifier.audio: set_system_volume(100)
+
+        next_voice = self.prepare_voice(tts_speed)
+        for i, rejection in enumerate(rejections):
+            voice = next_voice
+            next_voice = None
+            if self.sequence_cancelled():
+                self.discard_voice(voice)
+                break
 
-        for task in tasks_today.values():
-            raw_comp = task.get('completed_on')
-            if verify_and_get_date(raw_comp) == date.today().isoformat():
-                continue
+            self.notifier.show_rejection(rejection, is_severe=is_severe_mode)
+            self.start_voice(voice, rejection)
 
-            fixed_time = task.get('fixed_start_time')
-            if fixed_time:
-                try:
-                    ft_hour, ft_min = map(int, fixed_time.split(':'))
-                    fixed_dt = now.replace(hour=ft_hour, minute=ft_min, second=0, microsecond=0)
-                    if now >= fixed_dt:
-                        violation_found = True
-                        target_task_name = task['name']
-                        target_task_time = fixed_time
-                        break 
-                except: pass
-
-        if violation_found:
-            self.yellow_manager.root.after(0, lambda: self.yellow_manager.show(target_task_name, target_task_time))
-            self.yellow_manager.check_shutdown()
-        else:
-            self.yellow_manager.root.after(0, self.yellow_manager.hide)
+            # Prefetch: aquece a voz da próxima frase enquanto esta toca
+            if i < len(rejections) - 1:
+                next_voice = self.prepare_voice(tts_speed)
 
-    def play_rejection_sequence(self, is_severe_mode):
-        rejections = get_random_rejections(3)
-        tts_speed = self.config.get('tts_speed', 3)
-        for rejection in rejections:
-            if not self.running: break
-            self.reload_config()
-            if self.config.get('study_mode', False) or self.all_tasks_completed(): break
-            set_system_volume(100)
-            self.popup_callback(rejection, is_severe=is_severe_mode)
-            self.speak_text(rejection, tts_speed)
-            time.sleep(0.5) 
+            if not self.wait_voice(voice): break
+            if self.notifier.audio: time.sleep(0.5)
+
+        self.discard_voice(next_voice)
 
     def get_next_interval(self):
-        # 1. Carrega dados atualizados
-        self.reload_config()
+        # 1. Carrega dados atualizados (só se o arquivo mudou)
+        self.reload_config_if_changed()
         
         # 2. Grace Period (Ao ligar o PC)
         elapsed = time.time() - self.start_time
@@ -540,8 +656,15 @@ class IdentityRejectionSystem:
         # 3. REJEIÇÕES
         return random.randint(1, 3) * 60
 
-    def run_rejection_loop(self):
+    def tick(self, state):
+        """Atualiza o registro de vida lido pelo Watchdog."""
+        self.loop_state = state
+        if self.heartbeat: self.heartbeat.tick(state)
+
+    def begin_rejection_loop(self):
+        """Prepara o loop: Grace Period do dia (sorteado uma vez, restaurado em restarts)."""
         self.start_time = time.time()
+        self.wake_at = None
         
         # --- LÓGICA DE GRACE PERIOD BLINDADA (Anti-Scumming) ---
         self.reload_config()
@@ -578,56 +701,100 @@ class IdentityRejectionSystem:
                 # Não. O tempo já acabou hoje.
                 self.startup_grace_duration = 0
                 log_event("grace_period_expired", "Grace Period de hoje já esgotado. Iniciando no modo padrão.")
-        
-        while self.running:
-            try:
-                self.reload_config()
-                self.check_fixed_schedule_violations()
 
-                if self.config.get('study_mode', False) or self.all_tasks_completed():
-                    time.sleep(30)
-                    continue
+    def step(self):
+        """
+        Uma volta do loop, sem bloquear (fora a própria sequência de rejeição, que no
+        agendador compartilhado vai para 'run_long').
+        Retorna quantos segundos dormir até a próxima volta; mudanças de estado
+        (state_changed) acordam antes. Usado pela thread do loop e pelo
+        agendador compartilhado de perfis (profiles.py).
+        """
+        try:
+            self.tick("running")
+            state = self.get_day_state()
+            self.check_fixed_schedule_violations(state)
+
+            if state.study_mode or self.all_tasks_completed():
+                self.tick("idle")
+                self.wake_at = None
+                return 30 # Sair do Modo Estudo acorda o loop na hora
+
+            if self.wake_at is None:
+                self.wake_at = time.time() + self.get_next_interval()
+
+            remaining = self.wake_at - time.time()
+            if remaining > 0:
+                self.tick("waiting")
+                return self.next_event_delay(remaining, state)
+
+            self.wake_at = None
+            time_since_expiry = time.time() - state.grace_expiry_ts
+            is_severe = (time_since_expiry > 1800)
+
+            self.tick("rejecting")
+            if self.run_long is not None:
+                # Os outros perfis seguem na fila; o fim da sequência acorda este perfil
+                self.run_long(lambda: self.play_rejection_sequence(is_severe_mode=is_severe))
+                return 0
+            self.play_rejection_sequence(is_severe_mode=is_severe)
+            return 0
+        except Exception as e:
+            log_event("rejection_loop_error", f"Erro loop: {e}", category="system")
+            self.tick("error")
+            self.wake_at = None
+            return 60
 
-                interval = self.get_next_interval()
-                
-                for i in range(int(interval)):
-                    if not self.running: break
-                    
-                    if i % 5 == 0: 
-                        self.reload_config()
-                        self.check_fixed_schedule_violations()
-                        if self.config.get('study_mode', False) or self.all_tasks_completed(): break
-                    
-                    time.sleep(1)
-                
-                if self.running and not self.config.get('study_mode', False) and not self.all_tasks_completed():
-                    
-                    saved_expiry = self.config.get('grace_period_control', {}).get('expiry_ts', 0)
-                    time_since_expiry = time.time() - saved_expiry
-                    
-                    is_severe = (time_since_expiry > 1800)
-                    
-                    self.play_rejection_sequence(is_severe_mode=is_severe)
+    def run_rejection_loop(self):
+        self.begin_rejection_loop()
+        while self.running:
+            delay = self.step()
+            self.state_changed.clear()
+            if delay > 0 and self.running:
+                self.state_changed.wait(delay)
 
-            except Exception as e:
-                log_event("rejection_loop_error", f"Erro loop: {e}", category="system")
-                time.sleep(60)
+    def start(self, scheduler=None):
+        """
+        Boot em estágios:
+        1. Crítico: sabotagem e Checkpoint de Consciência, decididos pelo índice do dia.
+           Os popups aparecem primeiro; a virada de dia roda em paralelo a eles.
+        2. Loop de rejeição.
+        3. Fundo: snapshot, auditorias completas e compactação, com a máquina ociosa.
+        Com 'scheduler' (Daemon de vários perfis), o loop e o fundo ficam com o
+        agendador compartilhado: nenhuma thread por perfil.
+        """
+        if scheduler is not None:
+            self.boot_stage("new_day_check", self.run_new_day_check_locked)
+            self.boot_stage("sabotage_check", self.check_sabotage_on_startup)
+            self.boot_stage("focus_checkpoint", self.check_initial_focus_popup)
+            self.running = True
+            self.begin_rejection_loop()
+            log_event("system_start", "Daemon iniciado.", category="security")
+            log_event("system_start", "Daemon iniciado (perfis compartilhados).", category="system")
+            self.log_boot_timings("critical")
+            scheduler.add(self)
+            return
 
-    def start(self):
-        # 1. Auditoria de blockchain
-        verify_blockchain_integrity("security", scope="full")
-        verify_blockchain_integrity("history", scope="full")
+        # A virada de dia não tem UI: roda enquanto o usuário lê o popup
+        new_day = threading.Thread(target=self.boot_stage, args=("new_day_check", self.run_new_day_check_locked), daemon=True)
+        new_day.start()
 
-        # 2. Checkpoint de Consciência
-        self.check_initial_focus_popup()
+        # 1. Sabotagem + Checkpoint de Consciência
+        self.boot_stage("sabotage_check", self.check_sabotage_on_startup)
+        self.boot_stage("focus_checkpoint", self.check_initial_focus_popup)
+        new_day.join()
 
-        # 3. Inicia o loop de rejeição
+        # 2. Inicia o loop de rejeição
         self.running = True
         self.rejection_thread = threading.Thread(target=self.run_rejection_loop, daemon=True)
         self.rejection_thread.start()
         
         log_event("system_start", "Daemon iniciado.", category="security")
         log_event("system_start", "Daemon iniciado.", category="system")
+        self.log_boot_timings("critical")
+
+        # 3. Trabalho pesado em baixa prioridade
+        threading.Thread(target=self.run_background_boot_stage, daemon=True).start()
             
     def stop(self):
         self.running = False
@@ -680,60 +847,155 @@ class IdentityRejectionSystem:
 
 # --- SISTEMA DE POPUPS ---
 
-def show_standalone_popup(root, text, is_severe=False):
-    """Exibe o popup vermelho de rejeição com EGO ACTIVATION."""
-    try:
-        popup = tk.Toplevel(root)
+class RejectionPopupPool:
+    """
+    Pool de janelas de rejeição pré-construídas (normal e severa).
+    Depois de 8s a janela é apenas escondida e volta a ser usada com texto e posição novos.
+    Fontes e medidas de quebra de linha ficam em cache por tamanho de tela.
+    """
+    POOL_SIZE = 3          # Uma sequência exibe 3 frases que podem se sobrepor
+    DISPLAY_MS = 8000
+    BG_COLOR = "#1A0000"
+
+    def __init__(self, root):
+        self.root = root
+        self.fonts = {}
+        self.layouts = {}
+        self.slots = {False: [], True: []}
+        self.cursor = {False: 0, True: 0}
+        for is_severe in (False, True):
+            for _ in range(self.POOL_SIZE):
+                self.slots[is_severe].append(self._build_slot(is_severe))
+
+    def get_font(self, family, size, *styles):
+        key = (family, size) + styles
+        if key not in self.fonts:
+            self.fonts[key] = tkfont.Font(root=self.root, family=family, size=size,
+                                          weight="bold" if "bold" in styles else "normal",
+                                          slant="italic" if "italic" in styles else "roman")
+        return self.fonts[key]
+
+    def get_layout(self, is_severe):
+        """Geometria + fonte + wraplength, calculados uma vez por tamanho de tela."""
+        screen = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+        key = (screen, is_severe)
+        if key not in self.layouts:
+            screen_width, screen_height = screen
+            if is_severe:
+                # Modo Brutal (80% da tela)
+                w, h = int(screen_width * 0.8), int(screen_height * 0.8)
+                font_size = 40
+            else:
+                # Modo Padrão
+                w, h = 500, 200
+                font_size = 20
+            x, y = (screen_width - w) // 2, (screen_height - h) // 2
+            self.layouts[key] = {
+                "geometry": f"{w}x{h}+{x}+{y}",
+                "font": self.get_font("Impact", font_size),
+                "wraplength": w - 40
+            }
+        return self.layouts[key]
+
+    def _build_slot(self, is_severe):
+        layout = self.get_layout(is_severe)
+
+        popup = tk.Toplevel(self.root)
+        popup.withdraw()
         popup.title("IDENTIDADE REJEITADA")
         popup.attributes("-topmost", True)
         popup.overrideredirect(True) 
-        popup.configure(bg="#1A0000")
-        
-        screen_width = root.winfo_screenwidth()
-        screen_height = root.winfo_screenheight()
-        
-        if is_severe:
-            # Modo Brutal (80% da tela)
-            w, h = int(screen_width * 0.8), int(screen_height * 0.8)
-            x, y = (screen_width - w) // 2, (screen_height - h) // 2
-            font_size = 40
-        else:
-            # Modo Padrão
-            w, h = 500, 200
-            x, y = (screen_width - w) // 2, (screen_height - h) // 2
-            font_size = 20
+        popup.configure(bg=self.BG_COLOR)
 
-        popup.geometry(f"{w}x{h}+{x}+{y}")
-        
         # Texto Principal (A Rejeição gritada)
-        # Usei side=tk.TOP e expand=True para empurrar ele pro meio/topo
-        label = tk.Label(popup, text=text, font=("Impact", font_size), 
-                         fg="#FF0000", bg="#1A0000", wraplength=w-40, justify=tk.CENTER)
+        label = tk.Label(popup, text="", font=layout["font"], 
+                         fg="#FF0000", bg=self.BG_COLOR, wraplength=layout["wraplength"], justify=tk.CENTER)
         label.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=20, pady=(40, 20))
-        
+
         # --- EGO ACTIVATION ---
         if is_severe:
             taunt_msg = ("Se estiver muito difícil... Exclua o programa.")
-            
             # Fonte menor, itálico, cor cinza (fantasma)
-            lbl_taunt = tk.Label(popup, text=taunt_msg, font=("Segoe UI", 12, "italic"), 
-                                 fg="#555555", bg="#1A0000", justify=tk.CENTER)
+            lbl_taunt = tk.Label(popup, text=taunt_msg, font=self.get_font("Segoe UI", 12, "italic"), 
+                                 fg="#555555", bg=self.BG_COLOR, justify=tk.CENTER)
             lbl_taunt.pack(side=tk.BOTTOM, pady=(0, 40))
 
-        popup.after(8000, popup.destroy)
-        popup.update()
+        return {"win": popup, "label": label, "layout": layout, "after_id": None}
+
+    def _next_slot(self, is_severe):
+        """Prefere uma janela livre; se todas estiverem na tela, recicla a mais antiga."""
+        slots = self.slots[is_severe]
+        for slot in slots:
+            if slot["after_id"] is None:
+                return slot
+        slot = slots[self.cursor[is_severe]]
+        self.cursor[is_severe] = (self.cursor[is_severe] + 1) % len(slots)
+        return slot
+
+    def show(self, text, is_severe=False):
+        slot = self._next_slot(is_severe)
+        win = slot["win"]
+        if slot["after_id"] is not None:
+            try: win.after_cancel(slot["after_id"])
+            except: pass
+
+        layout = self.get_layout(is_severe)
+        if layout is not slot["layout"]:
+            # A resolução mudou: reaplica fonte e quebra de linha no widget existente
+            slot["label"].config(font=layout["font"], wraplength=layout["wraplength"])
+            slot["layout"] = layout
+
+        slot["label"].config(text=text)
+        win.geometry(layout["geometry"])
+        win.deiconify()
+        win.lift()
+        win.attributes("-topmost", True)
+        slot["after_id"] = win.after(self.DISPLAY_MS, lambda: self.release(slot))
+        win.update()
+
+    def release(self, slot):
+        slot["after_id"] = None
+        try: slot["win"].withdraw()
+        except: pass
+
+def get_popup_pool(root):
+    """Um pool por root; criado na primeira rejeição se o daemon ainda não o criou."""
+    pool = getattr(root, "_rejection_popup_pool", None)
+    if pool is None:
+        pool = RejectionPopupPool(root)
+        root._rejection_popup_pool = pool
+    return pool
+
+def show_standalone_popup(root, text, is_severe=False):
+    """Exibe o popup vermelho de rejeição com EGO ACTIVATION."""
+    try:
+        get_popup_pool(root).show(text, is_severe)
     except: pass
 
-def run_daemon_process():
-    root = tk.Tk()
-    root.withdraw() 
-    
-    yellow_manager = YellowAlertManager(root)
-    
-    system = IdentityRejectionSystem(
-        popup_callback_func=lambda text, is_severe=False: show_standalone_popup(root, text, is_severe),
-        yellow_manager=yellow_manager
-    )
+def run_daemon_process(headless=False, notifier=None):
+    """
+    headless=True: sem display (backend de terminal); 'notifier' permite injetar
+    outro backend (ex.: RecordingNotifier em benchmarks).
+    """
+    # Instância única: o lock do PID file é solto pelo SO se o processo morrer
+    pid_lock = PidLock()
+    if not pid_lock.acquire():
+        log_event("daemon_duplicate", "Outro Daemon já segura o PID file. Saindo.", category="system")
+        return EXIT_LOCK_BUSY # O Supervisor não conta como morte
+    heartbeat = Heartbeat()
+
+    notifier = notifier or create_notifier("log" if headless else "tk")
+    system = IdentityRejectionSystem(notifier)
+    system.heartbeat = heartbeat
+
+    # Endpoint local: GUI e Modo Estudo passam a pedir as mudanças ao Daemon
+    state_service = StateService(system)
+    state_service.start()
+
     system.start()
-    try: root.mainloop()
-    except KeyboardInterrupt: system.stop()
\ No newline at end of file
+    try: notifier.run()
+    except KeyboardInterrupt: system.stop()
+    finally:
+        state_service.stop()
+        heartbeat.close()
+        pid_lock.release()
\ No newline at end of file
@@ -2,44 +2,95 @@
 import os
 import sys
 import time
-import shutil
 import random
 import threading
 import subprocess
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog, filedialog
+from tkinter import ttk, messagebox
 from datetime import date
 
-# Dependências Opcionais
-try: from PIL import Image, ImageDraw
-except ImportError: Image = None
-try: import pystray; from pystray import MenuItem as item
-except ImportError: pystray = None
+# Dependências Opcionais (PIL/pystray) são carregadas em setup_tray_icon,
+# depois da primeira janela aparecer.
+Image = ImageDraw = pystray = item = None
 
 from core import (
-    APP_NAME, PROOFS_DIR, IS_WINDOWS, IS_MACOS, IS_LINUX,
-    load_config_data, save_config_data, log_event, run_backup_system,
-    set_system_volume, center_window, get_tasks_for_today,
+    APP_NAME, IS_WINDOWS, IS_MACOS, IS_LINUX,
+    update_config, log_event, run_backup_system,
+    set_system_volume, center_window,
     sign_date, verify_and_get_date
 )
-from daemon import show_standalone_popup
-# --- NOVO: Integração com o Banco de Horas ---
-from bank_manager import create_transaction, get_balances, get_history
+from io_pool import IOPool, StallMonitor
+from view_store import ViewStore
+# state_service (multiprocessing) e bank_manager são importados onde são usados:
+# a primeira janela não precisa deles.
+
+STATEMENT_PAGE_SIZE = 100 # Linhas do extrato por página
+STATEMENT_PREFETCH_AT = 0.8 # Fração rolada que dispara a próxima página
+_statement_rows = {} # Linha formatada por (depósito, dia): reaberturas não reformatam nada
+
+def format_br_date(iso):
+    try: return date.fromisoformat(iso).strftime("%d/%m/%y")
+    except: return iso
+
+def format_statement_row(tx, today_str):
+    """(valores, tag) de uma linha do extrato, com cache."""
+    key = (tx.get('origin_date'), tx.get('task_source'), tx.get('amount_earned'),
+           tx.get('amount_remaining'), tx.get('unlock_date'), today_str)
+    row = _statement_rows.get(key)
+    if row: return row
+
+    origin, task, earned, remain, unlock = key[:5]
+    unlock_fmt = format_br_date(unlock)
+    if remain == 0:
+        tag, status_txt = "depleted", "ESGOTADO"
+    elif unlock <= today_str:
+        tag, status_txt = "available", "LIBERADO"
+    else:
+        # Bloqueado: data de liberação com ícone de cadeado
+        tag, status_txt = "locked", f"🔒 {unlock_fmt}"
+
+    row = ((format_br_date(origin), task, f"+{earned}min", f"{remain}min", status_txt), tag)
+    if len(_statement_rows) > 20000: _statement_rows.clear()
+    _statement_rows[key] = row
+    return row
+
+def load_tray_dependencies():
+    """Importa PIL e pystray sob demanda. Retorna True se ambos estão disponíveis."""
+    global Image, ImageDraw, pystray, item
+    if pystray and Image: return True
+    try: from PIL import Image, ImageDraw
+    except ImportError: Image = None
+    try: import pystray; from pystray import MenuItem as item
+    except ImportError: pystray = None
+    return bool(pystray and Image)
 
 class App:
     def __init__(self, root):
         self.root = root
         self.root.title(APP_NAME)
         center_window(self.root, 600, 500)
-        self.config_data = load_config_data()
-        self.tasks = self.config_data.get('tasks', {})
+        self.day_state = None
+        # Config, banco e provas são lidos/gravados fora da thread do Tk
+        self.io = IOPool(self.root)
+        self.stall_monitor = StallMonitor(self.root)
+        self.stall_monitor.start()
+        # View models compartilhados (economia, tarefas, banco), em dia com os arquivos
+        self.store = ViewStore(self.root, self.io)
+        self.get_day_state() # Carrega config_data, tasks e o DayState
         self.setup_style()
         self.create_main_widgets()
-        self.setup_tray_icon()
-        threading.Thread(target=run_backup_system, daemon=True).start()
         self.root.protocol("WM_DELETE_WINDOW", self.hide_window)
         self.update_task_list()
         self.study_mode_var.set(self.config_data.get('study_mode', False))
+        # Bandeja e backup só depois da primeira pintura da janela
+        self.root.after(200, self.finish_startup)
+
+    def finish_startup(self):
+        # Mudanças feitas por outro processo (Daemon, Modo Estudo) redesenham a lista sozinhas
+        self.store.subscribe("day", lambda day: self.update_task_list())
+        self.store.watch()
+        self.setup_tray_icon()
+        threading.Thread(target=run_backup_system, daemon=True).start()
 
     def setup_style(self):
         self.style = ttk.Style()
@@ -121,16 +172,63 @@ class App:
         self.task_canvas.configure(yscrollcommand=scrollbar.set)
         self.task_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.task_widgets = {}
+        self.task_widgets = {} # task_id -> linha (frame, var, cb, label, chave renderizada)
+        self.task_order = []
+        self.empty_label = None
+
+    def get_day_state(self):
+        """DayState do store: o config só é relido se o arquivo mudou ou virou o dia."""
+        day_state = self.store.current("day")
+        if day_state is not self.day_state:
+            self.config_data = self.store.get("config")
+            self.tasks = self.config_data.get('tasks', {})
+            self.day_state = day_state
+        return self.day_state
+
+    def build_task_row(self, task_id):
+        f = ttk.Frame(self.scrollable_frame, padding=5)
+        var = tk.BooleanVar(value=False)
+        cb = ttk.Checkbutton(f, variable=var, command=lambda v=var, tid=task_id: self.on_task_check(v, tid))
+        cb.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        done_label = ttk.Label(f, text="Concluído", font=("Segoe UI", 9, "italic"), foreground="#00A000", cursor="hand2")
+        done_label.bind("<Button-1>", lambda e, tid=task_id: self.show_task_proof(tid))
+        return {'frame': f, 'var': var, 'cb': cb, 'done_label': done_label, 'key': None}
+
+    def render_task_row(self, row, name, is_completed):
+        row['cb'].config(text=name, state=tk.DISABLED if is_completed else tk.NORMAL)
+        row['var'].set(is_completed)
+        if is_completed:
+            row['done_label'].pack(side=tk.RIGHT)
+        else:
+            row['done_label'].pack_forget()
+        row['key'] = (name, is_completed)
+
+    def show_task_proof(self, task_id):
+        """Prova de hoje da tarefa (a referência do arquivo de provas é resolvida no pool de I/O)."""
+        task = self.tasks_for_today.get(task_id) or {}
+        from proof_archive import proof_text
+        def show(text):
+            messagebox.showinfo(f"Prova: {task.get('name', 'Tarefa')}", text or "Prova não encontrada no arquivo.")
+        self.io.submit(proof_text, task.get('proof'), on_done=show)
 
     def update_task_list(self):
-        for widget in self.scrollable_frame.winfo_children(): widget.destroy()
-        self.task_widgets = {}
-        today_str = date.today().isoformat()
-        self.tasks_for_today = get_tasks_for_today()
-        
+        """
+        Reconciliação por task_id: só as linhas cuja tarefa, conclusão ou nome mudaram
+        são redesenhadas; as outras mantêm os widgets. Sem mudança no config, nada é lido do disco.
+        """
+        state = self.get_day_state()
+        today_str = state.date
+        self.tasks_for_today = state.tasks_for_today
+
+        # Linhas de tarefas que saíram do dia
+        for task_id in [t for t in self.task_widgets if t not in self.tasks_for_today]:
+            self.task_widgets.pop(task_id)['frame'].destroy()
+
         if not self.tasks_for_today:
-            ttk.Label(self.scrollable_frame, text="Nenhuma tarefa de rotina para hoje.", font=("Segoe UI", 10, "italic")).pack(pady=20, padx=10)
+            self.task_order = []
+            if self.empty_label is None:
+                self.empty_label = ttk.Label(self.scrollable_frame, text="Nenhuma tarefa de rotina para hoje.", font=("Segoe UI", 10, "italic"))
+                self.empty_label.pack(pady=20, padx=10)
             #ttk.Label(self.scrollable_frame, text="⏸️ Streak Pausado (Folga)", font=("Segoe UI", 9, "bold"), foreground="#00CCFF").pack(pady=5)
             
             # --- CORREÇÃO: SALVA O DIA COMO 'VISTO' ---
@@ -138,26 +236,28 @@ class App:
             # Assim, amanhã o sistema vê que não houve falha hoje e mantém o streak.
             if self.config_data.get('last_completion_date') != today_str:
                 self.config_data['last_completion_date'] = today_str
-                save_config_data(self.config_data)
+                self.io.submit(update_config, lambda c: c.update(last_completion_date=today_str), "streak_paused")
                 log_event("streak_paused", "Dia sem tarefas: Streak preservado.", category="system")
-        else:
-            for task_id, task in self.tasks_for_today.items():
-                f = ttk.Frame(self.scrollable_frame, padding=5)
-                f.pack(fill=tk.X, pady=2)
-                
-                raw_completed = task.get('completed_on')
-                valid_date = verify_and_get_date(raw_completed) 
-                is_completed = (valid_date == today_str)
-
-                var = tk.BooleanVar(value=is_completed)
-                cb = ttk.Checkbutton(f, text=task['name'], variable=var, command=lambda v=var, tid=task_id: self.on_task_check(v, tid))
-                cb.pack(side=tk.LEFT, fill=tk.X, expand=True)
-                
-                if is_completed:
-                    cb.config(state=tk.DISABLED)
-                    ttk.Label(f, text="Concluído", font=("Segoe UI", 9, "italic"), foreground="#00A000").pack(side=tk.RIGHT)
-                
-                self.task_widgets[task_id] = {'var': var, 'cb': cb}
+            return
+
+        if self.empty_label is not None:
+            self.empty_label.destroy()
+            self.empty_label = None
+
+        for task_id, task in self.tasks_for_today.items():
+            row = self.task_widgets.get(task_id)
+            if row is None:
+                row = self.task_widgets[task_id] = self.build_task_row(task_id)
+            key = (task['name'], task_id in state.completed_ids)
+            if row['key'] != key:
+                self.render_task_row(row, *key)
+
+        # Reempacota só se a ordem (ou o conjunto) de tarefas mudou
+        order = list(self.tasks_for_today)
+        if order != self.task_order:
+            for task_id in order: self.task_widgets[task_id]['frame'].pack_forget()
+            for task_id in order: self.task_widgets[task_id]['frame'].pack(fill=tk.X, pady=2)
+            self.task_order = order
 
     def show_celebration_popup(self):
         win = tk.Toplevel(self.root)
@@ -170,8 +270,7 @@ class App:
         fg_color = "#FFFFFF"
         win.configure(bg=bg_color)
         
-        config = load_config_data()
-        phrases = config.get('celebrations', ["Parabéns pelo foco."])
+        phrases = self.store.current("settings")['celebrations']
         phrase = random.choice(phrases)
         
         frame = tk.Frame(win, bg=bg_color, padx=20, pady=20)
@@ -188,50 +287,44 @@ class App:
                   command=win.destroy).pack()
     
     def on_task_check(self, var, task_id):
-        if var.get(): 
-            self.config_data = load_config_data()
-            self.tasks = self.config_data.get('tasks', {})
-            if task_id not in self.tasks: return
-            task = self.tasks[task_id]
+        if not var.get(): return
+        # Estado e conclusão passam pelo Daemon (IPC, lock, fsync, arquivo de provas): tudo no pool de I/O
+        from state_service import get_state
+        # A janela de prova é modal (wait_window): abre fora da entrega do pool, pelo after()
+        self.io.submit(get_state, on_done=lambda cfg: self.root.after(0, lambda: self.ask_task_proof(var, task_id, cfg)),
+                       on_error=lambda e: var.set(False))
+
+    def ask_task_proof(self, var, task_id, cfg):
+        if not var.get(): return # Desmarcada enquanto o estado carregava
+        self.config_data = cfg
+        self.tasks = self.config_data.get('tasks', {})
+        if task_id not in self.tasks:
+            var.set(False); return
+        task = self.tasks[task_id]
+
+        ptype, pdata = self.get_proof(task, task_id)
+        if not pdata:
+            var.set(False); return
+
+        def on_completed(outcome):
+            completed, all_done = outcome
+            if not completed:
+                var.set(False); return
+            self.update_task_list()
+            if all_done:
+                self.show_celebration_popup()
 
-            ptype, pdata = self.get_proof(task)
-            
-            if pdata:
-                signed_today = sign_date(date.today().isoformat())
-                task['completed_on'] = signed_today
-                
-                task['proof'] = pdata; task['proof_type'] = ptype
-                self.config_data['tasks'] = self.tasks
-                save_config_data(self.config_data)
-                log_event("task_completed", f"{task_id}: {task['name']}", category="history")
-                self.update_task_list()
-                
-                tasks_for_today = get_tasks_for_today()
-                all_done = True
-                if not tasks_for_today: all_done = False
-                
-                for t in tasks_for_today.values():
-                    v_date = verify_and_get_date(t.get('completed_on'))
-                    if v_date != date.today().isoformat(): 
-                        all_done = False; break
-                
-                if all_done:
-                    self.config_data['last_completion_date'] = date.today().isoformat()
-                    save_config_data(self.config_data)
-                    self.show_celebration_popup()
-            else: var.set(False)
+        # O Daemon aplica a conclusão (ou o fallback grava direto no arquivo)
+        from state_service import complete_task
+        self.io.submit(complete_task, task_id, ptype, pdata,
+                       on_done=on_completed, on_error=lambda e: var.set(False))
 
-    def get_proof(self, task):
+    def get_proof(self, task, task_id=None):
         """
         Janela de prova com Validação Numérica e Integração com Banco de Horas.
         """
         task_name = task.get('name', 'Tarefa')
         
-        # --- LÓGICA FLEX ---
-        cfg = load_config_data()
-        econ = cfg.get('economy', {})
-        is_flex_day = (econ.get('flex_active_date') == date.today().isoformat())
-        
         # Dados do Contrato Original
         raw_min_val = task.get('min_time_val', '0')
         raw_min_unit = task.get('min_time_unit', 'minutos')
@@ -244,12 +337,9 @@ class App:
         except:
             original_min_minutes = 0
 
-        # 2. Define o tempo exigido para passar HOJE (base para Validação)
-        effective_min_minutes = original_min_minutes
-        
-        if is_flex_day and original_min_minutes > 15:
-            # No modo Flex, o mínimo para passar cai para 15 (ou mantém se for menor)
-            effective_min_minutes = 15
+        # 2. Tempo exigido para passar HOJE (base para Validação): depende do modo Flex,
+        # que chega do pool de I/O logo depois da janela abrir
+        ctx = {"econ": {}, "effective": original_min_minutes}
 
         win = tk.Toplevel(self.root)
         win.title(f"Prova: {task_name}")
@@ -260,11 +350,9 @@ class App:
         frame = ttk.Frame(win, padding=15)
         frame.pack(fill=tk.BOTH, expand=True)
 
-        if is_flex_day:
-            tk.Label(frame, text="⚡ MODO FLEX ATIVO: Meta reduzida para 15 min.", fg="#00CCFF", bg="#2E2E2E").pack(fill=tk.X, pady=(0, 10))
-
         # --- SEÇÃO DE INPUT (OBRIGATÓRIO SE TIVER MIN TIME) ---
         time_entry = None
+        meta_label = None
         is_time_tracking = (original_min_minutes > 0)
         
         if is_time_tracking:
@@ -272,8 +360,8 @@ class App:
             val_frame.pack(fill=tk.X, pady=(0, 15))
             
             # Texto explicativo da meta
-            meta_texto = f"{effective_min_minutes} minutos"
-            ttk.Label(val_frame, text=f"Meta de Hoje: {meta_texto}", font=("Segoe UI", 10, "bold"), foreground="#FFCC00").pack(anchor=tk.W)
+            meta_label = ttk.Label(val_frame, text="Meta de Hoje: ...", font=("Segoe UI", 10, "bold"), foreground="#FFCC00")
+            meta_label.pack(anchor=tk.W)
             
             row = tk.Frame(val_frame)
             row.pack(fill=tk.X, pady=(5, 0))
@@ -302,14 +390,14 @@ class App:
             
             # --- CHEQUE DE PASSE LIVRE ---
             if user_input.lower() == "passe livre":
-                passes = econ.get('free_passes', 0)
+                passes = ctx["econ"].get('passes', 0)
                 if passes > 0:
                     if messagebox.askyesno("Usar Passe", f"Você tem {passes} passes.\nDeseja gastar 1 para pular esta tarefa?"):
                         # Nota: Descontamos o passe aqui pois requer interação do usuário, 
                         # mas se ele cancelar a prova depois, perde o passe. É aceitável.
-                        econ['free_passes'] -= 1
-                        cfg['economy'] = econ
-                        save_config_data(cfg)
+                        def spend_pass(c):
+                            c['economy']['free_passes'] = max(0, c['economy'].get('free_passes', 0) - 1)
+                        self.io.submit(update_config, spend_pass, "use_free_pass")
                         log_event("PASS_USED", f"Usou passe na tarefa: {task_name}", category="history")
                         return "PASS"
                 else:
@@ -324,21 +412,31 @@ class App:
                 return False
             
             # Validação: Cumpriu a meta de hoje?
-            if actual_minutes < effective_min_minutes:
-                messagebox.showerror("Falha de Disciplina", f"Você fez {actual_minutes}min. A meta de hoje era {effective_min_minutes}min.\nComplete o tempo antes de marcar.")
+            if actual_minutes < ctx["effective"]:
+                messagebox.showerror("Falha de Disciplina", f"Você fez {actual_minutes}min. A meta de hoje era {ctx['effective']}min.\nComplete o tempo antes de marcar.")
                 return False
                 
             return actual_minutes
 
         def commit_bank_transaction(validated_value):
-            """Executa a transação no banco SOMENTE no final."""
+            """Executa a transação no banco SOMENTE no final (no pool de I/O). Retorna a mensagem a mostrar."""
             if validated_value == "PASS" or not is_time_tracking:
-                return
+                return None
 
             # validated_value é int aqui
+            from bank_manager import create_transaction
             success, msg = create_transaction(task_name, original_min_minutes, validated_value)
-            if success:
-                messagebox.showinfo("Banco de Horas", msg)
+            return msg if success else None
+
+        def set_busy(busy):
+            """Enquanto banco/cópia rodam no pool, a janela não fecha nem aceita outro envio."""
+            for b in buttons: b.config(state=tk.DISABLED if busy else tk.NORMAL)
+            win.protocol("WM_DELETE_WINDOW", (lambda: None) if busy else win.destroy)
+
+        def finish(proof_type, proof, bank_msg):
+            if bank_msg: messagebox.showinfo("Banco de Horas", bank_msg)
+            res["t"] = proof_type; res["d"] = proof
+            win.destroy()
 
         def save_txt():
             # 1. Valida Números primeiro
@@ -355,10 +453,9 @@ class App:
                 return
 
             # 3. SE CHEGOU AQUI, ESTÁ TUDO CERTO. COMMIT NO BANCO.
-            commit_bank_transaction(val_result)
-
-            res["t"] = "text"; res["d"] = d
-            win.destroy()
+            set_busy(True)
+            self.io.submit(commit_bank_transaction, val_result,
+                           on_done=lambda msg: finish("text", d, msg), on_error=lambda e: set_busy(False))
 
         def save_img():
             # 1. Valida Números primeiro
@@ -372,32 +469,68 @@ class App:
                 return
 
             # 2. Valida Imagem
+            from tkinter import filedialog
             fp = filedialog.askopenfilename(filetypes=[("Imagens", "*.png *.jpg")])
             if fp:
-                try:
-                    # 3. SE CHEGOU AQUI, ESTÁ TUDO CERTO. COMMIT NO BANCO.
-                    commit_bank_transaction(val_result)
-                    
-                    np = os.path.join(PROOFS_DIR, f"proof_{date.today()}_{os.path.basename(fp)}")
-                    shutil.copy(fp, np)
-                    res["t"] = "image"; res["d"] = np
-                    win.destroy()
-                except: pass
+                def store_image():
+                    # Armazém de provas: hash, redução, miniatura, cota e dHash (proof_store.py)
+                    from proof_store import ingest_proof
+                    ok, info = ingest_proof(fp, task_id=task_id)
+                    if not ok: raise IOError(info)
+                    return info
+                def on_failed(e):
+                    set_busy(False)
+                    messagebox.showerror("Erro", f"Não foi possível guardar a imagem.\n{e}")
+                def on_stored(info):
+                    if info['similar']:
+                        # Imagem igual ou quase igual a uma prova de outro dia
+                        days = sorted({day for _, _, uses in info['similar'] for _, day in uses})[-3:]
+                        days_fmt = ", ".join(format_br_date(d) for d in days)
+                        if not messagebox.askyesno("Prova Reaproveitada?",
+                                f"Esta imagem é praticamente igual a uma prova já usada ({days_fmt}).\n\n"
+                                "Usar mesmo assim?", icon="warning", parent=win):
+                            set_busy(False)
+                            return
+                        log_event("PROOF_REUSE_CONFIRMED", f"Imagem reaproveitada na tarefa: {task_name}", category="security")
+                    # 3. SE CHEGOU AQUI, ESTÁ TUDO CERTO. O uso só conta agora; depois, COMMIT NO BANCO.
+                    def accept():
+                        from proof_store import record_use
+                        record_use(info['hash'], task_id=task_id)
+                        return commit_bank_transaction(val_result)
+                    self.io.submit(accept, on_done=lambda msg: finish("image", info['path'], msg), on_error=on_failed)
+                set_busy(True)
+                self.io.submit(store_image, on_done=on_stored, on_error=on_failed)
 
         btn_frame = ttk.Frame(frame); btn_frame.pack(pady=10, fill=tk.X)
-        ttk.Button(btn_frame, text="Salvar", command=save_txt).pack(side=tk.LEFT, expand=True, fill=tk.X)
-        ttk.Button(btn_frame, text="Anexar Imagem", command=save_img).pack(side=tk.LEFT, expand=True, fill=tk.X)
+        buttons = (ttk.Button(btn_frame, text="Salvar", command=save_txt),
+                   ttk.Button(btn_frame, text="Anexar Imagem", command=save_img))
+        for b in buttons: b.pack(side=tk.LEFT, expand=True, fill=tk.X)
+
+        # --- LÓGICA FLEX (economia do store; envio liberado quando estiver em dia) ---
+        def on_economy(economy):
+            if not win.winfo_exists(): return
+            ctx["econ"] = economy or {}
+            if ctx["econ"].get('flex_today'):
+                # No modo Flex, o mínimo para passar cai para 15 (ou mantém se for menor)
+                ctx["effective"] = min(original_min_minutes, 15)
+                tk.Label(frame, text="⚡ MODO FLEX ATIVO: Meta reduzida para 15 min.", fg="#00CCFF", bg="#2E2E2E").pack(fill=tk.X, pady=(0, 10), before=frame.winfo_children()[0])
+            if meta_label is not None:
+                meta_label.config(text=f"Meta de Hoje: {ctx['effective']} minutos")
+            set_busy(False)
+        for b in buttons: b.config(state=tk.DISABLED)
+        self.store.when_ready("economy", on_economy)
         
         self.root.wait_window(win)
         return res["t"], res["d"]
 
     def open_menu(self):
-        win = tk.Toplevel(self.root); win.title("Menu"); center_window(win, 300, 250)
+        win = tk.Toplevel(self.root); win.title("Menu"); center_window(win, 300, 290)
         win.transient(self.root); win.grab_set()
         f = ttk.Frame(win, padding="15"); f.pack(fill=tk.BOTH, expand=True)
         ttk.Button(f, text="Gerenciar Tarefas", command=self.open_task_manager).pack(fill=tk.X, pady=5)
         ttk.Button(f, text="💎 Loja da Disciplina", command=self.open_store).pack(fill=tk.X, pady=5)
         ttk.Button(f, text="⏳ Banco de Horas", command=self.open_bank_statement).pack(fill=tk.X, pady=5)
+        ttk.Button(f, text="🔎 Arquivo de Provas", command=self.open_proof_archive).pack(fill=tk.X, pady=5)
         ttk.Button(f, text="Gerenciar Rejeições", command=lambda: self.manage_list("Rejeições", "rejections")).pack(fill=tk.X, pady=5)
         ttk.Button(f, text="Configurar Velocidade", command=self.open_settings).pack(fill=tk.X, pady=5)
         ttk.Button(f, text="Testar Áudio", command=self.test_audio).pack(fill=tk.X, pady=5)
@@ -412,32 +545,32 @@ class App:
         win.grab_set()
         win.configure(bg="#1E1E1E")
 
-        cfg = load_config_data()
-        econ = cfg.get('economy', {})
-        credits_list = econ.get('flex_credits', [])
+        loading = tk.Label(win, text="Carregando...", font=("Segoe UI", 10, "italic"), bg="#1E1E1E", fg="#666666")
+        loading.pack(pady=40)
+
+        shown = {"economy": None}
+        def render(economy):
+            # Redesenha quando a economia muda (ex.: o Daemon virou o dia com a Loja aberta)
+            if economy is None or economy is shown["economy"] or not win.winfo_exists(): return
+            shown["economy"] = economy
+            for child in win.winfo_children():
+                if not isinstance(child, tk.Toplevel): child.destroy()
+            self.fill_store(win, economy)
+        self.store.when_ready("economy", render)
+        self.store.subscribe("economy", render, widget=win)
+
+    def fill_store(self, win, economy):
+        credits_list = economy['credits']
         num_credits = len(credits_list)
-        passes = econ.get('free_passes', 0)
-        streak = econ.get('streak_progress', 0)
-        pending_trade = econ.get('pending_trade', False)
-
-        today_tasks = get_tasks_for_today()
-        all_done_today = True
-        if not today_tasks: 
-            all_done_today = False
-        else:
-            for t in today_tasks.values():
-                v_date = verify_and_get_date(t.get('completed_on'))
-                if v_date != date.today().isoformat():
-                    all_done_today = False; break
-        
-        last_comp = cfg.get('last_completion_date')
+        passes = economy['passes']
+        streak = economy['streak']
+        pending_trade = economy['pending_trade']
         today_str = date.today().isoformat()
         
         streak_display = f"{streak}/10"
         
-        if all_done_today and last_comp == today_str:
-             if econ.get('flex_active_date') != today_str:
-                 streak_display = f"{streak} (+1 ⏳)/10"
+        if economy['streak_pending']:
+            streak_display = f"{streak} (+1 ⏳)/10"
 
         dash_frame = tk.Frame(win, bg="#1E1E1E", highlightbackground="#333333", highlightthickness=2)
         dash_frame.pack(pady=20, padx=40, fill=tk.X)
@@ -490,8 +623,7 @@ class App:
         frame_actions = tk.Frame(win, bg="#1E1E1E", pady=20)
         frame_actions.pack(fill=tk.X, padx=40)
 
-        today_str = date.today().isoformat()
-        is_flex_active = (econ.get('flex_active_date') == today_str)
+        is_flex_active = economy['flex_today']
         
         def use_flex():
             if num_credits < 1:
@@ -555,13 +687,18 @@ class App:
             win.wait_window(checkout)
             
             if result["confirm"]:
-                econ['flex_credits'].pop(0)
-                econ['flex_active_date'] = today_str
-                cfg['economy'] = econ
-                save_config_data(cfg)
-                log_event("FLEX_ACTIVATED", "Modo Flex ativado (-1 crédito).", category="history")
-                win.destroy() 
-                messagebox.showinfo("Transação Aprovada", "Modo Flex ATIVADO.\nRespire fundo e faça o mínimo hoje.")
+                def activate_flex(c):
+                    c['economy']['flex_credits'].pop(0)
+                    c['economy']['flex_active_date'] = today_str
+                def on_saved(saved):
+                    if saved is None:
+                        messagebox.showerror("Erro", "Não foi possível salvar. Tente novamente.")
+                        return
+                    log_event("FLEX_ACTIVATED", "Modo Flex ativado (-1 crédito).", category="history")
+                    if win.winfo_exists(): win.destroy()
+                    messagebox.showinfo("Transação Aprovada", "Modo Flex ATIVADO.\nRespire fundo e faça o mínimo hoje.")
+                btn_flex.config(state=tk.DISABLED)
+                self.io.submit(update_config, activate_flex, "use_flex", on_done=on_saved, on_error=lambda e: on_saved(None))
 
         btn_flex = tk.Button(frame_actions, text="USAR FLEXIBILIDADE (-1 💎)", 
                              bg="#2E2E2E", fg="#00CCFF", font=("Segoe UI", 11, "bold"),
@@ -578,14 +715,19 @@ class App:
                     "Deseja trocar TODOS os seus 4 créditos + Bônus por 1 PASSE LIVRE?\n\n"
                     "O Passe Livre é eterno e completa qualquer dia instantaneamente.")
                 if resp:
-                    econ['flex_credits'] = []
-                    econ['free_passes'] += 1
-                    econ['pending_trade'] = False
-                    cfg['economy'] = econ
-                    save_config_data(cfg)
-                    log_event("PASS_BOUGHT", "Trocou 4 créditos por 1 passe.", category="history")
-                    win.destroy()
-                    messagebox.showinfo("GLÓRIA", "Você adquiriu 1 PASSE LIVRE Eterno!")
+                    def buy_pass(c):
+                        c['economy']['flex_credits'] = []
+                        c['economy']['free_passes'] = c['economy'].get('free_passes', 0) + 1
+                        c['economy']['pending_trade'] = False
+                    def on_saved(saved):
+                        if saved is None:
+                            messagebox.showerror("Erro", "Não foi possível salvar. Tente novamente.")
+                            return
+                        log_event("PASS_BOUGHT", "Trocou 4 créditos por 1 passe.", category="history")
+                        if win.winfo_exists(): win.destroy()
+                        messagebox.showinfo("GLÓRIA", "Você adquiriu 1 PASSE LIVRE Eterno!")
+                    btn_trade.config(state=tk.DISABLED)
+                    self.io.submit(update_config, buy_pass, "trade_pass", on_done=on_saved, on_error=lambda e: on_saved(None))
 
             tk.Label(frame_actions, text="--- OFERTA ESPECIAL ---", bg="#1E1E1E", fg="#FFD700").pack(pady=(10, 0))
             btn_trade = tk.Button(frame_actions, text="🔥 RESGATAR PASSE LIVRE 🔥", 
@@ -596,14 +738,14 @@ class App:
     def open_bank_statement(self):
         win = tk.Toplevel(self.root)
         win.title("Extrato do Banco de Horas")
-        center_window(win, 700, 500)
+        center_window(win, 700, 560)
         win.transient(self.root)
         win.grab_set()
         win.configure(bg="#1E1E1E")
 
-        # 1. Obter Dados
-        locked_min, available_min = get_balances()
-        history = get_history()
+        # 1. Dados chegam pelo pool de I/O; a janela abre com "..." no lugar
+        from bank_manager import get_history
+        today = date.today()
 
         def fmt_time(minutes):
             h = minutes // 60
@@ -622,16 +764,35 @@ class App:
         f_locked = tk.Frame(stats_container, bg="#252525", padx=20, pady=10)
         f_locked.pack(side=tk.LEFT, padx=10)
         tk.Label(f_locked, text="A LIBERAR", font=("Segoe UI", 9, "bold"), bg="#252525", fg="#888888").pack()
-        tk.Label(f_locked, text=fmt_time(locked_min), font=("Consolas", 18, "bold"), bg="#252525", fg="#FF6666").pack()
+        lbl_locked = tk.Label(f_locked, text="...", font=("Consolas", 18, "bold"), bg="#252525", fg="#FF6666")
+        lbl_locked.pack()
         tk.Label(f_locked, text="Investimento a longo prazo", font=("Segoe UI", 8), bg="#252525", fg="#555").pack()
 
         # Saldo Atual (Disponível)
         f_avail = tk.Frame(stats_container, bg="#252525", padx=20, pady=10)
         f_avail.pack(side=tk.LEFT, padx=10)
         tk.Label(f_avail, text="DISPONÍVEL HOJE", font=("Segoe UI", 9, "bold"), bg="#252525", fg="#888888").pack()
-        tk.Label(f_avail, text=fmt_time(available_min), font=("Consolas", 18, "bold"), bg="#252525", fg="#4CAF50").pack()
+        lbl_avail = tk.Label(f_avail, text="...", font=("Consolas", 18, "bold"), bg="#252525", fg="#4CAF50")
+        lbl_avail.pack()
         tk.Label(f_avail, text="Pode ser usado agora", font=("Segoe UI", 8), bg="#252525", fg="#555").pack()
 
+        # Próximas Liberações (por semana, 12 semanas)
+        cal_frame = tk.Frame(win, bg="#1E1E1E")
+        cal_frame.pack(fill=tk.X, padx=10)
+        tk.Label(cal_frame, text="PRÓXIMAS LIBERAÇÕES", font=("Segoe UI", 9, "bold"), bg="#1E1E1E", fg="#888888").pack(anchor="w")
+        weeks_row = tk.Frame(cal_frame, bg="#1E1E1E")
+        weeks_row.pack(fill=tk.X, pady=(2, 0))
+
+        def fill_calendar(upcoming):
+            for child in weeks_row.winfo_children(): child.destroy()
+            if not upcoming:
+                tk.Label(weeks_row, text="Nada desbloqueia nas próximas 12 semanas.", font=("Segoe UI", 8), bg="#1E1E1E", fg="#555").pack(anchor="w")
+            for week_start, minutes in upcoming[:6]:
+                cell = tk.Frame(weeks_row, bg="#252525", padx=8, pady=4)
+                cell.pack(side=tk.LEFT, padx=(0, 6))
+                tk.Label(cell, text=f"sem. {date.fromisoformat(week_start).strftime('%d/%m')}", font=("Segoe UI", 8), bg="#252525", fg="#888888").pack()
+                tk.Label(cell, text=f"+{fmt_time(minutes)}", font=("Consolas", 10, "bold"), bg="#252525", fg="#AAAAAA").pack()
+
         # 3. Tabela de Transações
         table_frame = ttk.Frame(win, padding=10)
         table_frame.pack(fill=tk.BOTH, expand=True)
@@ -652,66 +813,159 @@ class App:
         tree.column("Restante", width=80, anchor="center")
         tree.column("Status/Liberação", width=120, anchor="center")
 
-        # Scrollbar
-        sb = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
-        tree.configure(yscrollcommand=sb.set)
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        sb.pack(side=tk.RIGHT, fill=tk.Y)
-
         # Tags de Cor
         tree.tag_configure('available', foreground='#4CAF50') # Verde
         tree.tag_configure('locked', foreground='#AAAAAA')    # Cinza/Neutro
         tree.tag_configure('depleted', foreground='#444444')  # Escuro (Gasto)
 
-        # Popular Tabela
-        today_str = date.today().isoformat()
-        
-        for tx in history:
-            origin = tx.get('origin_date')
-            task = tx.get('task_source')
-            earned = tx.get('amount_earned')
-            remain = tx.get('amount_remaining')
-            unlock = tx.get('unlock_date')
-            
-            # Formata data para BR
-            try:
-                dt_obj = date.fromisoformat(origin)
-                origin_fmt = dt_obj.strftime("%d/%m/%y")
-                
-                ul_obj = date.fromisoformat(unlock)
-                unlock_fmt = ul_obj.strftime("%d/%m/%y")
-            except:
-                origin_fmt = origin
-                unlock_fmt = unlock
-
-            status_txt = unlock_fmt
-            tag = "locked"
-
-            if remain == 0:
-                tag = "depleted"
-                status_txt = "ESGOTADO"
-            elif unlock <= today_str:
-                tag = "available"
-                status_txt = "LIBERADO"
-            
-            # Se for locked, mostra data de liberação com ícone de cadeado
-            if tag == "locked":
-                status_txt = f"🔒 {unlock_fmt}"
+        # Extrato virtualizado: a primeira página vem junto com o cabeçalho; as seguintes
+        # são lidas no pool de I/O quando a rolagem se aproxima do fim do que foi carregado.
+        today_str = today.isoformat()
+        pager = {"loaded": 0, "total": 0, "loading": True, "gen": 0}
+        count_label = tk.Label(win, text="Carregando...", font=("Segoe UI", 8), bg="#1E1E1E", fg="#555")
+
+        def fetch_page(offset):
+            return [format_statement_row(tx, today_str) for tx in get_history(offset, STATEMENT_PAGE_SIZE)]
+
+        def insert_page(rows, gen):
+            # Página pedida antes do banco mudar (a tabela foi recomeçada): descarta
+            if gen != pager["gen"] or not win.winfo_exists(): return
+            pager["loading"] = False
+            for vals, tag in rows:
+                tree.insert("", tk.END, values=vals, tags=(tag,))
+            pager["loaded"] += len(rows)
+            if not rows: pager["loaded"] = pager["total"] # Ledger encolheu: nada mais a buscar
+            count_label.config(text=f"Mostrando {pager['loaded']} de {pager['total']} depósitos")
+
+        def load_next_page():
+            if pager["loading"] or pager["loaded"] >= pager["total"]: return
+            pager["loading"] = True
+            request_page(pager["loaded"])
+
+        def request_page(offset):
+            gen = pager["gen"]
+            self.io.submit(fetch_page, offset, on_done=lambda rows: insert_page(rows, gen),
+                           on_error=lambda e: insert_page([], gen))
+
+        def on_scroll(first, last):
+            sb.set(first, last)
+            if float(last) >= STATEMENT_PREFETCH_AT:
+                load_next_page()
+
+        # Scrollbar
+        sb = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=on_scroll)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        sb.pack(side=tk.RIGHT, fill=tk.Y)
 
-            vals = (origin_fmt, task, f"+{earned}min", f"{remain}min", status_txt)
-            tree.insert("", tk.END, values=vals, tags=(tag,))
+        shown = {"bank": None}
+        def on_bank(bank):
+            # Também chamado quando o banco muda com o extrato aberto (depósito, gasto, virada do dia)
+            if bank is None or bank is shown["bank"] or not win.winfo_exists(): return
+            shown["bank"] = bank
+            lbl_locked.config(text=fmt_time(bank['locked']))
+            lbl_avail.config(text=fmt_time(bank['available']))
+            fill_calendar(bank['upcoming'])
+            # Tabela recomeça da primeira página (os mais recentes podem ter mudado)
+            pager.update(loaded=0, total=bank['deposits'], loading=True, gen=pager["gen"] + 1)
+            tree.delete(*tree.get_children())
+            request_page(0)
+        self.store.when_ready("bank", on_bank)
+        self.store.subscribe("bank", on_bank, widget=win)
 
         # Botão Fechar
         tk.Button(win, text="FECHAR EXTRATO", font=("Segoe UI", 10), 
                   bg="#333333", fg="white", relief=tk.FLAT, command=win.destroy).pack(pady=10)
+        count_label.pack(before=table_frame, anchor="e", padx=10)
+
+    def open_proof_archive(self):
+        """Busca nas provas de todos os dias (proof_archive.py). A busca roda no pool de I/O."""
+        from proof_archive import search_proofs
+        win = tk.Toplevel(self.root)
+        win.title("Arquivo de Provas")
+        center_window(win, 700, 480)
+        win.transient(self.root)
+        win.grab_set()
+
+        frame = ttk.Frame(win, padding=10)
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        top = ttk.Frame(frame)
+        top.pack(fill=tk.X, pady=(0, 8))
+        ttk.Label(top, text="Buscar:").pack(side=tk.LEFT)
+        query_var = tk.StringVar()
+        entry = ttk.Entry(top, textvariable=query_var)
+        entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        status = ttk.Label(top, text="...", font=("Segoe UI", 8))
+        status.pack(side=tk.RIGHT)
+
+        # Detalhe da prova selecionada (texto completo ou caminho da imagem)
+        detail = tk.Text(frame, height=5, wrap=tk.WORD, state=tk.DISABLED)
+        detail.pack(side=tk.BOTTOM, fill=tk.X, pady=(8, 0))
+
+        tree = ttk.Treeview(frame, columns=("Data", "Tarefa", "Prova"), show="headings", selectmode="browse")
+        tree.heading("Data", text="Data")
+        tree.heading("Tarefa", text="Tarefa")
+        tree.heading("Prova", text="Prova")
+        tree.column("Data", width=80, anchor="center")
+        tree.column("Tarefa", width=170, anchor="w")
+        tree.column("Prova", width=400, anchor="w")
+        sb = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=sb.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        sb.pack(side=tk.RIGHT, fill=tk.Y)
+
+        records = {}
+        search = {"seq": 0, "after": None}
+
+        def show_results(result):
+            seq, found = result
+            # Resposta de uma busca antiga (o usuário continuou digitando): descarta
+            if seq != search["seq"] or not win.winfo_exists(): return
+            tree.delete(*tree.get_children())
+            records.clear()
+            for rec in found:
+                if rec.get('type') == "image":
+                    preview = f"🖼 {os.path.basename(rec.get('path') or '')}"
+                else:
+                    preview = " ".join((rec.get('text') or "").split())[:90]
+                iid = str(rec['id'])
+                records[iid] = rec
+                tree.insert("", tk.END, iid=iid, values=(format_br_date(rec['date']), rec.get('task_name') or "", preview))
+            status.config(text=f"{len(found)} prova(s)")
+
+        def run_search():
+            search["after"] = None
+            search["seq"] += 1
+            seq, query = search["seq"], query_var.get()
+            self.io.submit(lambda: (seq, search_proofs(query)), on_done=show_results)
+
+        def on_type(*_):
+            # Espera uma pausa na digitação antes de buscar
+            if search["after"]: win.after_cancel(search["after"])
+            search["after"] = win.after(150, run_search)
+
+        def on_select(_):
+            sel = tree.selection()
+            if not sel: return
+            rec = records[sel[0]]
+            body = rec.get('path') if rec.get('type') == "image" else rec.get('text')
+            detail.config(state=tk.NORMAL)
+            detail.delete("1.0", tk.END)
+            detail.insert("1.0", f"{rec.get('task_name') or ''} — {format_br_date(rec['date'])}\n\n{body or ''}")
+            detail.config(state=tk.DISABLED)
+
+        query_var.trace_add("write", on_type)
+        tree.bind("<<TreeviewSelect>>", on_select)
+        entry.focus_set()
+        run_search()
 
     def test_audio(self):
-        cfg = load_config_data()
-        if not cfg['rejections']: return
-        rej = self.tasks.get('rejections', ["Teste"])[0] if not cfg['rejections'] else cfg['rejections'][0]
+        settings = self.store.current("settings")
+        if not settings['rejections']: return
         set_system_volume(80)
         try:
-            tts = cfg.get('tts_speed', 2)
+            tts = settings['tts_speed']
             if IS_WINDOWS:
                 subprocess.run(['powershell', '-Command', f'Add-Type -AssemblyName System.Speech; $s=New-Object System.Speech.Synthesis.SpeechSynthesizer; $s.Rate={tts}; $s.Speak("Teste de áudio funcionando")'], creationflags=subprocess.CREATE_NO_WINDOW)
         except: pass
@@ -719,17 +973,26 @@ class App:
     def manage_list(self, title, key):
         win = tk.Toplevel(self.root); win.title(title); center_window(win, 400, 350)
         win.transient(self.root); win.grab_set()
-        cfg = load_config_data(); items = cfg.get(key, [])
+        items = []
         f = ttk.Frame(win, padding="10"); f.pack(fill=tk.BOTH, expand=True)
         lst = tk.Listbox(f); lst.pack(fill=tk.BOTH, expand=True)
-        for i in items: lst.insert(tk.END, i)
+        def fill(cfg):
+            if cfg is None or not lst.winfo_exists(): return
+            items[:] = list(cfg.get(key, [])) # Cópia: o config do store é compartilhado
+            lst.delete(0, tk.END)
+            for i in items: lst.insert(tk.END, i)
+        self.store.when_ready("config", fill)
         e = ttk.Entry(f); e.pack(fill=tk.X, pady=5)
         def add():
             v = e.get()
-            if v: items.append(v); lst.insert(tk.END, v); e.delete(0, tk.END); cfg[key]=items; save_config_data(cfg)
+            if v:
+                items.append(v); lst.insert(tk.END, v); e.delete(0, tk.END)
+                self.io.submit(update_config, lambda c: c.setdefault(key, []).append(v), f"list_add:{key}")
         def rem():
             s = lst.curselection()
-            if s: items.pop(s[0]); lst.delete(s[0]); cfg[key]=items; save_config_data(cfg)
+            if s:
+                v = items.pop(s[0]); lst.delete(s[0])
+                self.io.submit(update_config, lambda c: v in c.get(key, []) and c[key].remove(v), f"list_remove:{key}")
         ttk.Button(f, text="Adicionar", command=add).pack(fill=tk.X)
         ttk.Button(f, text="Remover", command=rem).pack(fill=tk.X)
 
@@ -757,20 +1020,16 @@ class App:
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
         def populate():
+            self.store.when_ready("tasks", fill)
+
+        def fill(tasks):
+            if tasks is None or not tree.winfo_exists(): return
             for item in tree.get_children(): tree.delete(item)
-            cfg = load_config_data()
-            dias_sem = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
-            
-            for tid, t in cfg.get('tasks', {}).items():
-                if t.get('status', 'em progresso') == 'em progresso':
-                    if t.get('schedule_type') == 'daily':
-                        sched = "Todos os dias"
-                    else:
-                        ds = t.get('schedule_days', [])
-                        sched = ", ".join([dias_sem[i] for i in ds]) if ds else "Personalizado"
-                    tree.insert("", tk.END, iid=tid, values=(t['name'], sched))
+            for tid, name, sched in tasks['active']:
+                tree.insert("", tk.END, iid=tid, values=(name, sched))
 
         populate()
+        self.store.subscribe("tasks", fill, widget=manager_win)
 
         btn_frame = ttk.Frame(manager_win, padding=(10, 10))
         btn_frame.pack(fill=tk.X)
@@ -815,13 +1074,16 @@ class App:
         scrol.pack(side=tk.RIGHT, fill=tk.Y)
 
         def populate_archived():
+            self.store.when_ready("tasks", fill_archived)
+
+        def fill_archived(tasks):
+            if tasks is None or not tree.winfo_exists(): return
             for item in tree.get_children(): tree.delete(item)
-            cfg = load_config_data()
-            for tid, t in cfg.get('tasks', {}).items():
-                if t.get('status') == 'encerrado':
-                    tree.insert("", tk.END, iid=tid, values=(t['name'],))
+            for tid, name in tasks['archived']:
+                tree.insert("", tk.END, iid=tid, values=(name,))
 
         populate_archived()
+        self.store.subscribe("tasks", fill_archived, widget=arch_win)
 
         btn_frame = ttk.Frame(arch_win, padding=10)
         btn_frame.pack(fill=tk.X)
@@ -835,25 +1097,37 @@ class App:
 
     def open_settings(self):
         win = tk.Toplevel(self.root); win.title("Config"); center_window(win, 300, 150)
-        cfg = load_config_data()
         ttk.Label(win, text="Velocidade Fala:").pack()
-        var = tk.IntVar(value=cfg.get('tts_speed', 2))
+        var = tk.IntVar(value=2)
         ttk.Spinbox(win, from_=-5, to=10, textvariable=var).pack()
-        def save(): cfg['tts_speed'] = var.get(); save_config_data(cfg); win.destroy()
-        ttk.Button(win, text="Salvar", command=save).pack(pady=10)
+        def save():
+            speed = var.get() # Lido aqui: o mutator roda numa thread de trabalho
+            btn.config(state=tk.DISABLED)
+            self.io.submit(update_config, lambda c: c.update(tts_speed=speed), "set_tts_speed",
+                           on_done=lambda saved: win.winfo_exists() and win.destroy())
+        btn = ttk.Button(win, text="Salvar", command=save, state=tk.DISABLED)
+        btn.pack(pady=10)
+        def on_loaded(settings):
+            if settings is None or not win.winfo_exists(): return
+            var.set(settings['tts_speed']); btn.config(state=tk.NORMAL)
+        self.store.when_ready("settings", on_loaded)
 
     def toggle_study_mode(self):
+        from state_service import set_study_mode
         s = self.study_mode_var.get()
-        self.config_data = load_config_data(); self.config_data['study_mode'] = s; save_config_data(self.config_data)
-        if s:
-            try:
-                p = os.path.join(os.path.dirname(os.path.abspath(__file__)), "study_mode.py")
-                if not os.path.exists(p): p = "study_mode.py"
-                subprocess.Popen(["pythonw", p]); self.quit_app()
-            except: self.study_mode_var.set(False)
+        def on_saved(_):
+            self.config_data['study_mode'] = s
+            if s:
+                try:
+                    p = os.path.join(os.path.dirname(os.path.abspath(__file__)), "study_mode.py")
+                    if not os.path.exists(p): p = "study_mode.py"
+                    subprocess.Popen(["pythonw", p]); self.quit_app()
+                except: self.study_mode_var.set(False)
+        # IPC com o Daemon (ou gravação no config): no pool de I/O
+        self.io.submit(set_study_mode, s, on_done=on_saved, on_error=lambda e: self.study_mode_var.set(not s))
 
     def setup_tray_icon(self):
-        if not pystray or not Image: return
+        if not load_tray_dependencies(): return
         im = Image.new('RGB', (64, 64), (0, 100, 200)); d = ImageDraw.Draw(im); d.text((10, 10), "IRS", fill="white")
         self.tray = pystray.Icon(APP_NAME, im, "IRS", (item('Abrir', self.show_window, default=True), item('Sair', self.quit_app)))
         threading.Thread(target=self.tray.run, daemon=True).start()
@@ -862,6 +1136,8 @@ class App:
     def show_window(self): self.root.deiconify(); self.root.attributes("-topmost", True); self.update_task_list(); self.root.after(100, lambda: self.root.attributes("-topmost", False))
     def quit_app(self):
         if hasattr(self, 'tray'): self.tray.stop()
+        log_event("ui_stall_summary", f"Interface: {self.stall_monitor.summary()}", category="system")
+        self.io.stop()
         self.root.quit(); sys.exit()
 
     def open_task_editor(self, parent, task_id=None, callback=None):
@@ -874,7 +1150,7 @@ class App:
         win.transient(parent)
         win.grab_set()
         
-        config = load_config_data()
+        config = self.store.current("config")
         task_data = config['tasks'].get(task_id, {}) if is_edit else {}
         
         frame = ttk.Frame(win, padding=15)
@@ -1016,13 +1292,21 @@ class App:
                 "fixed_start_time": fixed_time_var.get().strip()
             }
             
-            cfg = load_config_data()
-            cfg['tasks'][final_id] = new_data
-            save_config_data(cfg)
-            if callback: callback()
-            win.destroy()
+            def put_task(c): c.setdefault('tasks', {})[final_id] = new_data
+            def on_saved(saved):
+                if not win.winfo_exists(): return
+                if saved is None:
+                    save_btn.config(state=tk.NORMAL)
+                    messagebox.showerror("Erro", "Não foi possível salvar a tarefa. Tente novamente.", parent=win)
+                    return
+                if callback: callback()
+                win.destroy()
+            # Lock, journal e backup no pool de I/O; o botão fica travado até a gravação terminar
+            save_btn.config(state=tk.DISABLED)
+            self.io.submit(update_config, put_task, "edit_task", on_done=on_saved, on_error=lambda e: on_saved(None))
 
-        ttk.Button(frame, text="Salvar Alterações", command=pre_save_check).pack(fill=tk.X, pady=10)
+        save_btn = ttk.Button(frame, text="Salvar Alterações", command=pre_save_check)
+        save_btn.pack(fill=tk.X, pady=10)
         
     def check_dreamer_vs_doer(self, parent, val, unit):
         alert_win = tk.Toplevel(parent)
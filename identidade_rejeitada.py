@@ -1,14 +1,19 @@
 # main.py
+import time
+_T0 = time.perf_counter() # Referência do --profile-startup (tempo de Python, sem o boot do interpretador)
+
 import sys
 import os
-import winreg
-import subprocess
-import tkinter as tk
-from tkinter import messagebox
 from core import APP_NAME, IS_WINDOWS
+# winreg, subprocess e tkinter só são importados no modo que usa cada um
+
+PROFILE_FLAG = "--profile-startup"
+PROFILE_TARGETS = ("watchdog", "gui")
+PROFILE_BUDGET_MS = 100
 
 def setup_persistence():
     if not IS_WINDOWS: return True
+    import winreg
     try:
         script_dir = os.path.dirname(os.path.abspath(__file__))
         bat_daemon = os.path.join(script_dir, "IRS_background.bat")
@@ -37,6 +42,7 @@ def setup_scheduler_watchdog():
     logic.py a cada 5 minutos.
     """
     if not IS_WINDOWS: return
+    import subprocess
     try:
         script_dir = os.path.dirname(os.path.abspath(__file__))
         checker_script = os.path.join(script_dir, "logic.py")
@@ -55,17 +61,89 @@ def setup_scheduler_watchdog():
     except Exception as e:
         print(f"Erro ao configurar Agendador: {e}")
 
+def elapsed_ms():
+    return (time.perf_counter() - _T0) * 1000
+
+def profile_target(target):
+    """
+    Lado filho do --profile-startup: executa o caminho de inicialização do alvo
+    (sem efeitos colaterais: não inicia Daemon nem mainloop) e imprime os tempos.
+    """
+    marks = {}
+    if target == "watchdog":
+        import logic
+        marks["import"] = elapsed_ms()
+        if not logic.is_daemon_running():
+            logic.check_if_tasks_completed()
+        marks["decisão"] = elapsed_ms()
+    elif target == "gui":
+        import tkinter as tk
+        from gui import App
+        marks["import"] = elapsed_ms()
+        root = tk.Tk()
+        App(root)
+        root.update() # Primeira pintura
+        marks["primeira janela"] = elapsed_ms()
+        root.destroy()
+    print(" ".join(f"{k}={v:.1f}" for k, v in marks.items()))
+
+def parse_importtime(stderr, top=5):
+    """Top imports por tempo acumulado (saída do python -X importtime)."""
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit(): continue
+        rows.append((int(parts[1]), parts[2].rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+def run_startup_profile():
+    """
+    --profile-startup: mede cada ponto de entrada num interpretador novo
+    (imports frios) e compara com o orçamento de PROFILE_BUDGET_MS.
+    """
+    import subprocess
+    script = os.path.abspath(__file__)
+    print(f"Orçamento: {PROFILE_BUDGET_MS} ms de Python por ponto de entrada\n")
+    for target in PROFILE_TARGETS:
+        proc = subprocess.run([sys.executable, "-X", "importtime", script, f"{PROFILE_FLAG}={target}"],
+                              capture_output=True, text=True)
+        result = proc.stdout.strip().splitlines()[-1] if proc.stdout.strip() else "falhou"
+        print(f"[{target}] {result}")
+        if proc.returncode != 0:
+            print("   " + (proc.stderr.strip().splitlines() or ["?"])[-1])
+            continue
+        for cumulative_us, name in parse_importtime(proc.stderr):
+            print(f"   {cumulative_us / 1000:7.1f} ms  {name.strip()}")
+        print()
+
 if __name__ == "__main__":
-    if "--daemon" in sys.argv:
-        # Modo Invisível (Background)
+    profile_arg = next((a for a in sys.argv if a.startswith(PROFILE_FLAG)), None)
+    if profile_arg:
+        # Modo Diagnóstico: tempos de import e da primeira janela
+        if "=" in profile_arg: profile_target(profile_arg.split("=", 1)[1])
+        else: run_startup_profile()
+    elif "--supervisor" in sys.argv:
+        # Modo Supervisor (opcional): processo pai residente que reinicia o Daemon na hora
+        setup_scheduler_watchdog()
+        from logic import run_supervisor
+        run_supervisor()
+    elif "--daemon" in sys.argv and "--all-profiles" in sys.argv:
+        # Um processo atende todos os perfis (ver profiles.py)
+        from profiles import run_shared_daemon
+        run_shared_daemon(headless="--headless" in sys.argv)
+    elif "--daemon" in sys.argv:
+        # Modo Invisível (Background). --profile NOME escolhe o perfil (ver core.py)
         setup_scheduler_watchdog()
         from daemon import run_daemon_process
-        run_daemon_process()
+        # --headless: sem display, eventos só no terminal (ver notifiers.py)
+        sys.exit(run_daemon_process(headless="--headless" in sys.argv))
     else:
         # Modo Janela (Gerenciador)
         if setup_persistence():
             setup_scheduler_watchdog()
             
+            import tkinter as tk
             from gui import App
             root = tk.Tk()
             app = App(root)
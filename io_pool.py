@@ -0,0 +1,122 @@
+# io_pool.py
+"""
+POOL DE I/O DA INTERFACE
+- Leitura/gravação de config, banco e provas saem da thread do Tk.
+- IOPool: poucas threads de trabalho executam as funções; os resultados voltam
+  para a thread do Tk por root.after() e os callbacks rodam lá (pode mexer em widget).
+- A entrega é fatiada: cada volta do after() roda callbacks até estourar o
+  orçamento (DELIVERY_BUDGET_MS) e deixa o resto para a próxima volta.
+- StallMonitor: mede quanto o loop do Tk atrasou (um after() periódico que
+  deveria rodar a cada INTERVAL ms). O pior atraso e a contagem de travadas
+  viram um número comparável entre versões.
+"""
+import time
+import queue
+import threading
+
+from core import log_event
+
+IO_WORKERS = 2
+DELIVERY_POLL_MS = 15 # Intervalo de checagem de resultados enquanto há trabalho pendente
+DELIVERY_BUDGET_MS = 8 # Tempo máximo de callbacks por volta do loop do Tk
+
+STALL_INTERVAL_MS = 50
+STALL_THRESHOLD_MS = 100 # Atraso acima disto conta como travada
+STALL_LOG_MS = 1000 # Travadas acima disto vão para o log
+
+class IOPool:
+    """
+    pool.submit(func, *args, on_done=cb, on_error=cb_erro)
+    'func' roda numa thread de trabalho; 'on_done(resultado)' ou 'on_error(exceção)'
+    rodam na thread do Tk. submit() deve ser chamado da thread do Tk.
+    """
+    def __init__(self, root, workers=IO_WORKERS):
+        self.root = root
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.pending = 0 # Jobs enviados e ainda não entregues (só a thread do Tk mexe)
+        self.polling = False
+        self.running = True
+        self.threads = []
+        for i in range(workers):
+            t = threading.Thread(target=self.worker, name=f"io-{i}", daemon=True)
+            t.start()
+            self.threads.append(t)
+
+    def worker(self):
+        while self.running:
+            job = self.jobs.get()
+            if job is None: break
+            func, args, kwargs, on_done, on_error = job
+            try:
+                self.results.put((on_done, func(*args, **kwargs), None))
+            except Exception as e:
+                log_event("io_error", f"Erro no pool de I/O ({getattr(func, '__name__', func)}): {e}", category="system")
+                self.results.put((on_error, None, e))
+
+    def submit(self, func, *args, on_done=None, on_error=None, **kwargs):
+        self.pending += 1
+        self.jobs.put((func, args, kwargs, on_done, on_error))
+        self.schedule()
+
+    def schedule(self, delay=DELIVERY_POLL_MS):
+        """Agenda uma entrega se nenhuma estiver agendada."""
+        if self.polling: return
+        self.polling = True
+        self.root.after(delay, self.deliver)
+
+    def deliver(self):
+        """Roda na thread do Tk: entrega resultados até o orçamento da volta acabar."""
+        # Reentrante: um callback pode abrir um loop aninhado (janela modal, wait_window).
+        # Com 'polling' já solto e a próxima entrega agendada antes do callback, os
+        # resultados de submit() feitos dentro desse loop chegam sem esperar ele acabar.
+        self.polling = False
+        deadline = time.perf_counter() + DELIVERY_BUDGET_MS / 1000
+        while time.perf_counter() < deadline:
+            try: callback, result, error = self.results.get_nowait()
+            except queue.Empty: break
+            self.pending -= 1
+            if callback is None: continue
+            if self.pending > 0 and self.running: self.schedule()
+            try:
+                callback(error if error is not None else result)
+            except Exception as e:
+                # Janela fechada antes do resultado chegar, por exemplo
+                log_event("io_callback_error", f"Erro ao entregar resultado: {e}", category="system")
+
+        if self.pending > 0 and self.running:
+            # Sobrou resultado pronto: volta logo; senão espera o próximo ficar pronto
+            self.schedule(1 if not self.results.empty() else DELIVERY_POLL_MS)
+
+    def stop(self):
+        self.running = False
+        for _ in self.threads: self.jobs.put(None)
+
+class StallMonitor:
+    """Atraso do loop do Tk: pior caso, travadas acima do limite e total de amostras."""
+    def __init__(self, root, interval_ms=STALL_INTERVAL_MS, threshold_ms=STALL_THRESHOLD_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.threshold_ms = threshold_ms
+        self.max_stall_ms = 0.0
+        self.stalls = 0
+        self.samples = 0
+        self.expected = None
+
+    def start(self):
+        self.expected = time.perf_counter() + self.interval_ms / 1000
+        self.root.after(self.interval_ms, self.tick)
+
+    def tick(self):
+        now = time.perf_counter()
+        stall_ms = max(0.0, (now - self.expected) * 1000)
+        self.samples += 1
+        if stall_ms > self.max_stall_ms: self.max_stall_ms = stall_ms
+        if stall_ms > self.threshold_ms: self.stalls += 1
+        if stall_ms > STALL_LOG_MS:
+            log_event("ui_stall", f"Interface travou {stall_ms:.0f}ms.", category="system")
+        self.expected = now + self.interval_ms / 1000
+        self.root.after(self.interval_ms, self.tick)
+
+    def summary(self):
+        return f"pior atraso {self.max_stall_ms:.0f}ms, {self.stalls} travada(s) > {self.threshold_ms}ms em {self.samples} amostras"
@@ -0,0 +1,242 @@
+# liveness.py
+"""
+VIDA DO DAEMON (PID FILE + HEARTBEAT)
+- O Daemon segura um lock exclusivo no daemon.pid enquanto estiver vivo.
+  O sistema operacional solta o lock sozinho quando o processo morre.
+- A cada volta do loop, o Daemon grava um registro binário pequeno (pid, início,
+  último tick, estado do loop) num arquivo mapeado em memória (daemon.heartbeat).
+- O Watchdog só lê esse registro: microssegundos, sem wmic, funciona no Linux.
+- Fallback no Linux: /proc/<pid>/cmdline.
+"""
+import os
+import sys
+import time
+import mmap
+import struct
+
+from core import APP_DATA_DIR, IS_WINDOWS, IS_LINUX, ensure_app_dirs, paths, DEFAULT_PROFILE
+
+if IS_WINDOWS:
+    import msvcrt
+    fcntl = None
+else:
+    import fcntl
+    msvcrt = None
+
+PID_FILE = os.path.join(APP_DATA_DIR, "daemon.pid")
+SUPERVISOR_PID_FILE = os.path.join(APP_DATA_DIR, "supervisor.pid")
+HEARTBEAT_FILE = os.path.join(APP_DATA_DIR, "daemon.heartbeat")
+
+# magic | seq | pid | start_ts | last_tick_ts | ticks | estado
+HEARTBEAT_FORMAT = "<8sQIddQ16s"
+HEARTBEAT_SIZE = struct.calcsize(HEARTBEAT_FORMAT)
+HEARTBEAT_MAGIC = b"IRSHB001"
+HEARTBEAT_STALE = 120 # Segundos sem tick até o registro ser considerado velho
+
+DAEMON_SCRIPT = "identidade_rejeitada.py"
+DAEMON_FLAG = "--daemon"
+SHARED_FLAG = "--all-profiles" # Daemon compartilhado: serve todos os perfis
+EXIT_LOCK_BUSY = 75 # Código de saída do Daemon que achou o PID file preso (outro Daemon já roda)
+
+def pid_file():
+    """PID file do perfil ativo (o Daemon compartilhado tem um por perfil)."""
+    return os.path.join(paths().app_data_dir, "daemon.pid")
+
+def heartbeat_file():
+    return os.path.join(paths().app_data_dir, "daemon.heartbeat")
+
+# --- LOCK DO PID FILE ---
+
+def _try_lock(f):
+    """Tenta o lock exclusivo sem bloquear. Retorna True se conseguiu."""
+    try:
+        if IS_WINDOWS:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+def _unlock(f):
+    try:
+        if IS_WINDOWS:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    except: pass
+
+def _open_pid_file(path):
+    # 'a+' cria se não existir e não trunca: o conteúdo só é reescrito depois do lock
+    return open(path, 'a+')
+
+class PidLock:
+    """Lock de instância única (Daemon ou Supervisor). Manter o objeto vivo = manter o lock."""
+    def __init__(self, path=None):
+        self.path = path or pid_file()
+        self.handle = None
+
+    def acquire(self):
+        ensure_app_dirs()
+        try:
+            f = _open_pid_file(self.path)
+        except OSError:
+            return False
+        if not _try_lock(f):
+            f.close()
+            return False
+        self.handle = f
+        try:
+            if not IS_WINDOWS: # No Windows o byte travado não pode ser reescrito
+                f.seek(0); f.truncate()
+                f.write(str(os.getpid())); f.flush()
+        except: pass
+        return True
+
+    def release(self):
+        if not self.handle: return
+        _unlock(self.handle)
+        try: self.handle.close()
+        except: pass
+        self.handle = None
+
+def is_pid_lock_held(path=None):
+    """True se algum processo (o Daemon) está segurando o lock do PID file."""
+    path = path or pid_file()
+    if not os.path.exists(path):
+        return False
+    try:
+        f = _open_pid_file(path)
+    except OSError:
+        return False
+    try:
+        if _try_lock(f):
+            _unlock(f)
+            return False
+        return True
+    finally:
+        f.close()
+
+# --- HEARTBEAT ---
+
+class Heartbeat:
+    """Lado do Daemon: registro fixo em arquivo mapeado, atualizado a cada tick."""
+    def __init__(self):
+        self.pid = os.getpid()
+        self.start_ts = time.time()
+        self.seq = 0
+        self.ticks = 0
+        ensure_app_dirs()
+        self.file = open(heartbeat_file(), 'a+b')
+        self.file.truncate(HEARTBEAT_SIZE)
+        self.map = mmap.mmap(self.file.fileno(), HEARTBEAT_SIZE)
+        self.tick("starting")
+
+    def _write(self, state):
+        # Seqlock: seq ímpar = escrita em andamento. O leitor descarta leituras rasgadas.
+        self.seq += 1
+        struct.pack_into("<Q", self.map, 8, self.seq)
+        self.seq += 1
+        struct.pack_into(HEARTBEAT_FORMAT, self.map, 0, HEARTBEAT_MAGIC, self.seq, self.pid,
+                         self.start_ts, time.time(), self.ticks, state.encode('ascii', 'ignore')[:16])
+
+    def tick(self, state="running"):
+        self.ticks += 1
+        try: self._write(state)
+        except: pass
+
+    def close(self, state="stopped"):
+        try:
+            self._write(state)
+            self.map.close()
+            self.file.close()
+        except: pass
+
+def read_heartbeat():
+    """
+    Lado do Watchdog. Retorna dict com pid, start_ts, last_tick, age, ticks e state,
+    ou None se não houver registro válido.
+    """
+    try:
+        with open(heartbeat_file(), 'rb') as f:
+            with mmap.mmap(f.fileno(), HEARTBEAT_SIZE, access=mmap.ACCESS_READ) as m:
+                for _ in range(3):
+                    magic, seq, pid, start_ts, last_tick, ticks, state = struct.unpack_from(HEARTBEAT_FORMAT, m, 0)
+                    if seq % 2 == 0 and struct.unpack_from("<Q", m, 8)[0] == seq:
+                        break
+                else:
+                    return None
+    except (OSError, ValueError, struct.error):
+        return None
+    if magic != HEARTBEAT_MAGIC:
+        return None
+    return {
+        "pid": pid,
+        "start_ts": start_ts,
+        "last_tick": last_tick,
+        "age": time.time() - last_tick,
+        "ticks": ticks,
+        "state": state.rstrip(b"\0").decode('ascii', 'ignore')
+    }
+
+# --- FALLBACK /proc (Linux) ---
+
+def _is_daemon_cmdline(pid):
+    try:
+        with open(f"/proc/{pid}/cmdline", 'rb') as f:
+            args = f.read().decode(errors='ignore').split("\0")
+    except OSError:
+        return False
+    if DAEMON_FLAG not in args or not any(a.endswith(DAEMON_SCRIPT) for a in args):
+        return False
+    if SHARED_FLAG in args: return True
+    # Daemon de um perfil só: precisa ser o perfil ativo
+    profile = DEFAULT_PROFILE
+    for i, a in enumerate(args):
+        if a == "--profile" and i + 1 < len(args): profile = args[i+1]
+        elif a.startswith("--profile="): profile = a.split("=", 1)[1]
+    return profile == paths().name
+
+def scan_proc_for_daemon():
+    """Procura o Daemon em /proc. Retorna o pid ou None."""
+    if not IS_LINUX or not os.path.isdir("/proc"):
+        return None
+    me = os.getpid()
+    for entry in os.listdir("/proc"):
+        if entry.isdigit() and int(entry) != me and _is_daemon_cmdline(entry):
+            return int(entry)
+    return None
+
+# --- API DO WATCHDOG ---
+
+def is_daemon_alive(max_age=HEARTBEAT_STALE):
+    """
+    Decide se o Daemon está vivo, do mais barato para o mais caro:
+    1. Heartbeat recente (leitura de ~50 bytes) + o pid em /proc (só Linux).
+    2. Lock do PID file ocupado (processo existe, loop pode estar travado num popup).
+       Fora do Linux o heartbeat sozinho não basta: um Daemon morto deixa o último
+       tick por até HEARTBEAT_STALE segundos, e só o lock (solto pelo SO) confirma.
+    3. /proc no Linux (Daemon antigo sem heartbeat, ou arquivos apagados).
+    """
+    hb = read_heartbeat()
+    if hb and hb["state"] != "stopped" and hb["age"] < max_age:
+        if IS_LINUX and os.path.exists(f"/proc/{hb['pid']}"):
+            return True
+
+    if is_pid_lock_held():
+        return True
+
+    if hb and IS_LINUX and _is_daemon_cmdline(hb["pid"]):
+        return True
+    return scan_proc_for_daemon() is not None
+
+if __name__ == "__main__":
+    # Diagnóstico rápido: python liveness.py
+    start = time.perf_counter()
+    alive = is_daemon_alive()
+    elapsed = (time.perf_counter() - start) * 1e6
+    print(f"Daemon vivo: {alive} ({elapsed:.0f} µs)")
+    print(f"Heartbeat: {read_heartbeat()}")
+    sys.exit(0 if alive else 1)
@@ -9,7 +9,7 @@ from datetime import date
 try:
     from core import (
         log_event, SECURITY_LOG_FILE, get_tasks_for_today, 
-        verify_and_get_date
+        verify_and_get_date, security_event_today, current_profile, DEFAULT_PROFILE
     )
 except ImportError:
     # Fallback de segurança
@@ -17,12 +17,28 @@ except ImportError:
     SECURITY_LOG_FILE = "config/logs/security_log.json"
     def get_tasks_for_today(): return {}
     def verify_and_get_date(d): return d
+    security_event_today = None
+    def current_profile(): return "default"
+    DEFAULT_PROFILE = "default"
+
+try:
+    from liveness import is_daemon_alive, PidLock, SUPERVISOR_PID_FILE, EXIT_LOCK_BUSY
+except ImportError:
+    is_daemon_alive = None
+    PidLock = None
+    EXIT_LOCK_BUSY = 75
 
 # Configuração
 SCRIPT_NAME = "identidade_rejeitada.py" 
 DAEMON_FLAG = "--daemon"
 LOG_FILE = SECURITY_LOG_FILE
 
+# Supervisor residente
+BACKOFF_MIN = 2          # Segundos antes do primeiro restart
+BACKOFF_MAX = 300        # Teto do backoff (igual ao intervalo do schtasks)
+BACKOFF_RESET_AFTER = 600 # Se o filho viveu mais que isso, o backoff volta ao mínimo
+IDLE_CHECK_INTERVAL = 60 # Sem filho para vigiar (tarefas feitas / Daemon externo)
+
 def get_daemon_path():
     try:
         base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -31,7 +47,18 @@ def get_daemon_path():
     return os.path.join(base_dir, SCRIPT_NAME)
 
 def is_daemon_running():
-    """Verifica se o daemon já está rodando."""
+    """
+    Verifica se o daemon já está rodando.
+    Lê o heartbeat/PID file do Daemon (microssegundos). O wmic só sobra como
+    último recurso se o módulo de liveness não puder ser carregado.
+    """
+    if is_daemon_alive is not None:
+        try: return is_daemon_alive()
+        except: pass
+    return is_daemon_running_wmic()
+
+def is_daemon_running_wmic():
+    """Método antigo: varre as linhas de comando (lento, só Windows)."""
     cmd = 'wmic process get commandline'
     try:
         output = subprocess.check_output(cmd, shell=True).decode(errors='ignore')
@@ -41,13 +68,17 @@ def is_daemon_running():
         pass
     return False
 
-def resurrect_daemon():
+def resurrect_daemon(python=None):
+    """Inicia o Daemon e retorna o Popen (o Supervisor usa para esperar o filho)."""
     script_path = get_daemon_path()
+    args = [script_path, DAEMON_FLAG]
+    if current_profile() != DEFAULT_PROFILE:
+        args += ["--profile", current_profile()] # Aparece no cmdline (fallback /proc do liveness)
     if os.name == 'nt':
-        subprocess.Popen(["pythonw", script_path, DAEMON_FLAG], 
-                         creationflags=subprocess.CREATE_NO_WINDOW | 0x00000008)
+        return subprocess.Popen([python or "pythonw"] + args, 
+                                creationflags=subprocess.CREATE_NO_WINDOW | 0x00000008)
     else:
-        subprocess.Popen(["python", script_path, DAEMON_FLAG])
+        return subprocess.Popen([python or "python"] + args)
 
 def check_if_tasks_completed():
     """
@@ -73,7 +104,11 @@ def has_daemon_started_today():
     """
     Verifica no log se existe um evento 'system_start' com a data de hoje.
     Retorna True se o Daemon já rodou pelo menos uma vez hoje.
+    Usa o índice do dia (sem parsear o log inteiro) quando disponível.
     """
+    if security_event_today is not None:
+        try: return security_event_today("system_start") is not None
+        except: pass
     try:
         if not os.path.exists(LOG_FILE): return False
         
@@ -89,31 +124,96 @@ def has_daemon_started_today():
         pass
     return False
 
-if __name__ == "__main__":
-    if not is_daemon_running():
-        
-        # --- INTELIGÊNCIA ---
-        
-        # 1. Se já acabou tudo por hoje, deixa o usuário em paz.
-        if check_if_tasks_completed():
-            sys.exit()
+def log_start_reason():
+    """
+    Registra POR QUE o Daemon está sendo iniciado:
+    já rodou hoje e sumiu = sabotagem; ainda não rodou hoje = boot.
+    """
+    if has_daemon_started_today():
+        # CENÁRIO: SABOTAGEM
+        # O Daemon já tinha iniciado hoje, e agora sumiu. O usuário matou.
+        try:
+            log_event("DAEMON_DEAD", "ALERTA: Daemon iniciado hoje mas processo sumiu (Sabotagem).", category="security")
+        except: pass
+    else:
+        # CENÁRIO: BOOT / LOGIN
+        # O Daemon ainda não registrou presença hoje. Provavelmente o PC acabou de ligar.
+        # Apenas ressuscita (inicia) sem gerar log de morte.
+        log_event("WATCHDOG_SYSTEM", "Primeiro boot do dia ou delay de registro. Iniciando silenciosamente.", category="security")
 
-        # 2. Se as tarefas NÃO estão feitas, precisamos saber se é Boot ou Sabotagem.
-        started_today = has_daemon_started_today()
-        
-        if started_today:
-            # CENÁRIO: SABOTAGEM
-            # O Daemon já tinha iniciado hoje, e agora sumiu. O usuário matou.
+def run_watchdog_once():
+    """Modo agendado (schtasks a cada 5 min): verifica uma vez e sai."""
+    if is_daemon_running(): return # Se já estiver rodando, tudo ok.
+
+    # 1. Se já acabou tudo por hoje, deixa o usuário em paz.
+    if check_if_tasks_completed(): return
+
+    # 2. Se as tarefas NÃO estão feitas, precisamos saber se é Boot ou Sabotagem.
+    log_start_reason()
+    resurrect_daemon()
+
+def run_supervisor():
+    """
+    Modo residente: este processo é o pai do Daemon.
+    Popen.wait() (waitpid) acorda no instante em que o filho morre, sem esperar
+    os 5 minutos do schtasks. Restarts seguidos usam backoff exponencial.
+    """
+    supervisor_lock = PidLock(SUPERVISOR_PID_FILE) if PidLock else None
+    if supervisor_lock and not supervisor_lock.acquire():
+        print("Supervisor já está rodando.")
+        return
+
+    log_event("supervisor_start", "Supervisor residente iniciado.", category="system")
+    backoff = BACKOFF_MIN
+    python = sys.executable.replace("python.exe", "pythonw.exe") if os.name == 'nt' else sys.executable
+    log_reason = True
+    death_logged = False # DAEMON_DEAD do último filho já gravado: o restart não registra outra morte
+
+    try:
+        while True:
+            # Daemon iniciado por fora (autostart/schtasks): não cria outro, só observa
+            if is_daemon_running() or check_if_tasks_completed():
+                if not death_logged: log_reason = True
+                time.sleep(IDLE_CHECK_INTERVAL)
+                continue
+
+            if log_reason: log_start_reason()
+            child = resurrect_daemon(python)
+            death_logged = False
+            started = time.time()
+            exit_code = child.wait()
+            uptime = time.time() - started
+
+            if uptime > BACKOFF_RESET_AFTER:
+                backoff = BACKOFF_MIN
+
+            if check_if_tasks_completed():
+                log_event("daemon_exit", f"Daemon encerrou (código {exit_code}) com as tarefas do dia concluídas.", category="system")
+                log_reason = True
+                continue
+
+            if exit_code == EXIT_LOCK_BUSY:
+                # Outro Daemon já atende o perfil: saída normal, passa a só observar
+                log_event("daemon_exit", "Daemon saiu: outro processo já segura o PID file.", category="system")
+                log_reason = True
+                time.sleep(IDLE_CHECK_INTERVAL)
+                continue
+
+            # Morte detectada na hora: registra já, sem esperar o backoff
             try:
-                log_event("DAEMON_DEAD", "ALERTA: Daemon iniciado hoje mas processo sumiu (Sabotagem).", category="security")
+                log_event("DAEMON_DEAD", f"ALERTA: Processo do Daemon terminou (código {exit_code}) após {uptime:.0f}s. Reiniciando em {backoff}s.", category="security")
             except: pass
-            resurrect_daemon()
-            
-        else:
-            # CENÁRIO: BOOT / LOGIN
-            # O Daemon ainda não registrou presença hoje. Provavelmente o PC acabou de ligar.
-            # Apenas ressuscita (inicia) sem gerar log de morte.
-            log_event("WATCHDOG_SYSTEM", "Primeiro boot do dia ou delay de registro. Iniciando silenciosamente.", category="security")
-            resurrect_daemon()
-
-    # Se já estiver rodando, tudo ok.
\ No newline at end of file
+            log_reason = False
+            death_logged = True
+            time.sleep(backoff)
+            backoff = min(backoff * 2, BACKOFF_MAX)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if supervisor_lock: supervisor_lock.release()
+
+if __name__ == "__main__":
+    if "--supervisor" in sys.argv:
+        run_supervisor()
+    else:
+        run_watchdog_once()
\ No newline at end of file
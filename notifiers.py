@@ -0,0 +1,190 @@
+# notifiers.py
+"""
+NOTIFICADORES (BACKENDS DE INTERFACE DO DAEMON)
+- Tudo que o Daemon mostra ao usuário passa por um Notifier.
+- TkNotifier: as janelas de sempre (rejeições, checkpoint, sabotagem, alerta amarelo).
+- LogNotifier: só terminal, sem display (servidores, testes de carga).
+- RecordingNotifier: guarda os eventos em memória (benchmarks e simulações longas).
+- A lógica de agendamento, economia e cobrança do Daemon é a mesma em todos.
+"""
+import os
+import sys
+import time
+import random
+import threading
+from collections import deque, Counter
+from datetime import datetime
+
+from core import IS_WINDOWS, log_event
+
+SHUTDOWN_DELAY_RANGE = (120, 900) # Segundos entre o alerta amarelo e o desligamento
+
+class Notifier:
+    """Interface + regras comuns (alerta de horário fixo e agendamento do desligamento)."""
+    name = "base"
+    audio = False # Voz e volume do sistema
+
+    def __init__(self):
+        self.alert_task = None # (nome, horário) do alerta de horário fixo ativo
+        self.shutdown_time = None
+        self.stop_event = threading.Event()
+
+    # --- Telas (cada backend implementa) ---
+
+    def show_rejection(self, text, is_severe=False): pass
+    def show_focus_check(self): pass  # Bloqueia até a decisão do usuário
+    def show_punishment(self): pass   # Bloqueia até o usuário reconhecer
+    def _show_fixed_alert(self, task_name, task_time): pass
+    def _hide_fixed_alert(self): pass
+    def power_off(self, reason): pass
+
+    # --- Alerta de horário fixo ---
+
+    def show_fixed_alert(self, task_name, task_time):
+        if self.alert_task: return
+        self.alert_task = (task_name, task_time)
+        self._show_fixed_alert(task_name, task_time)
+
+    def hide_fixed_alert(self):
+        if not self.alert_task: return
+        self.alert_task = None
+        self.shutdown_time = None
+        self._hide_fixed_alert()
+
+    def fixed_alert_visible(self):
+        return self.alert_task is not None
+
+    def check_shutdown(self):
+        """Com o alerta ativo, sorteia a hora do desligamento e executa quando ela passar."""
+        if not self.alert_task: return
+
+        if self.shutdown_time is None:
+            self.shutdown_time = time.time() + random.randint(*SHUTDOWN_DELAY_RANGE)
+            print(f"DESLIGAMENTO AGENDADO PARA: {datetime.fromtimestamp(self.shutdown_time)}")
+
+        if time.time() > self.shutdown_time:
+            log_event("system_shutdown", f"Usuário ignorou horário fixo da tarefa: {self.alert_task[0]}", category="security")
+            self.power_off(f"horário fixo ignorado: {self.alert_task[0]}")
+
+    # --- Loop principal ---
+
+    def run(self):
+        """Segura a thread principal até stop()."""
+        while not self.stop_event.wait(1): pass
+
+    def stop(self):
+        self.stop_event.set()
+
+class TkNotifier(Notifier):
+    """Backend padrão: janelas Tk do daemon.py."""
+    name = "tk"
+    audio = True
+
+    def __init__(self, root=None):
+        """'root': reaproveita o Tk de outro TkNotifier (Daemon de vários perfis)."""
+        super().__init__()
+        from daemon import YellowAlertManager, get_popup_pool
+        if root is None:
+            import tkinter as tk
+            root = tk.Tk()
+            root.withdraw()
+        self.root = root
+        get_popup_pool(self.root) # Pré-constrói as janelas de rejeição
+        self.yellow = YellowAlertManager(self.root)
+
+    def show_rejection(self, text, is_severe=False):
+        from daemon import show_standalone_popup
+        self.root.after(0, lambda: show_standalone_popup(self.root, text, is_severe))
+
+    def show_focus_check(self):
+        from daemon import FocusCheckSession
+        FocusCheckSession.show_check(self.root)
+
+    def show_punishment(self):
+        from daemon import PsychologicalSession
+        PsychologicalSession.show_punishment(self.root)
+
+    def _show_fixed_alert(self, task_name, task_time):
+        self.root.after(0, lambda: self.yellow.show(task_name, task_time))
+
+    def _hide_fixed_alert(self):
+        self.root.after(0, self.yellow.hide)
+
+    def power_off(self, reason):
+        if IS_WINDOWS:
+            os.system("shutdown /s /t 0")
+        else:
+            os.system("shutdown -h now")
+
+    def run(self):
+        self.root.mainloop()
+
+    def stop(self):
+        super().stop()
+        try: self.root.after(0, self.root.quit)
+        except: pass
+
+class LogNotifier(Notifier):
+    """Headless: escreve no terminal o que seria mostrado. Nunca desliga a máquina."""
+    name = "log"
+
+    def __init__(self, stream=None, label=None):
+        super().__init__()
+        self.stream = stream or sys.stdout
+        self.prefix = f"[{label}] " if label else "" # Nome do perfil no Daemon compartilhado
+
+    def emit(self, kind, message):
+        try:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {self.prefix}{kind.upper()}: {message}", file=self.stream, flush=True)
+        except: pass
+
+    def show_rejection(self, text, is_severe=False):
+        self.emit("rejeição severa" if is_severe else "rejeição", text)
+
+    def show_focus_check(self):
+        self.emit("checkpoint", "Checkpoint de Consciência (headless: segue direto).")
+
+    def show_punishment(self):
+        self.emit("sabotagem", "Revisão de DAEMON_DEAD pendente.")
+
+    def _show_fixed_alert(self, task_name, task_time):
+        self.emit("horário fixo", f"{task_name} ({task_time}) atrasada.")
+
+    def _hide_fixed_alert(self):
+        self.emit("horário fixo", "Alerta encerrado.")
+
+    def power_off(self, reason):
+        self.emit("desligamento", f"Simulado ({reason}).")
+
+class RecordingNotifier(Notifier):
+    """
+    Headless em memória: conta tudo e guarda só os últimos 'max_events'.
+    Memória constante mesmo em simulações de meses.
+    """
+    name = "memory"
+
+    def __init__(self, max_events=1000):
+        super().__init__()
+        self.events = deque(maxlen=max_events)
+        self.counts = Counter()
+
+    def record(self, kind, *payload):
+        self.counts[kind] += 1
+        self.events.append((time.time(), kind) + payload)
+
+    def show_rejection(self, text, is_severe=False): self.record("rejection", text, is_severe)
+    def show_focus_check(self): self.record("focus_check")
+    def show_punishment(self): self.record("punishment")
+    def _show_fixed_alert(self, task_name, task_time): self.record("fixed_alert", task_name, task_time)
+    def _hide_fixed_alert(self): self.record("fixed_alert_hidden")
+    def power_off(self, reason): self.record("power_off", reason)
+
+NOTIFIERS = {
+    "tk": TkNotifier,
+    "log": LogNotifier,
+    "memory": RecordingNotifier,
+}
+
+def create_notifier(kind="tk"):
+    """Instancia o backend pelo nome ('tk', 'log' ou 'memory')."""
+    return NOTIFIERS.get(kind, LogNotifier)()
@@ -0,0 +1,226 @@
+# profiles.py
+"""
+DAEMON COMPARTILHADO (VÁRIOS PERFIS NUM PROCESSO SÓ)
+- Cada perfil tem config, logs, banco e provas próprios (core.use_profile).
+- Um único agendador decide qual perfil roda a próxima volta do loop:
+  uma fila por horário de acordar, uma thread para todos os perfis.
+- Por perfil ficam só o estado dele (config em memória, DayState, notificador,
+  PID file, heartbeat e o endpoint de IPC). Interpretador, módulos, Tk e o pool
+  de popups são compartilhados.
+- Manutenção (snapshot, auditorias, compactação) roda perfil por perfil numa
+  única thread de fundo.
+- A sequência de rejeição (voz e popups, segundos a minutos) não roda na thread
+  do agendador: vai para uma thread própria e os outros perfis continuam com
+  tick, heartbeat e checagem de horário. As sequências tocam uma de cada vez
+  (mesma voz e mesmo Tk); o perfil só volta à fila quando a dele termina.
+  O resto de step() continua na thread única: um popup modal ou I/O travado
+  fora da sequência ainda segura todos os perfis.
+"""
+import time
+import heapq
+import threading
+
+from core import log_event, use_profile, list_profiles
+from liveness import PidLock, Heartbeat
+from notifiers import LogNotifier, TkNotifier
+
+class ProfileWake:
+    """
+    Substitui o threading.Event 'state_changed' de cada sistema:
+    set() põe o perfil na frente da fila do agendador.
+    """
+    def __init__(self, scheduler, name):
+        self.scheduler = scheduler
+        self.name = name
+
+    def set(self): self.scheduler.wake(self.name)
+    def clear(self): pass
+    def is_set(self): return False
+    def wait(self, timeout=None):
+        time.sleep(timeout or 0)
+        return False
+
+class ProfileScheduler:
+    """Fila (horário, perfil) + uma thread que executa IdentityRejectionSystem.step()."""
+    def __init__(self):
+        self.systems = {}
+        self.heap = []
+        self.due = {} # Perfil -> horário válido na fila (entradas antigas são descartadas)
+        self.cond = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.current = None
+        self.steps = 0
+        self.busy = set() # Perfis com sequência longa em andamento (fora da fila até ela terminar)
+        self.long_lock = threading.Lock() # Uma sequência por vez: voz e Tk são compartilhados
+
+    def add(self, system):
+        system.state_changed = ProfileWake(self, system.profile)
+        system.run_long = lambda func, name=system.profile: self.run_long(name, func)
+        self.systems[system.profile] = system
+        self.wake(system.profile)
+
+    def run_long(self, name, func):
+        """Roda 'func' (sequência de rejeição) numa thread própria, no perfil; no fim, acorda o perfil."""
+        with self.cond:
+            self.busy.add(name)
+        def runner():
+            try:
+                with self.long_lock, use_profile(name):
+                    func()
+            except Exception as e:
+                log_event("rejection_loop_error", f"Erro na sequência de '{name}': {e}", category="system")
+            finally:
+                with self.cond:
+                    self.busy.discard(name)
+                self.wake(name)
+        threading.Thread(target=runner, name=f"sequence-{name}", daemon=True).start()
+
+    def wake(self, name, delay=0):
+        # Mudança feita pela própria volta do loop: descartada, como o clear() do loop de thread única
+        if delay == 0 and name == self.current and threading.current_thread() is self.thread:
+            return
+        ts = time.time() + delay
+        with self.cond:
+            if self.due.get(name, float("inf")) <= ts: return
+            self.due[name] = ts
+            heapq.heappush(self.heap, (ts, name))
+            self.cond.notify()
+
+    def next_due(self):
+        """Bloqueia até o próximo perfil vencer. Retorna o nome ou None se parou."""
+        with self.cond:
+            while self.running:
+                if not self.heap:
+                    self.cond.wait()
+                    continue
+                ts, name = self.heap[0]
+                if self.due.get(name) != ts:
+                    heapq.heappop(self.heap) # Reagendado depois: entrada velha
+                    continue
+                wait = ts - time.time()
+                if wait <= 0:
+                    heapq.heappop(self.heap)
+                    del self.due[name]
+                    return name
+                self.cond.wait(wait)
+        return None
+
+    def run(self):
+        while self.running:
+            name = self.next_due()
+            if name is None: break
+            system = self.systems[name]
+            if not system.running or name in self.busy: continue # O fim da sequência acorda o perfil
+            self.current = name
+            with use_profile(name):
+                delay = system.step()
+            self.current = None
+            self.steps += 1
+            if system.running and name not in self.busy:
+                self.wake(name, max(delay, 0.01))
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        for system in self.systems.values():
+            system.running = False
+        if self.thread: self.thread.join(timeout=2)
+
+def tk_notifier_factory():
+    """Um Tk (e um pool de popups) para todos os perfis."""
+    shared = {}
+    def factory(name):
+        notifier = TkNotifier(root=shared.get("root"))
+        shared.setdefault("root", notifier.root)
+        return notifier
+    return factory
+
+class SharedDaemon:
+    """
+    Daemon de vários perfis. 'notifier_factory(nome)' cria o notificador de cada
+    perfil (padrão: Tk compartilhado, ou terminal com headless=True).
+    serve_ipc=False dispensa os endpoints de estado (benchmarks).
+    """
+    def __init__(self, profiles=None, headless=False, notifier_factory=None, serve_ipc=True,
+                 background_delay=None):
+        from daemon import BOOT_BACKGROUND_DELAY
+        self.profiles = list(profiles or list_profiles())
+        self.notifier_factory = notifier_factory or (
+            (lambda name: LogNotifier(label=name)) if headless else tk_notifier_factory())
+        self.serve_ipc = serve_ipc
+        self.background_delay = BOOT_BACKGROUND_DELAY if background_delay is None else background_delay
+        self.scheduler = ProfileScheduler()
+        self.members = {} # nome -> (system, pid_lock, heartbeat, state_service)
+        self.stop_event = threading.Event()
+
+    def start_profile(self, name):
+        from daemon import IdentityRejectionSystem
+        from state_service import StateService
+        with use_profile(name):
+            pid_lock = PidLock()
+            if not pid_lock.acquire():
+                log_event("daemon_duplicate", "Perfil já atendido por outro Daemon. Pulando.", category="system")
+                return False
+            heartbeat = Heartbeat()
+            system = IdentityRejectionSystem(self.notifier_factory(name))
+            system.heartbeat = heartbeat
+            state_service = None
+            if self.serve_ipc:
+                state_service = StateService(system, profile=name)
+                state_service.start()
+            system.start(scheduler=self.scheduler)
+        self.members[name] = (system, pid_lock, heartbeat, state_service)
+        return True
+
+    def run_background_stages(self):
+        """Snapshot/auditorias/compactação de cada perfil, um de cada vez."""
+        if self.stop_event.wait(self.background_delay): return
+        for name, (system, _, _, _) in list(self.members.items()):
+            if self.stop_event.is_set(): return
+            with use_profile(name):
+                system.run_background_stages()
+
+    def start(self):
+        self.scheduler.start()
+        for name in self.profiles:
+            try: self.start_profile(name)
+            except Exception as e:
+                log_event("profile_start_error", f"Perfil '{name}' não iniciou: {e}", category="system")
+        threading.Thread(target=self.run_background_stages, daemon=True).start()
+        log_event("shared_daemon_start", f"Daemon compartilhado: {len(self.members)} perfil(is).", category="system")
+        return len(self.members)
+
+    def run(self):
+        """Segura a thread principal (mainloop do Tk compartilhado, se houver)."""
+        first = next(iter(self.members.values()), None)
+        if first and isinstance(first[0].notifier, TkNotifier):
+            first[0].notifier.run()
+        else:
+            while not self.stop_event.wait(1): pass
+
+    def stop(self):
+        self.stop_event.set()
+        self.scheduler.stop()
+        for name, (system, pid_lock, heartbeat, state_service) in self.members.items():
+            with use_profile(name):
+                if state_service: state_service.stop()
+                heartbeat.close()
+                pid_lock.release()
+        first = next(iter(self.members.values()), None)
+        if first: first[0].notifier.stop()
+
+def run_shared_daemon(headless=False):
+    """--daemon --all-profiles: um processo atende todos os perfis."""
+    daemon = SharedDaemon(headless=headless)
+    if not daemon.start():
+        return
+    try: daemon.run()
+    except KeyboardInterrupt: pass
+    finally: daemon.stop()
@@ -0,0 +1,252 @@
+# proof_archive.py
+"""
+ARQUIVO DE PROVAS (PESQUISÁVEL, SÓ CRESCE)
+- Cada prova entregue vira uma linha em provas/proof_archive.jsonl, encadeada
+  por hash como o journal do config. Nada é reescrito nem apagado.
+- O config guarda só a referência ("arquivo:<id>"): o texto da prova não pesa
+  no config.json, e a limpeza diária não perde mais a prova.
+- Índice invertido em provas/proof_search_index.json: termo -> ids, mais a
+  posição de cada registro no arquivo (leitura direta com seek).
+  O índice é incremental: só as linhas novas desde a última indexação são lidas.
+- Termos: descrição, nome da tarefa e a data (ano, mês e dia), sem acento e em
+  minúsculas. O último termo da busca casa por prefixo (busca enquanto digita).
+"""
+import os
+import re
+import json
+import bisect
+import hashlib
+import threading
+import unicodedata
+from datetime import date, datetime
+
+from core import paths, ensure_app_dirs, atomic_write, FileLock, get_file_stat, log_event
+
+PROOF_REF_PREFIX = "arquivo:"
+ARCHIVE_GENESIS_HASH = "0" * 64
+SEARCH_INDEX_VERSION = 1
+SEARCH_LIMIT = 200
+INDEX_FLUSH_BYTES = 64 * 1024 # Índice regravado a cada ~64 KB de provas novas (o resto é relido do arquivo)
+
+def archive_file(): return os.path.join(paths().proofs_dir, "proof_archive.jsonl")
+def search_index_file(): return os.path.join(paths().proofs_dir, "proof_search_index.json")
+
+def is_proof_ref(value):
+    return isinstance(value, str) and value.startswith(PROOF_REF_PREFIX)
+
+def proof_ref(record_id):
+    return f"{PROOF_REF_PREFIX}{record_id}"
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", str(text or "")).lower()
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+def tokenize(text):
+    return [t for t in re.findall(r"\w+", normalize(text)) if len(t) >= 2]
+
+def record_terms(record):
+    return set(tokenize(record.get('text'))) | set(tokenize(record.get('task_name'))) | set(tokenize(record.get('date')))
+
+def record_hash(record):
+    body = {k: v for k, v in record.items() if k != "hash"}
+    return hashlib.sha256(json.dumps(body, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+# --- Índice ---
+
+def empty_index():
+    return {"version": SEARCH_INDEX_VERSION, "indexed_bytes": 0, "next_id": 1,
+            "last_hash": ARCHIVE_GENESIS_HASH, "offsets": {}, "terms": {}}
+
+def load_search_index():
+    try:
+        with open(search_index_file(), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('version') == SEARCH_INDEX_VERSION: return index
+    except: pass
+    return empty_index()
+
+def catch_up(index):
+    """Indexa as linhas gravadas depois de 'indexed_bytes'. Retorna quantas entraram."""
+    path = archive_file()
+    size = (get_file_stat(path) or [0, 0])[1]
+    if size < index['indexed_bytes']:
+        # Arquivo menor que o indexado (restaurado de backup): reindexa do zero
+        index.clear(); index.update(empty_index())
+    if size == index['indexed_bytes']: return 0
+
+    added = 0
+    with open(path, 'rb') as f:
+        f.seek(index['indexed_bytes'])
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line or not line.endswith(b"\n"): break # Linha incompleta: fica para depois
+            try: record = json.loads(line)
+            except ValueError:
+                index['indexed_bytes'] = f.tell()
+                continue
+            rid = str(record['id'])
+            index['offsets'][rid] = offset
+            for term in record_terms(record):
+                index['terms'].setdefault(term, []).append(record['id'])
+            index['next_id'] = max(index['next_id'], record['id'] + 1)
+            index['last_hash'] = record.get('hash', index['last_hash'])
+            index['indexed_bytes'] = f.tell()
+            added += 1
+    return added
+
+_cache = {} # caminho do índice -> (stat do arquivo de provas, índice, termos ordenados, bytes já gravados no índice)
+_cache_lock = threading.Lock() # O pool de I/O da GUI tem mais de uma thread
+
+def get_search_index():
+    """Índice em memória, em dia com o arquivo. Só relê o disco se o arquivo cresceu."""
+    key = search_index_file()
+    with _cache_lock:
+        stat = get_file_stat(archive_file())
+        cached = _cache.get(key)
+        if cached and cached[0] == stat:
+            return cached[1], cached[2]
+        index, persisted = (cached[1], cached[3]) if cached else (None, None)
+        if index is None:
+            index = load_search_index()
+            persisted = index['indexed_bytes']
+        catch_up(index)
+        if index['indexed_bytes'] - persisted >= INDEX_FLUSH_BYTES or index['indexed_bytes'] < persisted:
+            if atomic_write(key, index): persisted = index['indexed_bytes']
+        sorted_terms = sorted(index['terms'])
+        _cache[key] = (stat, index, sorted_terms, persisted)
+        return index, sorted_terms
+
+# --- Gravação ---
+
+def archive_proof(task_id, task_name, proof_type, proof, day=None):
+    """
+    Anexa uma prova ao arquivo. Retorna a referência para o config
+    ("arquivo:<id>"), ou None se não conseguiu gravar.
+    """
+    if is_proof_ref(proof): return proof
+    ensure_app_dirs()
+    try:
+        with FileLock(archive_file()):
+            index, _ = get_search_index()
+            record = {
+                "id": index['next_id'],
+                "task_id": task_id,
+                "task_name": task_name,
+                "date": day or date.today().isoformat(),
+                "type": proof_type,
+                "text": proof if proof_type != "image" else "",
+                "path": proof if proof_type == "image" else None,
+                "timestamp": datetime.now().isoformat(),
+                "previous_hash": index['last_hash']
+            }
+            record["hash"] = record_hash(record)
+            with open(archive_file(), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            get_search_index() # Indexa a linha nova
+        return proof_ref(record['id'])
+    except Exception as e:
+        log_event("system_error", f"Erro ao arquivar prova: {e}", category="system")
+        return None
+
+def verify_archive_chain():
+    """
+    Auditoria completa do arquivo: cada linha tem que apontar para o hash da
+    anterior e bater com o próprio conteúdo. Retorna True (íntegro) ou False.
+    """
+    from core import log_blockchain_status
+    path = archive_file()
+    if not os.path.exists(path): return True
+    previous, count = ARCHIVE_GENESIS_HASH, 0
+    try:
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"): break # Linha incompleta no fim: gravação em andamento
+                try: record = json.loads(line)
+                except ValueError:
+                    log_blockchain_status("INTEGRITY_FAILURE", f"Linha ilegível depois do registro {count}.", "proofs")
+                    return False
+                if record.get('previous_hash') != previous:
+                    log_blockchain_status("INTEGRITY_FAILURE", f"QUEBRA DE CORRENTE no registro {record.get('id')}.", "proofs")
+                    return False
+                if record_hash(record) != record.get('hash'):
+                    log_blockchain_status("TAMPERING_DETECTED", f"ADULTERAÇÃO DE CONTEÚDO no registro {record.get('id')}.", "proofs")
+                    return False
+                previous = record['hash']
+                count += 1
+        log_blockchain_status("INTEGRITY_SUCCESS", f"Verificação completa OK ({count} provas).", "proofs")
+        return True
+    except Exception as e:
+        log_blockchain_status("AUDITOR_ERROR", str(e), "proofs")
+        return False
+
+# --- Leitura e Busca ---
+
+def iter_records(ids):
+    """Registros pelos ids, na ordem pedida (leitura direta pela posição no arquivo)."""
+    index, _ = get_search_index()
+    try:
+        with open(archive_file(), 'rb') as f:
+            for rid in ids:
+                offset = index['offsets'].get(str(rid))
+                if offset is None: continue
+                f.seek(offset)
+                try: yield json.loads(f.readline())
+                except ValueError: pass
+    except OSError: return
+
+def read_records(ids):
+    return list(iter_records(ids))
+
+def resolve_proof(value):
+    """Registro de uma referência "arquivo:<id>" (ou None se não for referência)."""
+    if not is_proof_ref(value): return None
+    try: rid = int(value[len(PROOF_REF_PREFIX):])
+    except ValueError: return None
+    found = read_records([rid])
+    return found[0] if found else None
+
+def proof_text(value):
+    """Texto legível de task['proof']: resolve a referência do arquivo; prova inline volta como está."""
+    if not is_proof_ref(value): return value
+    record = resolve_proof(value)
+    if record is None: return None
+    return record['path'] if record.get('type') == "image" else record.get('text')
+
+def prefix_ids(index, sorted_terms, prefix):
+    ids = set()
+    i = bisect.bisect_left(sorted_terms, prefix)
+    while i < len(sorted_terms) and sorted_terms[i].startswith(prefix):
+        ids.update(index['terms'][sorted_terms[i]])
+        i += 1
+    return ids
+
+def search_proofs(query, task_id=None, since=None, until=None, limit=SEARCH_LIMIT):
+    """
+    Provas que contêm todos os termos da busca (o último por prefixo), mais
+    recentes primeiro. Filtros opcionais por tarefa e intervalo de datas (ISO).
+    Busca vazia lista as últimas provas.
+    """
+    index, sorted_terms = get_search_index()
+    terms = tokenize(query)
+    if terms:
+        matches = None
+        for i, term in enumerate(terms):
+            ids = prefix_ids(index, sorted_terms, term) if i == len(terms) - 1 else set(index['terms'].get(term, ()))
+            matches = ids if matches is None else matches & ids
+            if not matches: return []
+        candidates = sorted(matches, reverse=True)
+    else:
+        candidates = range(index['next_id'] - 1, 0, -1)
+
+    # Lê do disco só até completar a página
+    results = []
+    for record in iter_records(candidates):
+        if task_id and record.get('task_id') != task_id: continue
+        if since and record['date'] < since: continue
+        if until and record['date'] > until: continue
+        results.append(record)
+        if len(results) >= limit: break
+    return results
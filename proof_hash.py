@@ -0,0 +1,116 @@
+# proof_hash.py
+"""
+HASH PERCEPTUAL DAS PROVAS (DETECÇÃO DE IMAGEM REAPROVEITADA)
+- dHash de 64 bits: a imagem vira 9x8 em tons de cinza e cada bit diz se um
+  pixel é mais claro que o vizinho da direita. Recompressão, redimensionamento
+  e pequenos cortes mudam poucos bits; outra foto muda uns 32.
+- Com NumPy o cálculo é vetorizado; sem ele, o mesmo em Python puro. PIL é
+  necessário para abrir a imagem (sem PIL não há hash e nada é comparado).
+- Busca por distância de Hamming numa BK-tree: só os ramos que podem estar a
+  até 'max_distance' são visitados, então dezenas de milhares de provas são
+  consultadas em milissegundos.
+- Os hashes ficam no índice do armazém (proof_index.json, campo "dhash"); a
+  árvore é montada em memória uma vez e atualizada a cada prova nova.
+"""
+from core import get_file_stat
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HASH_SIZE = 8
+SIMILAR_DISTANCE = 10 # Bits diferentes (de 64) que ainda contam como "mesma imagem"
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+def dhash_image(im):
+    """dHash de uma imagem PIL já aberta."""
+    small = im.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR)
+    if np is not None:
+        pixels = np.asarray(small, dtype=np.int16)
+        bits = (pixels[:, :-1] > pixels[:, 1:]).ravel() # Esquerdo mais claro que o direito
+        return int.from_bytes(np.packbits(bits).tobytes(), "big")
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(HASH_SIZE):
+        line = pixels[row * (HASH_SIZE + 1):(row + 1) * (HASH_SIZE + 1)]
+        for left, right in zip(line, line[1:]):
+            value = (value << 1) | (left > right)
+    return value
+
+def dhash_file(path):
+    """
+    dHash de um arquivo de imagem, ou None (sem PIL ou arquivo ilegível).
+    Desvira pela orientação EXIF antes, como na entrada (proof_store.render_copies):
+    a mesma foto de celular tem o mesmo hash venha de onde vier.
+    """
+    if Image is None: return None
+    try:
+        with Image.open(path) as im:
+            return dhash_image(ImageOps.exif_transpose(im))
+    except Exception:
+        return None
+
+class BKTree:
+    """Árvore BK sobre distância de Hamming. Nó = [hash, [digests], {distância: filho}]."""
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value, digest):
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [digest], {}]
+            return
+        node = self.root
+        while True:
+            d = hamming(value, node[0])
+            if d == 0:
+                node[1].append(digest)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, [digest], {}]
+                return
+            node = child
+
+    def search(self, value, max_distance=SIMILAR_DISTANCE):
+        """Lista de (distância, digest) a até 'max_distance' bits, mais parecidos primeiro."""
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            d = hamming(value, node[0])
+            if d <= max_distance:
+                found.extend((d, digest) for digest in node[1])
+            # Desigualdade triangular: só filhos com |k - d| <= max_distance podem ter resultado
+            for k, child in node[2].items():
+                if d - max_distance <= k <= d + max_distance:
+                    stack.append(child)
+        found.sort()
+        return found
+
+_trees = {} # caminho do índice -> (stat do arquivo, BKTree)
+
+def tree_for_index(index_path, index):
+    """BK-tree do índice do armazém; remontada só se o arquivo mudou por fora."""
+    cached = _trees.get(index_path)
+    if cached and cached[0] == get_file_stat(index_path):
+        return cached[1]
+    tree = BKTree()
+    for digest, entry in index['entries'].items():
+        if entry.get('dhash'):
+            tree.add(int(entry['dhash'], 16), digest)
+    _trees[index_path] = (get_file_stat(index_path), tree)
+    return tree
+
+def remember_tree(index_path, tree):
+    """Chamado depois de gravar o índice: a árvore em memória já está em dia."""
+    _trees[index_path] = (get_file_stat(index_path), tree)
@@ -0,0 +1,225 @@
+# proof_store.py
+"""
+ARMAZÉM DE PROVAS (IMAGENS)
+- Cada imagem é guardada pelo hash do conteúdo (SHA-256): a mesma foto anexada
+  duas vezes ocupa espaço uma vez só.
+- O hash é calculado enquanto o arquivo é copiado (uma leitura só).
+- Com PIL: a cópia de trabalho é reduzida (lado maior até WORKING_MAX_SIDE, WebP
+  ou JPEG) e uma miniatura é gerada. Sem PIL: guarda o original como está.
+- Cota total (PROOF_QUOTA_MB): passando dela, as cópias mais antigas são
+  apagadas; a miniatura e o registro no índice ficam.
+- Índice em provas/proof_index.json: hash -> arquivo, miniatura, tamanhos, nome
+  original, dHash (proof_hash.py) e os (tarefa, dia) em que foi usada.
+- Cada prova nova é comparada por dHash com todas as anteriores: as parecidas
+  voltam em info["similar"] (imagem reaproveitada de outro dia).
+- Tudo aqui é I/O pesado: a GUI chama pelo pool de I/O, nunca na thread do Tk.
+"""
+import os
+import json
+import hashlib
+import threading
+from datetime import date, datetime
+
+from core import paths, ensure_app_dirs, atomic_write, FileLock, log_event
+import proof_hash
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+PROOF_QUOTA_MB = 500
+WORKING_MAX_SIDE = 1600
+THUMB_SIDE = 256
+IMAGE_QUALITY = 82
+CHUNK_SIZE = 1024 * 1024
+INDEX_VERSION = 1
+
+def store_dir(): return os.path.join(paths().proofs_dir, "store")
+def thumbs_dir(): return os.path.join(paths().proofs_dir, "thumbs")
+def index_file(): return os.path.join(paths().proofs_dir, "proof_index.json")
+
+def working_format():
+    """WebP se o PIL tiver suporte; senão JPEG. Retorna (formato PIL, extensão)."""
+    try:
+        from PIL import features
+        if features.check("webp"): return "WEBP", ".webp"
+    except Exception: pass
+    return "JPEG", ".jpg"
+
+def load_proof_index():
+    try:
+        with open(index_file(), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('version') == INDEX_VERSION: return index
+    except: pass
+    return {"version": INDEX_VERSION, "total_bytes": 0, "entries": {}}
+
+def stream_copy(src_path, dst_path):
+    """Copia em blocos calculando o SHA-256 no caminho. Retorna (hash, bytes)."""
+    sha = hashlib.sha256()
+    size = 0
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk: break
+            sha.update(chunk)
+            dst.write(chunk)
+            size += len(chunk)
+    return sha.hexdigest(), size
+
+def render_copies(tmp_path, digest):
+    """
+    Gera a cópia de trabalho reduzida, a miniatura e o dHash a partir do arquivo
+    recebido (uma decodificação só). Retorna (cópia, miniatura, dhash) ou None se
+    não der (sem PIL ou arquivo que não abre como imagem).
+    """
+    if Image is None: return None
+    fmt, ext = working_format()
+    work_path = os.path.join(store_dir(), digest[:2], digest + ext)
+    thumb_path = os.path.join(thumbs_dir(), digest + ".jpg")
+    try:
+        with Image.open(tmp_path) as im:
+            im = ImageOps.exif_transpose(im) # Fotos de celular vêm deitadas
+            if im.mode not in ("RGB", "L"): im = im.convert("RGB")
+            work = im.copy()
+            work.thumbnail((WORKING_MAX_SIDE, WORKING_MAX_SIDE))
+            work.save(work_path, fmt, quality=IMAGE_QUALITY)
+            thumb = im.copy()
+            thumb.thumbnail((THUMB_SIDE, THUMB_SIDE))
+            thumb.save(thumb_path, "JPEG", quality=IMAGE_QUALITY)
+            phash = proof_hash.dhash_image(thumb)
+        return work_path, thumb_path, phash
+    except Exception as e:
+        log_event("proof_render_error", f"Prova guardada sem redução ({digest[:12]}): {e}", category="system")
+        for p in (work_path, thumb_path):
+            try: os.remove(p)
+            except OSError: pass
+        return None
+
+def file_size(path):
+    try: return os.path.getsize(path)
+    except OSError: return 0
+
+def enforce_quota(index, keep=None, quota_mb=None):
+    """Apaga as cópias mais antigas até caber na cota. Retorna quantas foram apagadas."""
+    limit = (quota_mb or PROOF_QUOTA_MB) * 1024 * 1024
+    if index['total_bytes'] <= limit: return 0
+    evicted = 0
+    for digest, entry in sorted(index['entries'].items(), key=lambda kv: kv[1]['added']):
+        if index['total_bytes'] <= limit: break
+        if digest == keep or entry.get('evicted'): continue
+        try: os.remove(entry['path'])
+        except OSError: pass
+        index['total_bytes'] -= entry['bytes']
+        entry['evicted'] = True
+        evicted += 1
+    if evicted:
+        log_event("proof_quota", f"Cota de provas: {evicted} cópia(s) antiga(s) apagada(s), miniaturas mantidas.", category="system")
+    return evicted
+
+def ingest_proof(src_path, task_id=None, day=None):
+    """
+    Guarda uma imagem de prova. Retorna (sucesso, info) com info =
+    {"hash", "path", "thumb", "duplicate", "bytes", "similar"} ou (False, mensagem).
+    'similar': [(distância, hash, usos)] de provas anteriores parecidas, mais
+    parecidas primeiro (a própria imagem entra se já tinha sido usada antes).
+    O uso (tarefa, dia) só conta depois que a prova é aceita: record_use().
+    """
+    ensure_app_dirs()
+    day = day or date.today().isoformat()
+    tmp_path = os.path.join(paths().proofs_dir, f".ingest_{os.getpid()}_{threading.get_ident()}.tmp")
+    try:
+        os.makedirs(thumbs_dir(), exist_ok=True)
+        digest, original_bytes = stream_copy(src_path, tmp_path)
+    except Exception as e:
+        try: os.remove(tmp_path)
+        except OSError: pass
+        return False, f"Não foi possível ler a imagem: {e}"
+
+    os.makedirs(os.path.join(store_dir(), digest[:2]), exist_ok=True)
+    known = load_proof_index()['entries'].get(digest)
+    duplicate = known is not None and not known.get('evicted') and os.path.exists(known['path'])
+
+    phash = None
+    if duplicate:
+        os.remove(tmp_path)
+        work_path, thumb_path = known['path'], known.get('thumb')
+    else:
+        copies = render_copies(tmp_path, digest)
+        if copies:
+            work_path, thumb_path, phash = copies
+            os.remove(tmp_path)
+        else:
+            ext = os.path.splitext(src_path)[1].lower() or ".img"
+            work_path, thumb_path = os.path.join(store_dir(), digest[:2], digest + ext), None
+            os.replace(tmp_path, work_path)
+
+    with FileLock(index_file()):
+        index = load_proof_index() # Relido sob o lock: outra thread pode ter gravado
+        tree = proof_hash.tree_for_index(index_file(), index)
+        entry = index['entries'].get(digest)
+        if entry is None or entry.get('evicted'):
+            entry = {
+                "path": work_path,
+                "thumb": thumb_path,
+                "bytes": file_size(work_path),
+                "original_bytes": original_bytes,
+                "original_name": os.path.basename(src_path),
+                "added": datetime.now().isoformat(),
+                "dhash": (entry or {}).get('dhash'),
+                "uses": (entry or {}).get('uses', [])
+            }
+            index['entries'][digest] = entry
+            index['total_bytes'] += entry['bytes']
+
+        similar = []
+        if phash is None and entry.get('dhash'): phash = int(entry['dhash'], 16)
+        if phash is not None:
+            for distance, other in tree.search(phash):
+                uses = [u for u in index['entries'][other]['uses'] if u != [task_id, day]]
+                if uses: similar.append((distance, other, uses))
+            if not entry.get('dhash'):
+                entry['dhash'] = f"{phash:016x}"
+                tree.add(phash, digest)
+
+        enforce_quota(index, keep=digest)
+        atomic_write(index_file(), index)
+        proof_hash.remember_tree(index_file(), tree)
+
+    if similar:
+        log_event("proof_reuse", f"Prova parecida com {len(similar)} anterior(es) (distância {similar[0][0]}).", category="security")
+    return True, {"hash": digest, "path": work_path, "thumb": thumb_path,
+                  "duplicate": duplicate, "bytes": entry['bytes'], "similar": similar}
+
+def record_use(digest, task_id=None, day=None):
+    """Registra que a imagem foi entregue como prova de (tarefa, dia). Chamar só depois de confirmada."""
+    day = day or date.today().isoformat()
+    with FileLock(index_file()):
+        index = load_proof_index()
+        entry = index['entries'].get(digest)
+        if entry is None or [task_id, day] in entry['uses']: return False
+        tree = proof_hash.tree_for_index(index_file(), index) # Pega antes de gravar: os hashes não mudam
+        entry['uses'].append([task_id, day])
+        atomic_write(index_file(), index)
+        proof_hash.remember_tree(index_file(), tree)
+    return True
+
+def get_proof_entry(digest):
+    return load_proof_index()['entries'].get(digest)
+
+def backfill_dhashes():
+    """Calcula o dHash das provas guardadas antes dele existir (ou sem PIL). Retorna quantas."""
+    if proof_hash.Image is None or not os.path.exists(index_file()): return 0
+    with FileLock(index_file()):
+        index = load_proof_index()
+        done = 0
+        for entry in index['entries'].values():
+            if entry.get('dhash'): continue
+            source = entry.get('thumb') if entry.get('thumb') and os.path.exists(entry['thumb']) else entry['path']
+            phash = proof_hash.dhash_file(source)
+            if phash is None: continue
+            entry['dhash'] = f"{phash:016x}"
+            done += 1
+        if done: atomic_write(index_file(), index)
+    return done
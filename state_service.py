@@ -0,0 +1,336 @@
+# state_service.py
+"""
+SERVIÇO DE ESTADO (IPC LOCAL)
+- O Daemon hospeda um endpoint local (Unix socket no Linux/macOS, Named Pipe no Windows)
+- Operações tipadas: get_state, complete_task, set_study_mode, update_break_stats,
+  spend_bank, append_event
+- Um único processo escreve no config.json/bank.json: acabam as brigas de lock e o save_retry
+- Se o Daemon estiver fora do ar, os clientes caem para o acesso direto aos arquivos
+- Cada pedido leva um id: um reenvio (conexão caiu antes da resposta) devolve a
+  resposta já dada em vez de aplicar de novo. Pedido entregue sem resposta nunca
+  é aplicado também no arquivo (débito em dobro no banco, por exemplo)
+"""
+import os
+import copy
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+from multiprocessing.connection import Listener, Client
+
+from core import (
+    APP_NAME, IS_WINDOWS, SECRET_SALT, DayState, DEFAULT_PROFILE,
+    load_config_data, update_config, log_event, ensure_app_dirs, paths, use_profile,
+    apply_task_completion, apply_study_mode, apply_break_stats
+)
+
+AUTH_KEY = hashlib.sha256(f"{APP_NAME}{SECRET_SALT}".encode('utf-8')).digest()
+REPLY_TIMEOUT = 5 # Segundos esperando a resposta do Daemon
+REPLY_CACHE_SIZE = 256 # Respostas guardadas por id de pedido (para reconhecer reenvios)
+NO_REPLY = "sem_resposta" # call(): pedido entregue, resposta não veio (resultado desconhecido)
+
+def get_service_address():
+    """Retorna (endereço, família) do endpoint local do perfil ativo."""
+    if IS_WINDOWS:
+        suffix = "" if paths().name == DEFAULT_PROFILE else f"_{paths().name}"
+        return rf"\\.\pipe\{APP_NAME}_state{suffix}", "AF_PIPE"
+    return os.path.join(paths().app_data_dir, "state.sock"), "AF_UNIX"
+
+# --- LADO SERVIDOR (Daemon) ---
+
+class StateService:
+    """
+    Roda dentro do Daemon e aplica as operações sobre o estado em memória dele.
+    No Daemon compartilhado há um serviço por perfil; as threads dele rodam no perfil.
+    """
+    def __init__(self, system, profile=None):
+        self.system = system
+        self.profile = profile or paths().name
+        self.listener = None
+        self.running = False
+        self.bank_lock = threading.Lock()
+        self.replies = OrderedDict() # id do pedido -> [Event, resposta]
+        self.replies_lock = threading.Lock()
+        self.handlers = {
+            "ping": self.op_ping,
+            "get_state": self.op_get_state,
+            "complete_task": self.op_complete_task,
+            "set_study_mode": self.op_set_study_mode,
+            "update_break_stats": self.op_update_break_stats,
+            "spend_bank": self.op_spend_bank,
+            "append_event": self.op_append_event,
+        }
+
+    def start(self):
+        with use_profile(self.profile):
+            return self._start()
+
+    def _start(self):
+        address, family = get_service_address()
+
+        # Outro Daemon já está servindo? Não rouba o endpoint dele.
+        reachable, _ = call("ping")
+        if reachable:
+            log_event("state_service_skip", "Endpoint de estado já ativo em outro processo.", category="system")
+            return False
+
+        try:
+            ensure_app_dirs()
+            if family == "AF_UNIX" and os.path.exists(address):
+                os.remove(address) # Socket órfão de um Daemon morto
+            self.listener = Listener(address, family=family, authkey=AUTH_KEY)
+            if family == "AF_UNIX":
+                os.chmod(address, 0o600)
+        except Exception as e:
+            log_event("state_service_error", f"Falha ao abrir endpoint: {e}", category="system")
+            return False
+
+        self.running = True
+        threading.Thread(target=self.accept_loop, daemon=True).start()
+        log_event("state_service_start", f"Endpoint de estado ativo ({family}).", category="system")
+        return True
+
+    def stop(self):
+        self.running = False
+        try: self.listener.close()
+        except: pass
+
+    def accept_loop(self):
+        with use_profile(self.profile):
+            self._accept_loop()
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn = self.listener.accept()
+            except Exception:
+                if not self.running: break
+                continue
+            threading.Thread(target=self.serve, args=(conn,), daemon=True).start()
+
+    def serve(self, conn):
+        with use_profile(self.profile):
+            self._serve(conn)
+
+    def _serve(self, conn):
+        try:
+            while self.running:
+                try:
+                    msg = conn.recv()
+                except (EOFError, OSError):
+                    break
+                conn.send(self.dispatch(msg))
+        finally:
+            try: conn.close()
+            except: pass
+
+    def dispatch(self, msg):
+        """Reenvio de um pedido já recebido devolve a mesma resposta (espera se ainda roda)."""
+        request_id = msg.get("id")
+        if not request_id:
+            return self.execute(msg)
+        with self.replies_lock:
+            entry = self.replies.get(request_id)
+            first = entry is None
+            if first:
+                entry = self.replies[request_id] = [threading.Event(), None]
+                while len(self.replies) > REPLY_CACHE_SIZE:
+                    self.replies.popitem(last=False)
+        if first:
+            entry[1] = self.execute(msg)
+            entry[0].set()
+        elif not entry[0].wait(REPLY_TIMEOUT):
+            return {"ok": False, "error": "Pedido repetido ainda em andamento."}
+        return entry[1]
+
+    def execute(self, msg):
+        op = msg.get("op")
+        handler = self.handlers.get(op)
+        if not handler:
+            return {"ok": False, "error": f"Operação desconhecida: {op}"}
+        try:
+            return {"ok": True, "result": handler(**msg.get("args", {}))}
+        except Exception as e:
+            log_event("state_service_error", f"Erro em '{op}': {e}", category="system")
+            return {"ok": False, "error": str(e)}
+
+    # --- Operações ---
+
+    def op_ping(self):
+        return "pong"
+
+    def op_get_state(self):
+        with self.system.state_lock:
+            self.system.reload_config_if_changed()
+            return copy.deepcopy(self.system.config)
+
+    def op_complete_task(self, task_id, proof_type, proof):
+        with self.system.state_lock:
+            self.system.reload_config_if_changed()
+            task = apply_task_completion(self.system.config, task_id, proof_type, proof)
+            if task is None:
+                return {"completed": False, "all_done": False}
+            archive_task_proof(task, task_id)
+            self.system.save_config("complete_task")
+            log_event("task_completed", f"{task_id}: {task['name']}", category="history")
+            # Registra o fim do dia (last_completion_date + log) se era a última
+            state = self.system.get_day_state()
+            all_done = bool(state.tasks_for_today) and self.system.all_tasks_completed()
+            return {"completed": True, "all_done": all_done}
+
+    def op_set_study_mode(self, enabled, session_type=None):
+        with self.system.state_lock:
+            self.system.reload_config_if_changed()
+            apply_study_mode(self.system.config, enabled, session_type)
+            self.system.save_config("set_study_mode")
+            return True
+
+    def op_update_break_stats(self, focus_minutes=0, used_10=0, used_20=0):
+        with self.system.state_lock:
+            self.system.reload_config_if_changed()
+            stats = apply_break_stats(self.system.config, focus_minutes, used_10, used_20)
+            self.system.save_config("update_break_stats")
+            return dict(stats)
+
+    def op_spend_bank(self, minutes):
+        from bank_manager import spend_minutes
+        with self.bank_lock:
+            return spend_minutes(minutes)
+
+    def op_append_event(self, event_type, details, category="system"):
+        log_event(event_type, details, category=category)
+        return True
+
+# --- LADO CLIENTE (GUI, Modo Estudo, Watchdog) ---
+
+_client = None
+_client_address = None # Endpoint da conexão aberta (o perfil pode mudar entre chamadas)
+_client_lock = threading.Lock()
+
+def _close_client():
+    global _client
+    try: _client.close()
+    except: pass
+    _client = None
+
+def call(op, **args):
+    """
+    Envia uma operação ao Daemon. Retorna:
+    - (True, resultado) se ele respondeu;
+    - (False, None) se não deu para entregar (fora do ar): o chamador pode usar o arquivo;
+    - (NO_REPLY, None) se o pedido foi entregue e a resposta não veio: o Daemon
+      pode ter aplicado, então operação que soma/debita não é repetida no arquivo.
+    """
+    global _client, _client_address
+    address, family = get_service_address()
+    msg = {"op": op, "args": args, "id": uuid.uuid4().hex}
+    reply = None
+    sent = False
+    with _client_lock:
+        if _client is not None and _client_address != address:
+            _close_client()
+        _client_address = address
+        for attempt in range(2): # A conexão reaproveitada pode ter caído: tenta reabrir uma vez
+            try:
+                if _client is None:
+                    if family == "AF_UNIX" and not os.path.exists(address):
+                        break
+                    _client = Client(address, family=family, authkey=AUTH_KEY)
+                _client.send(msg)
+                sent = True
+                if not _client.poll(REPLY_TIMEOUT):
+                    _close_client()
+                    break # Daemon lento: reenviar só somaria outra espera
+                reply = _client.recv()
+                break
+            except Exception:
+                # Reenvio leva o mesmo id: se o Daemon já aplicou, só devolve a resposta
+                _close_client()
+
+    if reply is None:
+        if sent:
+            log_event("state_service_no_reply", f"'{op}' entregue sem resposta do Daemon.", category="system")
+            return NO_REPLY, None
+        return False, None
+    if not reply.get("ok"):
+        print(f"Serviço de estado recusou '{op}': {reply.get('error')}")
+        return True, None
+    return True, reply.get("result")
+
+def get_state():
+    """Config atual (do Daemon se disponível; senão, lido do disco)."""
+    reachable, result = call("get_state")
+    if reachable is True and result is not None:
+        return result
+    return load_config_data()
+
+def archive_task_proof(task, task_id):
+    """
+    Conclusão já aceita: manda a prova da tarefa para o arquivo de provas e deixa
+    no config só a referência. Se o arquivo falhar, a prova fica inline no config.
+    """
+    from proof_archive import archive_proof
+    ref = archive_proof(task_id, task.get('name'), task.get('proof_type', 'text'), task.get('proof'))
+    if ref: task['proof'] = ref
+    return ref
+
+def complete_task(task_id, proof_type, proof):
+    """
+    Conclui a tarefa de hoje. Retorna (concluída, todas_as_tarefas_feitas).
+    A prova só vai para o arquivo de provas depois que a conclusão foi aceita.
+    """
+    reachable, result = call("complete_task", task_id=task_id, proof_type=proof_type, proof=proof)
+    if reachable:
+        result = result or {}
+        return result.get("completed", False), result.get("all_done", False)
+
+    outcome = {"task": None, "all_done": False}
+    def mutator(cfg):
+        outcome["task"] = apply_task_completion(cfg, task_id, proof_type, proof)
+        if outcome["task"] is None: return
+        state = DayState(cfg)
+        outcome["all_done"] = bool(state.tasks_for_today) and state.all_completed
+        if outcome["all_done"]:
+            cfg['last_completion_date'] = date.today().isoformat()
+
+    if update_config(mutator, mutation_type="complete_task") is None or outcome["task"] is None:
+        return False, False
+    log_event("task_completed", f"{task_id}: {outcome['task']['name']}", category="history")
+
+    # Fora do mutator (update_config pode reaplicá-lo): uma linha no arquivo por conclusão
+    ref = archive_task_proof(dict(outcome["task"]), task_id)
+    if ref:
+        def swap_ref(cfg):
+            task = cfg.get('tasks', {}).get(task_id)
+            if task is not None and task.get('proof') == proof: task['proof'] = ref
+        update_config(swap_ref, mutation_type="archive_proof")
+    return True, outcome["all_done"]
+
+def set_study_mode(enabled, session_type=None):
+    reachable, _ = call("set_study_mode", enabled=enabled, session_type=session_type)
+    if reachable: return
+    update_config(lambda cfg: apply_study_mode(cfg, enabled, session_type), mutation_type="set_study_mode")
+
+def update_break_stats(focus_minutes=0, used_10=0, used_20=0):
+    reachable, result = call("update_break_stats", focus_minutes=focus_minutes, used_10=used_10, used_20=used_20)
+    if reachable:
+        return result # NO_REPLY: o Daemon pode ter somado; somar no arquivo contaria duas vezes
+    cfg = update_config(lambda cfg: apply_break_stats(cfg, focus_minutes, used_10, used_20),
+                        mutation_type="update_break_stats")
+    return (cfg or {}).get('daily_break_stats')
+
+def spend_bank(minutes):
+    """Debita o Banco de Horas. Retorna (sucesso, mensagem) como bank_manager.spend_minutes."""
+    reachable, result = call("spend_bank", minutes=minutes)
+    if reachable == NO_REPLY:
+        return False, "O Daemon não respondeu a tempo. Confira o extrato antes de tentar de novo."
+    if reachable:
+        return tuple(result) if result else (False, "Serviço de estado recusou o débito.")
+    from bank_manager import spend_minutes
+    return spend_minutes(minutes)
+
+def append_event(event_type, details, category="system"):
+    reachable, _ = call("append_event", event_type=event_type, details=details, category=category)
+    if not reachable:
+        log_event(event_type, details, category=category)
@@ -20,7 +20,9 @@ from datetime import datetime
 from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, messagebox
-from bank_manager import get_balances, spend_minutes
+from bank_manager import get_balances
+from core import load_config_data, ensure_app_dirs, LOG_FILE
+from state_service import set_study_mode, update_break_stats, spend_bank
 
 # --- Configurações Básicas e Helpers ---
 
@@ -34,24 +36,7 @@ def get_base_dir():
     except NameError:
         return os.getcwd()
 
-APP_DATA_DIR = os.path.join(get_base_dir(), "config")
-CONFIG_FILE = os.path.join(APP_DATA_DIR, "config.json")
-LOG_FILE = os.path.join(APP_DATA_DIR, "logging.json")
-def load_config_data():
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            pass
-    return {'study_mode': False, 'tts_speed': 3} 
-
-def save_config_data(data):
-    try:
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-    except Exception as e:
-        print(f"Erro ao salvar config: {e}")
+# LOG_FILE vem do core: segue o perfil do processo (IRS_PROFILE)
 
 def log_event(event_type, details):
     try:
@@ -69,6 +54,7 @@ def log_event(event_type, details):
         }
         logs.append(log_entry)
         
+        ensure_app_dirs()
         with open(LOG_FILE, 'w', encoding='utf-8') as f:
             json.dump(logs, f, ensure_ascii=False, indent=2)
     except Exception as e:
@@ -76,9 +62,7 @@ def log_event(event_type, details):
 
 def return_to_main_app():
     try:
-        config = load_config_data()
-        config['study_mode'] = False
-        save_config_data(config)
+        set_study_mode(False)
         log_event("study_mode_off", "Retornando ao app principal.")
 
         base_dir = get_base_dir()
@@ -121,26 +105,14 @@ def get_daily_stats(config):
 
 def save_focus_progress(minutes_done):
     """Soma o tempo trabalhado ao contador diário."""
-    cfg = load_config_data()
-    stats = get_daily_stats(cfg)
-    
-    stats['focus_minutes'] += minutes_done
-    
-    cfg['daily_break_stats'] = stats
-    save_config_data(cfg)
+    update_break_stats(focus_minutes=minutes_done)
 
 def use_break_credit(break_type):
     """Consome um crédito de intervalo (10 ou 20)."""
-    cfg = load_config_data()
-    stats = get_daily_stats(cfg)
-    
     if break_type == 10:
-        stats['used_10'] += 1
+        update_break_stats(used_10=1)
     elif break_type == 20:
-        stats['used_20'] += 1
-        
-    cfg['daily_break_stats'] = stats
-    save_config_data(cfg)
+        update_break_stats(used_20=1)
 
 # --- CLASSE DO SETUP (A Negociação) ---
 
@@ -275,10 +247,7 @@ class SetupWindow:
 
     def _activate_study_mode_config(self):
         """Ativa o modo estudo no arquivo de configuração."""
-        config = load_config_data()
-        config['study_mode'] = True
-        config['session_type'] = 'focus' 
-        save_config_data(config)
+        set_study_mode(True, session_type='focus')
         log_event("study_mode_on", "Modo Estudo/Trabalho ativado (via GUI).")
 
     def start_break_session(self, duration):
@@ -289,10 +258,7 @@ class SetupWindow:
         use_break_credit(duration)
         
         # Configura sessão como 'break'
-        config = load_config_data()
-        config['study_mode'] = True
-        config['session_type'] = f'break_{duration}' # break_10 ou break_20
-        save_config_data(config)
+        set_study_mode(True, session_type=f'break_{duration}') # break_10 ou break_20
         
         log_event("break_start", f"Intervalo de {duration}m iniciado.")
         
@@ -343,16 +309,13 @@ class SetupWindow:
             return
 
         # Efetua o débito
-        success, msg = spend_minutes(minutes)
+        success, msg = spend_bank(minutes)
         if not success:
             messagebox.showerror("Erro", msg)
             return
 
         # Ativa modo estudo, mas com flag de lazer
-        config = load_config_data()
-        config['study_mode'] = True
-        config['session_type'] = 'standby'
-        save_config_data(config)
+        set_study_mode(True, session_type='standby')
         
         log_event("standby_mode_on", f"Sessão de Standby iniciada: -{minutes}m")
         
@@ -0,0 +1,67 @@
+# tests/test_bank_manager.py
+"""
+Banco de Horas: snapshot (bank_state.json) desatualizado reconciliado com
+blocos gravados por outro processo.
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+class StaleSnapshotAllocateTest(unittest.TestCase):
+    def setUp(self):
+        # Perfil e Backups numa pasta temporária: nada vai para config/ nem para a pasta do usuário
+        self.tmp = tempfile.mkdtemp(prefix="irs_test_")
+        self.old_env = {k: os.environ.get(k) for k in ("HOME", "APPDATA")}
+        os.environ["HOME"] = os.environ["APPDATA"] = self.tmp
+        import core
+        self.core = core
+        self.old_profiles_dir = core.PROFILES_DIR
+        core.PROFILES_DIR = self.tmp
+        self.profile = core.use_profile("bank_test")
+        self.profile.__enter__()
+
+    def tearDown(self):
+        self.profile.__exit__(None, None, None)
+        self.core.PROFILES_DIR = self.old_profiles_dir
+        for k, v in self.old_env.items():
+            if v is None: os.environ.pop(k, None)
+            else: os.environ[k] = v
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_allocate_after_unlock_on_stale_snapshot(self):
+        import bank_manager as bm
+        today = date.today().isoformat()
+        yesterday = (date.today() - timedelta(days=1)).isoformat()
+        bm.import_deposits([{"task_source": "Leitura", "amount": 60, "unlock_date": today}])
+
+        # Snapshot de ontem: o lote ainda aparece bloqueado
+        state = bm.load_bank_state()
+        lot_index = state['lots_open'][0][0]
+        state.update(as_of=yesterday, released=0, lots_open=[],
+                     unlock_schedule=[[today, 60]], lots_locked=[[today, lot_index, 60]])
+        bm.save_bank_state(state, bm.get_file_stat(bm.bank_file()))
+
+        # Outro processo gasta hoje (SPEND + ALLOCATE) sem mexer no snapshot
+        data = bm.load_ledger()
+        bm.add_block_to_chain(data['chain'], "SPEND", "Standby Mode", -20, today)
+        bm.add_block_to_chain(data['chain'], "ALLOCATE", f"{bm.LOT_PREFIX}{lot_index}", -20, today)
+        bm.write_ledger(data)
+
+        self.assertEqual(bm.get_balances(), (0, 40))
+        page = bm.get_history(0, 10)
+        self.assertEqual(len(page), 1)
+        self.assertEqual(page[0]['amount_remaining'], 40)
+        state = bm.get_bank_state()
+        self.assertEqual(state['unallocated'], 0)
+        self.assertEqual(state['lots_open'], [[lot_index, 40]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+# view_store.py
+"""
+STORE DE VIEW MODELS DA GUI
+- Um lugar só, em memória, com o que as janelas mostram: config, DayState,
+  economia (Loja e janela de prova), tarefas (gerenciador), configurações e
+  banco (extrato).
+- Tudo é derivado UMA vez por versão dos arquivos: mtime + tamanho do config e
+  do journal, do bank_state.json, e o dia.
+- Um watcher (after() periódico) só faz stat. Se algo mudou, a derivação roda
+  no pool de I/O e os view models novos são publicados.
+- Janelas assinam um view model (subscribe) e são avisadas só quando ele muda
+  de fato (comparação por igualdade). Abrir uma janela sem mudança nos
+  arquivos não lê nada do disco além do stat.
+"""
+from datetime import date
+
+from core import load_config_data, get_config_version, get_file_stat, log_event, DayState
+
+WATCH_MS = 1000
+WEEKDAYS = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+DEFAULT_CELEBRATIONS = ["Parabéns pelo foco."]
+
+def schedule_text(task):
+    if task.get('schedule_type') == 'daily':
+        return "Todos os dias"
+    days = task.get('schedule_days', [])
+    return ", ".join(WEEKDAYS[i] for i in days) if days else "Personalizado"
+
+def config_models(cfg, version):
+    """View models que saem do config: config, day, economy, tasks e settings."""
+    day = DayState(cfg, version)
+    econ = cfg.get('economy', {})
+    flex_today = econ.get('flex_active_date') == day.date
+    all_done_today = bool(day.tasks_for_today) and day.all_completed
+
+    economy = {
+        "credits": list(econ.get('flex_credits', [])),
+        "passes": econ.get('free_passes', 0),
+        "streak": econ.get('streak_progress', 0),
+        # Dia concluído sem Flex: o +1 do streak só é confirmado amanhã
+        "streak_pending": all_done_today and cfg.get('last_completion_date') == day.date and not flex_today,
+        "pending_trade": bool(econ.get('pending_trade', False)),
+        "flex_today": flex_today,
+    }
+    tasks = {"active": [], "archived": []}
+    for tid, t in cfg.get('tasks', {}).items():
+        status = t.get('status', 'em progresso')
+        if status == 'em progresso':
+            tasks["active"].append((tid, t['name'], schedule_text(t)))
+        elif status == 'encerrado':
+            tasks["archived"].append((tid, t['name']))
+    settings = {
+        "tts_speed": cfg.get('tts_speed', 2),
+        "celebrations": cfg.get('celebrations', DEFAULT_CELEBRATIONS),
+        "rejections": list(cfg.get('rejections', [])),
+    }
+    return {"config": cfg, "day": day, "economy": economy, "tasks": tasks, "settings": settings}
+
+def bank_model():
+    """View model do extrato: saldos, número de depósitos e liberações das próximas 12 semanas."""
+    from datetime import timedelta
+    from bank_manager import get_balances, get_history_size, release_calendar
+    today = date.today()
+    locked_min, available_min = get_balances()
+    return {
+        "locked": locked_min,
+        "available": available_min,
+        "deposits": get_history_size(),
+        "upcoming": release_calendar(today + timedelta(days=1), today + timedelta(weeks=12), by="week"),
+    }
+
+def current_versions(groups=("config", "bank")):
+    """Versão de cada grupo (só stat). O bank_manager só é importado se o banco for pedido."""
+    today = date.today().isoformat()
+    versions = {}
+    if "config" in groups:
+        versions["config"] = (get_config_version(), today)
+    if "bank" in groups:
+        from bank_manager import bank_state_file
+        versions["bank"] = (tuple(get_file_stat(bank_state_file()) or ()), today)
+    return versions
+
+def derive_models(stale, versions):
+    """Roda no pool de I/O: recalcula só os grupos cujos arquivos mudaram."""
+    models = {}
+    if "config" in stale:
+        models.update(config_models(load_config_data(), versions["config"][0]))
+    if "bank" in stale:
+        models["bank"] = bank_model()
+    return {k: versions[k] for k in stale}, models
+
+class ViewStore:
+    """
+    store.get(nome): view model atual (pode estar até WATCH_MS atrasado).
+    store.current(nome): em dia, síncrono (lê do disco só se o arquivo mudou).
+    store.when_ready(nome, cb): cb(view model) assim que estiver em dia.
+    store.subscribe(nome, cb, widget): cb a cada mudança, até o widget ser destruído.
+    """
+    def __init__(self, root, io, watch_ms=WATCH_MS):
+        self.root = root
+        self.io = io
+        self.watch_ms = watch_ms
+        self.models = {}
+        self.versions = {"config": None, "bank": None}
+        self.subscribers = {} # nome -> [callbacks]
+        self.waiting = [] # (nome, callback) esperando os view models ficarem em dia
+        self.loading = False
+        self.generation = 0 # Sobe a cada carga síncrona: derivação de fundo anterior a ela é descartada
+
+    # --- Publicação ---
+
+    def publish(self, versions, models):
+        self.versions.update(versions)
+        for name, model in models.items():
+            old = self.models.get(name)
+            self.models[name] = model
+            if old is not None and old == model: continue
+            for callback in list(self.subscribers.get(name, ())):
+                try: callback(model)
+                except Exception as e:
+                    log_event("view_store_error", f"Erro ao avisar '{name}': {e}", category="system")
+
+    def flush_waiting(self):
+        waiting, self.waiting = self.waiting, []
+        for name, callback in waiting:
+            try: callback(self.models.get(name))
+            except Exception as e:
+                log_event("view_store_error", f"Erro ao entregar '{name}': {e}", category="system")
+
+    # --- Atualização ---
+
+    def refresh(self):
+        """Stat dos arquivos; se algo mudou, deriva de novo no pool de I/O."""
+        if self.loading: return
+        versions = current_versions()
+        stale = [k for k in versions if versions[k] != self.versions[k]]
+        if not stale:
+            self.flush_waiting()
+            return
+        self.loading = True
+        generation = self.generation
+        self.io.submit(derive_models, stale, versions,
+                       on_done=lambda result: self.on_derived(result, generation), on_error=self.on_failed)
+
+    def on_derived(self, result, generation):
+        self.loading = False
+        if generation == self.generation:
+            self.publish(*result)
+        self.refresh() # Mudou de novo durante a derivação? Senão, entrega quem esperava
+
+    def on_failed(self, error):
+        self.loading = False # O watcher tenta de novo na próxima volta
+
+    def current(self, name):
+        """View model em dia, na hora (thread do Tk): lê do disco só o grupo que mudou."""
+        group = "bank" if name == "bank" else "config"
+        versions = current_versions((group,))
+        if versions[group] != self.versions[group] or name not in self.models:
+            self.generation += 1
+            self.publish(*derive_models([group], versions))
+        return self.models.get(name)
+
+    def watch(self):
+        self.refresh()
+        self.root.after(self.watch_ms, self.watch)
+
+    # --- Assinaturas ---
+
+    def get(self, name):
+        return self.models.get(name)
+
+    def when_ready(self, name, callback):
+        self.waiting.append((name, callback))
+        self.refresh()
+
+    def subscribe(self, name, callback, widget=None):
+        self.subscribers.setdefault(name, []).append(callback)
+        if widget is not None:
+            # <Destroy> também chega dos filhos da janela: só a própria encerra a assinatura
+            widget.bind("<Destroy>", lambda e: str(e.widget) == str(widget) and self.unsubscribe(name, callback), add="+")
+
+    def unsubscribe(self, name, callback):
+        try: self.subscribers.get(name, []).remove(callback)
+        except ValueError: pass